@@ -0,0 +1,415 @@
+"""
+TemanIsyarat Backend - Runtime Configuration
+File: backend/app/config.py
+
+Semua pengaturan runtime dibaca dari environment variable (prefix
+TEMANISYARAT_) supaya bisa di-tuning tanpa mengubah kode.
+"""
+
+import json
+import os
+
+
+# =====================================================================
+#   HELPERS
+# =====================================================================
+
+ENV_PREFIX = "TEMANISYARAT_"
+
+
+def env_str(name, default=None):
+    """Baca environment variable TEMANISYARAT_<name> sebagai string"""
+    return os.environ.get(ENV_PREFIX + name, default)
+
+
+def env_int(name, default):
+    """Baca environment variable TEMANISYARAT_<name> sebagai int"""
+    value = env_str(name)
+    return int(value) if value not in (None, "") else default
+
+
+def env_float(name, default):
+    """Baca environment variable TEMANISYARAT_<name> sebagai float"""
+    value = env_str(name)
+    return float(value) if value not in (None, "") else default
+
+
+def env_bool(name, default=False):
+    """Baca environment variable TEMANISYARAT_<name> sebagai boolean"""
+    value = env_str(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def per_model(name, model_name, default, cast=env_int):
+    """
+    Baca setting yang bisa di-override per model, contoh:
+    TEMANISYARAT_BATCH_MAX_SIZE_WORDS mengalahkan TEMANISYARAT_BATCH_MAX_SIZE
+    """
+    return cast(f"{name}_{model_name.upper()}", cast(name, default))
+
+
+# =====================================================================
+#   MODEL FILES
+# =====================================================================
+
+# Folder model (default: backend/app/models)
+MODELS_DIR = env_str("MODELS_DIR")
+
+
+# Versi aktif per model dipin lewat TEMANISYARAT_MODEL_VERSION_<NAME>
+# (default: versi terbaru di folder), split A/B lewat
+# TEMANISYARAT_MODEL_SPLIT_<NAME>="v1:90,v2:10" (lihat app/utils/registry.py)
+
+# Interval scan folder model untuk hot-swap versi baru (detik, 0 = nonaktif;
+# reload manual tetap bisa lewat POST /api/models/reload)
+REGISTRY_POLL_S = env_float("REGISTRY_POLL_S", 30.0)
+
+# Versi non-aktif yang idle selama ini di-evict dari memori (0 = tidak pernah)
+REGISTRY_IDLE_TTL_S = env_float("REGISTRY_IDLE_TTL_S", 600.0)
+
+# Jumlah maksimum versi non-aktif yang dimuat bersamaan (0 = tanpa batas)
+REGISTRY_MAX_LOADED = env_int("REGISTRY_MAX_LOADED", 2)
+
+
+# =====================================================================
+#   STARTUP
+# =====================================================================
+
+# Muat model di background: server langsung menjawab /health (liveness),
+# /ready baru 200 setelah semua model dimuat dan di-warmup
+BACKGROUND_LOAD = env_bool("BACKGROUND_LOAD", True)
+
+# Ukuran batch untuk forward pass warmup per model (dipisah koma)
+WARMUP_BATCH_SIZES = [
+    int(x) for x in env_str("WARMUP_BATCH_SIZES", "1").split(",") if x.strip()
+]
+
+# preprocess_pipeline.pkl lama tidak dipakai untuk inference dan butuh
+# shim pickle; hanya dimuat bila diaktifkan
+LOAD_LEGACY_PIPELINE = env_bool("LOAD_LEGACY_PIPELINE", False)
+
+
+# =====================================================================
+#   PREPROCESSING
+# =====================================================================
+
+# Decode JPEG di resolusi rendah (DCT scaling) mendekati 224x224.
+# Set 0 untuk parity bit-exact dengan transform torchvision lama.
+PREPROCESS_JPEG_DRAFT = env_bool("PREPROCESS_JPEG_DRAFT", True)
+
+
+# =====================================================================
+#   MODEL OPTIMIZATION
+# =====================================================================
+
+# Varian model CPU: fp32, int8, channels_last, script, compile (gabung
+# dengan koma). Override per model: TEMANISYARAT_MODEL_VARIANT_FULL / _WORDS
+MODEL_VARIANT = env_str("MODEL_VARIANT", "fp32")
+
+
+def model_variant(model_name):
+    """Varian optimasi yang dipakai untuk model tertentu"""
+    return per_model("MODEL_VARIANT", model_name, MODEL_VARIANT, env_str)
+
+
+# Engine inference: torch (varian MODEL_VARIANT) atau onnxruntime (CPU,
+# file <model>.onnx diekspor otomatis). Override per model:
+# TEMANISYARAT_INFERENCE_BACKEND_FULL / _WORDS
+INFERENCE_BACKEND = env_str("INFERENCE_BACKEND", "torch")
+
+# Opset untuk ekspor ONNX
+ONNX_OPSET = env_int("ONNX_OPSET", 17)
+
+
+def inference_backend(model_name):
+    """Engine inference yang dipakai untuk model tertentu"""
+    return per_model("INFERENCE_BACKEND", model_name, INFERENCE_BACKEND, env_str)
+
+
+# =====================================================================
+#   AUTOTUNED THREADING
+# =====================================================================
+
+# Hasil `python -m app.utils.autotune` (workers, intra-op/inter-op thread,
+# batch size). Dipakai sebagai default bila env var tidak di-set; env var
+# selalu menang. Diabaikan bila dibuat di mesin dengan jumlah core berbeda.
+TUNING_FILE = env_str(
+    "TUNING_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tuning.json")
+)
+
+
+def load_tuning(path=None):
+    """Baca file tuning (dict kosong bila tidak ada / tidak cocok dengan mesin ini)"""
+    path = path or TUNING_FILE
+    try:
+        with open(path) as f:
+            tuning = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if tuning.get("cpu_count") != os.cpu_count():
+        return {}
+    return tuning.get("best") or {}
+
+
+TUNING = load_tuning() if env_bool("TUNING", True) else {}
+
+
+# =====================================================================
+#   MULTI-PROCESS SERVING
+# =====================================================================
+
+# Jumlah worker process (diisi otomatis oleh gunicorn.conf.py; set manual
+# untuk uvicorn --workers) - dipakai untuk membagi core antar worker
+WORKERS = env_int("WORKERS", TUNING.get("workers", 1))
+
+# Intra-op thread PyTorch per worker (0 = cpu_count / WORKERS)
+INTRA_OP_THREADS = env_int("INTRA_OP_THREADS", TUNING.get("intra_op_threads", 0))
+
+# Inter-op thread PyTorch per worker (0 = default PyTorch)
+INTEROP_THREADS = env_int("INTEROP_THREADS", TUNING.get("interop_threads", 0))
+
+
+# =====================================================================
+#   INFERENCE EXECUTOR
+# =====================================================================
+
+# Jumlah thread untuk decode/transform/forward pass
+INFERENCE_WORKERS = env_int("INFERENCE_WORKERS", min(4, os.cpu_count() or 1))
+
+# Jumlah maksimum job (berjalan + antre) di executor sebelum caller menunggu
+INFERENCE_MAX_PENDING = env_int("INFERENCE_MAX_PENDING", 64)
+
+
+# =====================================================================
+#   MICRO-BATCHING
+# =====================================================================
+
+# Jumlah maksimum request yang digabung dalam satu forward pass
+BATCH_MAX_SIZE = env_int("BATCH_MAX_SIZE", TUNING.get("batch_size", 8))
+
+# Waktu tunggu maksimum (ms) untuk mengumpulkan batch setelah request pertama
+BATCH_MAX_WAIT_MS = env_float("BATCH_MAX_WAIT_MS", 5.0)
+
+# Jumlah batch per model yang boleh berjalan bersamaan di executor
+BATCH_MAX_CONCURRENCY = env_int("BATCH_MAX_CONCURRENCY", 1)
+
+
+def batch_window(model_name):
+    """Return (max_batch_size, max_wait_ms) untuk model tertentu"""
+    return (
+        per_model("BATCH_MAX_SIZE", model_name, BATCH_MAX_SIZE, env_int),
+        per_model("BATCH_MAX_WAIT_MS", model_name, BATCH_MAX_WAIT_MS, env_float),
+    )
+
+
+# =====================================================================
+#   CONFIDENCE CASCADE
+# =====================================================================
+
+# Jalankan first stage murah dulu, AlexNet hanya bila confidence rendah.
+# Override per model: TEMANISYARAT_CASCADE_FULL / _WORDS (dst. untuk
+# setting di bawah)
+CASCADE = env_bool("CASCADE", False)
+
+# Confidence top-1 minimum (0 - 100) agar hasil first stage dipakai
+# (pilih dengan: python -m app.utils.cascade --images <validation set>)
+CASCADE_THRESHOLD = env_float("CASCADE_THRESHOLD", 90.0)
+
+# Resolusi input first stage (0 = 224 untuk model distilasi, 128 untuk
+# model utama yang diperkecil)
+CASCADE_INPUT_SIZE = env_int("CASCADE_INPUT_SIZE", 0)
+
+# Tanpa model distilasi (<model>.fast.weights.pt) cascade TIDAK dipasang,
+# kecuali fallback ini dinyalakan: AlexNet@128px hanya ~1.4x (batch 1) -
+# 2.4x (batch 16) lebih murah dari AlexNet@224px di CPU (layer FC tidak
+# ikut mengecil), jadi hemat hanya bila < ~30% request di-escalate.
+# Ukur dulu dengan: python -m app.utils.cascade --images <validation set>
+CASCADE_RESIZE_FALLBACK = env_bool("CASCADE_RESIZE_FALLBACK", False)
+
+# Fraksi hasil first stage yang diverifikasi AlexNet di background
+# (untuk mengukur agreement rate)
+CASCADE_AUDIT_RATE = env_float("CASCADE_AUDIT_RATE", 0.05)
+
+
+def cascade_settings(model_name):
+    """Setting cascade untuk model tertentu (None = cascade nonaktif)"""
+    if not per_model("CASCADE", model_name, CASCADE, env_bool):
+        return None
+    return {
+        "threshold": per_model("CASCADE_THRESHOLD", model_name, CASCADE_THRESHOLD, env_float),
+        "input_size": per_model("CASCADE_INPUT_SIZE", model_name, CASCADE_INPUT_SIZE, env_int),
+        "resize_fallback": per_model("CASCADE_RESIZE_FALLBACK", model_name, CASCADE_RESIZE_FALLBACK, env_bool),
+        "audit_rate": per_model("CASCADE_AUDIT_RATE", model_name, CASCADE_AUDIT_RATE, env_float),
+        "batch_window": batch_window(model_name),
+        "max_concurrency": BATCH_MAX_CONCURRENCY,
+    }
+
+
+# =====================================================================
+#   CUSTOM SIGNS (EMBEDDING + kNN)
+# =====================================================================
+
+# Sign baru didaftarkan dari beberapa contoh image (embedding layer
+# penultimate AlexNet) tanpa retrain; kNN berjalan di samping softmax.
+# Override per model: TEMANISYARAT_KNN_WORDS / _FULL (dst.)
+# Default nonaktif: opt-in per deployment (index dibagi antar worker
+# lewat file + file lock, lihat embeddings.py)
+KNN = env_bool("KNN", False)
+
+# Folder index per versi model (<model>@<versi>.knn.npz)
+KNN_DIR = env_str(
+    "KNN_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knn")
+)
+
+# Jumlah tetangga yang di-vote
+KNN_K = env_int("KNN_K", 5)
+
+# Cosine similarity minimum agar hasil kNN dianggap cocok ("match")
+KNN_THRESHOLD = env_float("KNN_THRESHOLD", 0.85)
+
+# Dimensi embedding di index setelah proyeksi acak (0 = 4096 penuh)
+KNN_DIM = env_int("KNN_DIM", 256)
+
+# Mulai jumlah vektor ini pencarian memakai IVF (approximate, 0 = selalu exact)
+KNN_APPROX_MIN = env_int("KNN_APPROX_MIN", 20000)
+
+# Cluster IVF yang diperiksa per query
+KNN_NPROBE = env_int("KNN_NPROBE", 8)
+
+# Jumlah image contoh maksimum per request registrasi sign
+KNN_MAX_EXAMPLES = env_int("KNN_MAX_EXAMPLES", 32)
+
+
+def knn_enabled(model_name):
+    """Embedding + kNN aktif untuk model tertentu"""
+    return per_model("KNN", model_name, KNN, env_bool)
+
+
+# =====================================================================
+#   ADMISSION CONTROL
+# =====================================================================
+
+# Request berjalan + antre maksimum per model sebelum 503 + Retry-After
+# (0 = tanpa batas). Override per model: ..._FULL / ..._WORDS
+ADMISSION_MAX_INFLIGHT = env_int("ADMISSION_MAX_INFLIGHT", 64)
+
+# Fraksi limit yang dicadangkan untuk traffic kamera (interactive)
+ADMISSION_INTERACTIVE_RESERVE = env_float("ADMISSION_INTERACTIVE_RESERVE", 0.25)
+
+# Stream bulk (/api/detect/batch, /api/detect/video) yang boleh berjalan bersamaan
+ADMISSION_MAX_BULK = env_int("ADMISSION_MAX_BULK", 2)
+
+# Waktu maksimum stream bulk mengalah ke request interactive per chunk (ms)
+ADMISSION_BULK_YIELD_MS = env_float("ADMISSION_BULK_YIELD_MS", 200.0)
+
+# Deadline default bila client tidak mengirim X-Deadline-Ms (ms, 0 = tanpa deadline)
+DEADLINE_DEFAULT_MS = env_float("DEADLINE_DEFAULT_MS", 0.0)
+
+
+def admission_limit(model_name):
+    """Limit in-flight untuk model tertentu"""
+    return per_model("ADMISSION_MAX_INFLIGHT", model_name, ADMISSION_MAX_INFLIGHT, env_int)
+
+
+# =====================================================================
+#   PREDICTION CACHE
+# =====================================================================
+
+# Jumlah maksimum hasil prediksi yang di-cache (0 = cache nonaktif)
+CACHE_MAX_ENTRIES = env_int("CACHE_MAX_ENTRIES", 1024)
+
+# Umur maksimum hasil di cache (detik)
+CACHE_TTL_S = env_float("CACHE_TTL_S", 30.0)
+
+# Jarak Hamming maksimum dHash untuk frame hampir identik (-1 = nonaktif)
+CACHE_PHASH_DISTANCE = env_int("CACHE_PHASH_DISTANCE", -1)
+
+
+# =====================================================================
+#   SESSION STATIC-FRAME GATING
+# =====================================================================
+
+# Jumlah session kamera yang diingat (0 = gating nonaktif)
+SESSION_MAX_ENTRIES = env_int("SESSION_MAX_ENTRIES", 1024)
+
+# Session dihapus bila tidak ada frame selama sekian detik
+SESSION_TTL_S = env_float("SESSION_TTL_S", 60.0)
+
+# Beda frame maksimum (mean absolute difference thumbnail, 0.0 - 1.0)
+# untuk memakai ulang prediksi sebelumnya
+SESSION_DIFF_THRESHOLD = env_float("SESSION_DIFF_THRESHOLD", 0.02)
+
+# Ukuran sisi thumbnail grayscale pembanding
+SESSION_THUMB_SIZE = env_int("SESSION_THUMB_SIZE", 16)
+
+# Paksa inference setelah sekian frame berturut-turut di-skip (0 = tanpa batas)
+SESSION_MAX_SKIPPED = env_int("SESSION_MAX_SKIPPED", 30)
+
+
+# =====================================================================
+#   UPLOAD LIMITS
+# =====================================================================
+
+# Ukuran maksimum satu image upload / frame (bytes) - lebih besar = 413
+UPLOAD_MAX_BYTES = env_int("UPLOAD_MAX_BYTES", 10 * 1024 * 1024)
+
+# Jumlah pixel maksimum (lebar x tinggi dari header, sebelum decode) -
+# menolak decompression bomb (PNG kecil berdimensi raksasa) dengan 413
+UPLOAD_MAX_PIXELS = env_int("UPLOAD_MAX_PIXELS", 50_000_000)
+
+# Ukuran maksimum body request /api/detect/batch (bytes)
+BULK_MAX_BYTES = env_int("BULK_MAX_BYTES", 512 * 1024 * 1024)
+
+
+# =====================================================================
+#   BULK DETECTION
+# =====================================================================
+
+# Jumlah image per forward pass di /api/detect/batch
+BULK_BATCH_SIZE = env_int("BULK_BATCH_SIZE", 32)
+
+# Ukuran maksimum satu file di dalam arsip zip/tar (bytes)
+BULK_MAX_MEMBER_BYTES = env_int("BULK_MAX_MEMBER_BYTES", 20 * 1024 * 1024)
+
+
+# =====================================================================
+#   VIDEO DETECTION
+# =====================================================================
+
+# Frame per detik yang di-sample dari clip (override per request: form "fps")
+VIDEO_SAMPLE_FPS = env_float("VIDEO_SAMPLE_FPS", 5.0)
+
+# Batas atas fps yang boleh diminta client
+VIDEO_MAX_FPS = env_float("VIDEO_MAX_FPS", 30.0)
+
+# Frame sampel per forward pass
+VIDEO_BATCH_SIZE = env_int("VIDEO_BATCH_SIZE", 16)
+
+# Ukuran maksimum file video (bytes) dan durasi maksimum (detik, 0 = tanpa batas)
+VIDEO_MAX_BYTES = env_int("VIDEO_MAX_BYTES", 200 * 1024 * 1024)
+VIDEO_MAX_DURATION_S = env_float("VIDEO_MAX_DURATION_S", 300.0)
+
+
+# =====================================================================
+#   LOGGING & PROFILING
+# =====================================================================
+
+# Level log hot path (DEBUG, INFO, WARNING, ERROR)
+LOG_LEVEL = env_str("LOG_LEVEL", "INFO")
+
+# Format log: "json" (satu object per baris) atau "text"
+LOG_FORMAT = env_str("LOG_FORMAT", "json")
+
+# Folder output trace profiling
+PROFILE_DIR = env_str("PROFILE_DIR", "profiles")
+
+# Fraksi request yang di-profile otomatis (0.0 = nonaktif)
+PROFILE_SAMPLE_RATE = env_float("PROFILE_SAMPLE_RATE", 0.0)
+
+# Izinkan client meminta profiling lewat header "X-Profile: 1"
+PROFILE_ALLOW_HEADER = env_bool("PROFILE_ALLOW_HEADER", False)
+
+# Profiler: "torch" (chrome trace) atau "cprofile" (pstats)
+PROFILE_MODE = env_str("PROFILE_MODE", "torch")
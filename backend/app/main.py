@@ -5,29 +5,110 @@ File: backend/app/main.py
 IMPORTANT: Replace your existing main.py with this file
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import asyncio
+import time
+import uuid
+from typing import List, Optional
+
+from fastapi import FastAPI, File, Form, Request, UploadFile, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import uvicorn
 
+from app import config
+
 # Import detection logic dari predict_utils.py
-from app.utils.predict_utils import load_models, predict_from_image
+from app.utils.predict_utils import predict_batch, prepare_image
+from app.utils.vector_index import normalize
+from app.utils.registry import ModelRegistry
+from app.utils.runtime import configure_threads, memory_report
+from app.utils import metrics
+from app.utils.logging_utils import (
+    RequestIdMiddleware, get_logger, log_timing, request_id_var, setup_logging, shutdown_logging
+)
+from app.utils.profiling import run_profiled, should_profile
+from app.utils.executor import InferenceExecutor
+from app.utils.streaming import stream_detections
+from app.utils.bulk import stream_bulk_ndjson
+from app.utils.embeddings import batch_predictor, index_version, signs_path
+from app.utils.cache import PredictionCache, content_hash, dhash
+from app.utils.sessions import SessionStore, thumbnail
+from app.utils.preprocess import raw_frame_from_headers
+from app.utils.uploads import MULTIPART_SLACK, BodyLimitMiddleware, UploadError, read_upload
+from app.utils import video
+from app.utils.responses import client_tables, compact_prediction, label_table, render, wants_compact
+from app.utils.admission import (
+    MODELS_HEADER, AdmissionController, AdmissionMiddleware, DeadlineExceeded, check_deadline, declared_models
+)
 
 # =====================================================================
 #   FASTAPI APP INITIALIZATION
 # =====================================================================
 
+# Logging hot path: leveled, non-blocking (queue), dengan request ID
+setup_logging()
+logger = get_logger("api")
+
 app = FastAPI(
     title="TemanIsyarat API",
     description="API untuk deteksi bahasa isyarat SIBI (huruf dan kata)",
     version="1.0.0"
 )
 
+# Body request dibatasi sebelum dibaca (413 tanpa buffering upload raksasa)
+app.add_middleware(
+    BodyLimitMiddleware,
+    max_bytes=config.UPLOAD_MAX_BYTES + MULTIPART_SLACK if config.UPLOAD_MAX_BYTES > 0 else 0,
+    overrides={
+        "/api/detect/batch": config.BULK_MAX_BYTES,
+        "/api/detect/video": config.VIDEO_MAX_BYTES + MULTIPART_SLACK,
+        "/api/signs": config.UPLOAD_MAX_BYTES * config.KNN_MAX_EXAMPLES + MULTIPART_SLACK
+        if config.UPLOAD_MAX_BYTES > 0 else 0,
+    },
+)
+
+# Nama endpoint -> nama model internal
+MODEL_ALIASES = {
+    "letters": "full",
+    "full": "full",
+    "words": "words",
+}
+
+
+# Limit in-flight per model + prioritas + deadline client (503 + Retry-After
+# sebelum upload dibaca). /api/detect/all dihitung ke model di X-Models /
+# ?models= (default kedua model).
+admission = AdmissionController(
+    max_inflight=config.admission_limit,
+    interactive_reserve=config.ADMISSION_INTERACTIVE_RESERVE,
+    max_bulk=config.ADMISSION_MAX_BULK,
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    routes={
+        "/api/detect/letters": ["full"],
+        "/api/detect/words": ["words"],
+        "/api/detect/all": ["full", "words"],
+    },
+    bulk_routes=["/api/detect/batch", "/api/detect/video"],
+    aliases=MODEL_ALIASES,
+)
+
+# Request count / error / latency / in-flight per endpoint untuk /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# X-Request-ID untuk korelasi log
+app.add_middleware(RequestIdMiddleware)
+
 # =====================================================================
 #   CORS CONFIGURATION - CRITICAL FOR FRONTEND CONNECTION
 # =====================================================================
 
 # IMPORTANT: Allow frontend origins untuk development
+# CORS dipasang TERAKHIR (= paling luar): response yang dibuat middleware
+# lain tanpa memanggil endpoint (413 BodyLimit, 503 Admission) juga harus
+# membawa header CORS, kalau tidak browser hanya melihat "network error"
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -39,6 +120,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods (GET, POST, etc.)
     allow_headers=["*"],  # Allow all headers
+    # Header response yang boleh dibaca frontend (Retry-After dari 503 admission)
+    expose_headers=["Retry-After", "X-Request-ID", "X-Model-Version"],
 )
 
 print("✅ CORS middleware configured for frontend origins")
@@ -48,30 +131,172 @@ print("✅ CORS middleware configured for frontend origins")
 # =====================================================================
 
 models = None
-pipeline = None
 labels_map = None
+executor = None
+_load_task = None
+_maintenance_task = None
 
-@app.on_event("startup")
-async def startup_event():
-    """Load models when server starts"""
-    global models, pipeline, labels_map
-    
-    print("\n" + "="*60)
-    print("🚀 Starting TemanIsyarat Backend...")
-    print("="*60)
-    
+# Registry model + versi (hot-swap, A/B, idle eviction). `schedulers` berisi
+# scheduler versi aktif per model dan diperbarui di tempat saat swap.
+registry = ModelRegistry(
+    idle_ttl_s=config.REGISTRY_IDLE_TTL_S,
+    max_loaded=config.REGISTRY_MAX_LOADED,
+)
+schedulers = registry.schedulers
+app.state.registry = registry
+
+# Cache hasil prediksi (None bila TEMANISYARAT_CACHE_MAX_ENTRIES=0)
+prediction_cache = PredictionCache(
+    max_entries=config.CACHE_MAX_ENTRIES,
+    ttl_s=config.CACHE_TTL_S,
+    phash_distance=config.CACHE_PHASH_DISTANCE,
+) if config.CACHE_MAX_ENTRIES > 0 else None
+
+# Content-Type untuk input raw frame (lihat read_image_input)
+RAW_CONTENT_TYPE = "application/octet-stream"
+
+# Static-frame gating per session kamera (None bila TEMANISYARAT_SESSION_MAX_ENTRIES=0)
+session_store = SessionStore(
+    max_sessions=config.SESSION_MAX_ENTRIES,
+    ttl_s=config.SESSION_TTL_S,
+    threshold=config.SESSION_DIFF_THRESHOLD,
+    max_skipped=config.SESSION_MAX_SKIPPED,
+) if config.SESSION_MAX_ENTRIES > 0 else None
+
+# Status startup untuk readiness probe (/ready) dan laporan cold start
+startup_state = {
+    "state": "starting",   # starting -> loading -> ready | failed
+    "error": None,
+    "load_s": {},
+    "warmup_s": {},
+    "cold_start_s": None,
+}
+_process_started = time.perf_counter()
+
+
+def prepare_models(warmup=True, fork_safe=False):
+    """
+    Scan folder model lewat registry, muat versi aktif (sekali per proses,
+    termasuk varian CPU), lalu warmup. Dijalankan di thread terpisah supaya
+    event loop tetap melayani /health. Dengan gunicorn preload, load +
+    optimasi sudah terjadi di master (warmup=False, fork_safe=True: tanpa
+    forward pass) dan worker hanya melakukan warmup (+ trace / export ONNX).
+
+    Returns:
+        dict: model_name -> versi aktif
+    """
+    targets = registry.load_active(warmup=warmup, fork_safe=fork_safe)
+
+    for name, version in targets.items():
+        entry = registry.get(name, version)
+        startup_state["load_s"][entry.key] = entry.load_s
+        print(f"✅ Model '{entry.key}' loaded ({entry.load_s:.2f}s): {len(entry.labels)} classes"
+              + (f", engine {entry.backend}" if entry.backend != "torch" else ""))
+        if warmup:
+            startup_state["warmup_s"][entry.key] = entry.warmup_s
+            print(f"🔥 Model '{entry.key}' warmed up ({entry.warmup_s:.2f}s)")
+
+    return targets
+
+
+async def load_and_start():
+    """Load + warmup model, lalu jalankan batch scheduler dan tandai ready"""
+    global models, labels_map, _maintenance_task
+
+    startup_state["state"] = "loading"
     try:
-        models, pipeline, labels_map = load_models()
+        loop = asyncio.get_running_loop()
+        targets = await loop.run_in_executor(None, prepare_models)
+
+        # Satu batch scheduler per versi model yang dimuat
+        registry.executor = executor
+        await registry.start_active(targets)
+        for name in targets:
+            scheduler = schedulers[name]
+            print(f"⚡ Batch scheduler '{name}': max_batch={scheduler.max_batch_size}, "
+                  f"max_wait={scheduler.max_wait * 1000.0}ms")
+
+        models, labels_map = registry.models, registry.labels
+        startup_state["cold_start_s"] = round(time.perf_counter() - _process_started, 3)
+        startup_state["state"] = "ready"
+
+        # Hot-swap versi baru (scan folder) + idle eviction di background
+        _maintenance_task = loop.create_task(registry.maintain(
+            config.REGISTRY_POLL_S or 30.0, poll=config.REGISTRY_POLL_S > 0
+        ))
+
         print("\n✅ All models loaded successfully!")
-        print("📦 Available models:", list(models.keys()) if models else "None")
-        print("🌐 CORS enabled for frontend connection")
+        print("📦 Available models:", [registry.get(name).key for name in targets])
+        print(f"⏱️ Cold start: {startup_state['cold_start_s']:.2f}s")
         print("="*60 + "\n")
     except Exception as e:
+        startup_state["state"] = "failed"
+        startup_state["error"] = str(e)
         print(f"\n❌ ERROR loading models: {e}")
         print("="*60 + "\n")
         raise
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Start executor, then load + warm up models (in background by default)"""
+    global executor, _load_task
+    
+    print("\n" + "="*60)
+    print("🚀 Starting TemanIsyarat Backend...")
+    print("="*60)
+
+    # Bagi core antar worker process supaya tidak oversubscribe
+    threads = configure_threads()
+    print(f"🧮 Torch threads: {threads['intra_op_threads']} intra-op, "
+          f"{threads['interop_threads']} inter-op (workers={config.WORKERS})")
+    if config.TUNING:
+        print(f"🎛️ Autotuned defaults ({config.TUNING_FILE}): workers={config.TUNING.get('workers')}, "
+              f"threads={config.TUNING.get('intra_op_threads')}, batch={config.TUNING.get('batch_size')}")
+
+    # Thread pool untuk semua kerja CPU (decode, transform, forward)
+    executor = InferenceExecutor(
+        max_workers=config.INFERENCE_WORKERS,
+        max_pending=config.INFERENCE_MAX_PENDING,
+    )
+    app.state.executor = executor
+    print(f"🧵 Inference executor: {executor.max_workers} workers")
+    print("🌐 CORS enabled for frontend connection")
+
+    if config.BACKGROUND_LOAD:
+        # /health langsung hidup; /ready 503 sampai model siap
+        _load_task = asyncio.get_running_loop().create_task(load_and_start())
+        _load_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    else:
+        await load_and_start()
+
+
+def models_not_ready():
+    """HTTPException untuk request yang datang sebelum model siap"""
+    if startup_state["state"] == "failed":
+        return HTTPException(
+            status_code=500,
+            detail=f"Models failed to load: {startup_state['error']}"
+        )
+    return HTTPException(
+        status_code=503,
+        detail="Models are still loading. Please retry shortly.",
+        headers={"Retry-After": "2"},
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop batch schedulers and inference executor when server stops"""
+    for task in (_load_task, _maintenance_task):
+        if task is not None and not task.done():
+            task.cancel()
+    await registry.stop()
+    if executor is not None:
+        executor.shutdown(wait=False)
+    shutdown_logging()
+
+
 # =====================================================================
 #   HEALTH CHECK ENDPOINT - REQUIRED BY FRONTEND
 # =====================================================================
@@ -87,6 +312,8 @@ async def health_check():
     return {
         "status": "healthy",
         "message": "TemanIsyarat Backend is running",
+        "ready": startup_state["state"] == "ready",
+        "startup": startup_state,
         "models_loaded": models is not None,
         "available_models": list(models.keys()) if models else [],
         "total_models": len(models) if models else 0,
@@ -97,17 +324,440 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe untuk load balancer: 200 hanya setelah semua model
+    dimuat dan di-warmup, 503 selama masih cold
+    """
+    ready = startup_state["state"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "state": startup_state["state"],
+            "error": startup_state["error"],
+            "cold_start_s": startup_state["cold_start_s"],
+        },
+    )
+
+
+@app.get("/api/stats")
+async def get_stats():
+    """
+    Statistik runtime untuk tuning - queue depth dan ukuran batch per model
+    """
+    return {
+        "process": memory_report(),
+        "executor": executor.stats() if executor else None,
+        "cache": prediction_cache.stats() if prediction_cache else None,
+        "sessions": session_store.stats() if session_store else None,
+        "batching": {
+            key: scheduler.stats() for key, scheduler in registry.loaded_schedulers().items()
+        },
+        "cascade": {
+            key: cascade.stats() for key, cascade in registry.loaded_cascades().items()
+        },
+        "admission": admission.stats(),
+        "registry": {"swaps": registry.swaps, "evictions": registry.evictions},
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Metrics format teks Prometheus: latency per stage (upload_read, decode,
+    transform, forward, topk, serialize) per model, request/error count,
+    in-flight request, queue depth executor dan batch scheduler
+    """
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+metrics.REGISTRY.register(metrics.GaugeFunc(
+    "temanisyarat_executor_queue_depth",
+    "Jumlah job yang antre / berjalan di inference executor",
+    ("state",),
+    lambda: {
+        ("queued",): executor.stats()["queued"] if executor else 0,
+        ("running",): executor.stats()["running"] if executor else 0,
+    },
+))
+
+metrics.REGISTRY.register(metrics.GaugeFunc(
+    "temanisyarat_batch_queue_depth",
+    "Jumlah request yang antre di batch scheduler per model@versi",
+    ("model",),
+    lambda: {(key,): scheduler.stats()["queue_depth"] for key, scheduler in registry.loaded_schedulers().items()},
+))
+
+
+# =====================================================================
+#   MODEL REGISTRY ENDPOINTS
+# =====================================================================
+
+@app.get("/api/models")
+async def list_models():
+    """
+    Model + versi yang ditemukan registry: versi aktif, split A/B, state
+    load (available / loading / ready / failed / evicted) dan pemakaian
+    """
+    return registry.info()
+
+
+@app.get("/api/labels")
+async def list_labels():
+    """
+    Label table versi aktif per model. Kirim "table" kembali sebagai header
+    X-Label-Table supaya response ringkas berisi index label, bukan string
+    """
+    if not models:
+        raise models_not_ready()
+    tables = {}
+    for name in registry.names():
+        entry = registry.get(name)
+        table, _ = label_table(entry.labels)
+        tables[name] = {"version": entry.version, "table": table, "count": len(entry.labels), "labels": entry.labels}
+    return tables
+
+
+@app.post("/api/models/reload")
+async def reload_models():
+    """
+    Scan ulang folder model lalu muat + warmup versi baru di background dan
+    swap secara atomik; request yang sedang berjalan selesai di versi lama
+    """
+    if not models:
+        raise models_not_ready()
+    activated = await registry.refresh()
+    return {"activated": activated, **registry.info()}
+
+
+@app.post("/api/models/{model}/activate")
+async def activate_model(model: str, version: str = Form(...)):
+    """Jadikan satu versi aktif (rollback / rollout manual)"""
+    if not models:
+        raise models_not_ready()
+    name = MODEL_ALIASES.get(model, model)
+    try:
+        entry = await registry.activate(name, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Gagal memuat {name}@{version}: {e}")
+    return {"activated": entry.key, **registry.info()}
+
+
+@app.post("/api/models/{model}/split")
+async def split_model(model: str, split: str = Form("")):
+    """
+    Atur split A/B, contoh split="v1:90,v2:10" (kosong = semua ke versi
+    aktif). Session yang sama selalu mendapat versi yang sama.
+    """
+    name = MODEL_ALIASES.get(model, model)
+    try:
+        registry.set_split(name, split)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return registry.info()["models"].get(name)
+
+
 # =====================================================================
 #   DETECTION ENDPOINTS
 # =====================================================================
 
+def profiled_inference(image_bytes, model_names, top_k=3):
+    """Preprocess + forward tanpa batch scheduler (untuk request yang di-profile)"""
+    label = model_names[0] if len(model_names) == 1 else "shared"
+    tensor = prepare_image(image_bytes, model_name=label)
+    return {
+        name: predict_batch(models[name], tensor, labels_map[name], name, [top_k])[0]
+        for name in model_names
+    }
+
+
+def requested_versions(headers, model_names):
+    """
+    Versi model eksplisit dari header X-Model-Version: "v2" (semua model
+    yang diminta) atau "full@v2,words@v1"
+
+    Returns:
+        dict: model_name -> versi (kosong = routing default / split A/B)
+    """
+    spec = headers.get("x-model-version", "").strip()
+    if not spec:
+        return {}
+
+    versions = {}
+    for item in spec.split(","):
+        name, sep, version = item.strip().rpartition("@")
+        if sep:
+            versions[MODEL_ALIASES.get(name, name)] = version
+        else:
+            versions.update({m: version for m in model_names})
+
+    for name, version in versions.items():
+        if name not in model_names:
+            continue
+        try:
+            registry.get(name, version)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=str(e.args[0]))
+    return versions
+
+
+def result_key(entry):
+    """
+    Key prediction cache + session untuk satu versi model. Selama kNN aktif,
+    versi file index sign ikut di key: register / delete dari worker mana
+    pun membuat hasil lama (tanpa / dengan "knn" lama) tidak terpakai lagi
+    """
+    if not config.knn_enabled(entry.name):
+        return entry.key
+    version = index_version(signs_path(config.KNN_DIR, entry.key))
+    return entry.key if version is None else f"{entry.key}+knn:{version}"
+
+
+async def run_multi_detection(image_bytes, model_names, top_k=3, profile=False, session_id=None, versions=None):
+    """
+    Decode + preprocess image SEKALI, lalu jalankan beberapa model pada
+    tensor yang sama secara bersamaan (masing-masing lewat batch scheduler).
+    Hasil untuk image yang sama (atau hampir sama, bila perceptual hash
+    aktif) dilayani dari prediction cache.
+
+    Args:
+        profile: jalankan inference di bawah profiler (tanpa cache dan
+            batch scheduler) dan simpan trace ke TEMANISYARAT_PROFILE_DIR
+        session_id: session kamera; frame yang nyaris sama dengan frame
+            terakhir yang di-infer mendapat hasil sebelumnya (gating)
+        versions: dict model_name -> versi eksplisit (lihat requested_versions);
+            model lain mengikuti versi aktif / split A/B
+
+    Returns:
+        dict: model_name -> hasil prediksi (format sama dengan predict_from_image,
+        ditambah "model_version")
+    """
+    if profile:
+        results, path = await executor.run(
+            run_profiled, profiled_inference, request_id_var.get(), "-".join(model_names),
+            image_bytes, model_names, top_k,
+        )
+        logger.info("Profile trace saved", extra={"fields": {"trace": path}})
+        return results
+
+    # Deadline client sudah lewat selama upload: jangan decode sama sekali
+    check_deadline("decode", model_names[0] if len(model_names) == 1 else "shared")
+
+    # Versi per model: eksplisit, split A/B (sticky per session) atau aktif
+    route_key = session_id or request_id_var.get()
+    entries = {
+        name: registry.route(name, (versions or {}).get(name), route_key=route_key)
+        for name in model_names
+    }
+
+    keys = {name: result_key(entry) for name, entry in entries.items()}
+
+    thumb = None
+    if session_store is not None and session_id:
+        try:
+            thumb = await executor.run(thumbnail, image_bytes, config.SESSION_THUMB_SIZE)
+        except Exception:
+            thumb = None  # Image rusak: biarkan prepare_image yang melaporkan error
+        if thumb is not None:
+            gated = session_store.lookup(session_id, thumb, list(keys.values()), top_k)
+            if gated is not None:
+                for name in model_names:
+                    metrics.DETECTIONS.labels(name, "gated").inc()
+                return {name: gated[key] for name, key in keys.items()}
+
+    results = await _run_cached_detection(image_bytes, entries, keys, top_k)
+    if thumb is not None:
+        session_store.update(
+            session_id, thumb, {keys[name]: r for name, r in results.items()}, top_k
+        )
+    return results
+
+
+async def _run_cached_detection(image_bytes, entries, keys, top_k):
+    """
+    Prediction cache + preprocess sekali + batch scheduler per versi model
+
+    Args:
+        keys: dict model_name -> key cache (lihat result_key)
+    """
+    results = {}
+    digest = phash = None
+
+    if prediction_cache is not None:
+        digest = content_hash(image_bytes)
+        for name in entries:
+            cached = prediction_cache.get(keys[name], digest, top_k)
+            if cached is not None:
+                results[name] = cached
+
+        if prediction_cache.phash_enabled and len(results) < len(entries):
+            try:
+                phash = await executor.run(dhash, image_bytes)
+            except Exception:
+                phash = None  # Image rusak: biarkan prepare_image yang melaporkan error
+            for name in entries:
+                if name not in results:
+                    cached = prediction_cache.get_similar(keys[name], phash, top_k)
+                    if cached is not None:
+                        results[name] = cached
+
+    for name in results:
+        metrics.DETECTIONS.labels(name, "cached").inc()
+
+    pending = [name for name in entries if name not in results]
+    if not pending:
+        return results
+
+    async def submit(entry, tensor):
+        # Versi yang sudah di-evict dimuat ulang di sini; selama dipakai tidak bisa di-evict
+        async with registry.use(entry):
+            runner = entry.cascade or entry.scheduler
+            result = await runner.submit(tensor, top_k=top_k)
+        return dict(result, model_version=entry.version)
+
+    label = pending[0] if len(pending) == 1 else "shared"
+    check_deadline("decode", label)
+    tensor = await executor.run(prepare_image, image_bytes, 224, label)
+    outputs = await asyncio.gather(*(submit(entries[name], tensor) for name in pending))
+
+    for name, result in zip(pending, outputs):
+        metrics.DETECTIONS.labels(name, "ok").inc()
+        if prediction_cache is not None:
+            prediction_cache.record_miss()
+            prediction_cache.put(keys[name], digest, top_k, result, phash=phash)
+            result = dict(result)
+        results[name] = result
+    return results
+
+
+async def run_detection(image_bytes, model_name, top_k=3, profile=False, session_id=None, versions=None):
+    """
+    Deteksi dengan satu model (lihat run_multi_detection)
+
+    Returns:
+        dict: hasil prediksi (format sama dengan predict_from_image)
+    """
+    results = await run_multi_detection(
+        image_bytes, [model_name], top_k=top_k, profile=profile,
+        session_id=session_id, versions=versions,
+    )
+    return results[model_name]
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request, exc):
+    """Deadline X-Deadline-Ms lewat sebelum decode / forward pass: 504, kerja dibuang"""
+    return JSONResponse(status_code=504, content={"detail": str(exc), "stage": exc.stage})
+
+
+async def route_stream(request, model_name):
+    """
+    Versi untuk satu stream bulk (batch / video): header X-Model-Version,
+    split A/B (sticky per X-Session-ID) atau versi aktif. Versi dimuat di
+    sini supaya gagal load masih bisa dikirim sebagai 500 sebelum stream.
+    """
+    versions = requested_versions(request.headers, [model_name])
+    entry = registry.route(
+        model_name, versions.get(model_name), route_key=request.headers.get("x-session-id")
+    )
+    try:
+        await registry.ensure_ready(entry)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Gagal memuat {entry.key}: {e}")
+    return entry
+
+
+async def stream_with_entry(entry, make_stream, cleanup=None):
+    """
+    Jalankan stream NDJSON sambil menahan registry.use(entry): versi yang
+    dirutekan tidak bisa di-evict / ditukar di tengah stream
+
+    Args:
+        make_stream: fungsi (model, labels, predict) -> async iterator NDJSON;
+            predict = predict_batch versi ini (dengan kNN selama ada sign custom)
+        cleanup: (opsional) dipanggil bila stream gagal dibuat (mis. load
+            ulang versi gagal), supaya resource milik stream tetap ditutup
+    """
+    started = False
+    try:
+        async with registry.use(entry):
+            stream = make_stream(entry.model, entry.labels, batch_predictor(entry.model, entry.signs))
+            started = True
+            async for chunk in stream:
+                yield chunk
+    finally:
+        if not started and cleanup is not None:
+            cleanup()
+
+
+async def yield_to_interactive():
+    """Jeda stream bulk (batch / video) selama ada request interactive yang berjalan"""
+    await admission.yield_to_interactive(config.ADMISSION_BULK_YIELD_MS / 1000.0)
+
+
+def shape_result(request, model_name, result):
+    """Hasil lengkap, atau ringkas bila X-Response-Format: compact (lihat responses.py)"""
+    if not wants_compact(request.headers):
+        return result
+    try:
+        labels = registry.get(model_name, result.get("model_version")).labels
+    except KeyError:
+        labels = None
+    return compact_prediction(result, labels, client_tables(request.headers))
+
+
+async def read_image_input(request, file, model_label):
+    """
+    Ambil input deteksi dari multipart `file`, atau raw frame bila
+    Content-Type application/octet-stream: pixel RGB/RGBA uint8 224x224
+    dengan header X-Frame-Width, X-Frame-Height, X-Frame-Format (rgb/rgba).
+    Raw frame tidak melewati JPEG encode (client) maupun decode (server).
+
+    Returns:
+        (image, filename): bytes atau RawFrame
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(RAW_CONTENT_TYPE):
+        with metrics.stage("upload_read", model_label):
+            body = await request.body()
+        try:
+            return raw_frame_from_headers(body, request.headers, size=224), "raw"
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if file is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Kirim image sebagai multipart 'file' atau raw frame {RAW_CONTENT_TYPE}"
+        )
+    try:
+        with metrics.stage("upload_read", model_label):
+            return await read_upload(file), file.filename
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
 @app.post("/api/detect/letters")
-async def detect_letters(file: UploadFile = File(...)):
+async def detect_letters(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    session_id: Optional[str] = Form(None),
+):
     """
     Deteksi huruf SIBI (A-Z)
     
     Args:
-        file: Image file (JPG, PNG, WebP)
+        file: Image file (JPG, PNG, WebP), atau body raw frame (lihat read_image_input)
+        session_id: (opsional) ID session kamera, atau header X-Session-ID
     
     Returns:
         JSON: {
@@ -120,58 +770,66 @@ async def detect_letters(file: UploadFile = File(...)):
     """
     # Validasi models loaded
     if not models:
-        print("❌ Models not loaded!")
-        raise HTTPException(
-            status_code=500, 
-            detail="Models not loaded. Please restart the server."
-        )
+        logger.error("Models not loaded")
+        raise models_not_ready()
     
     # Validasi model huruf tersedia
     if "full" not in models:
-        print("❌ Letter model ('full') not found!")
+        logger.error("Letter model ('full') not found!")
         raise HTTPException(
             status_code=500,
             detail="Letter detection model not available"
         )
     
+    started = time.perf_counter()
+
+    # Read image bytes (multipart) atau raw frame (application/octet-stream)
+    image_bytes, filename = await read_image_input(request, file, "full")
+    versions = requested_versions(request.headers, ["full"])
+
     try:
-        print(f"\n{'='*60}")
-        print(f"📥 Received request: /api/detect/letters")
-        print(f"📁 File: {file.filename}")
-        print(f"📊 Content-Type: {file.content_type}")
-        
-        # Read image bytes
-        image_bytes = await file.read()
-        print(f"📦 Image size: {len(image_bytes)} bytes")
-        
         # Predict using 'full' model (26 letters A-Z)
-        result = predict_from_image(
-            image_bytes=image_bytes,
-            models=models,
-            pipeline=pipeline,
-            labels_map=labels_map,
+        result = await run_detection(
+            image_bytes,
             model_name="full",  # Model huruf (A-Z)
-            top_k=3
+            top_k=3,
+            profile=should_profile(request.headers),
+            session_id=session_id or request.headers.get("x-session-id"),
+            versions=versions,
         )
         
-        print(f"✅ Prediction successful: {result['prediction']} ({result['confidence']:.2f}%)")
-        print(f"{'='*60}\n")
+        log_timing(
+            logger, "Prediction successful", started,
+            endpoint="/api/detect/letters", file=filename, bytes=len(image_bytes),
+            prediction=result["prediction"], confidence=round(result["confidence"], 2),
+        )
         
-        return JSONResponse(content=result)
+        with metrics.stage("serialize", "full"):
+            response = render(shape_result(request, "full", result), request.headers)
+        return response
     
+    except DeadlineExceeded:
+        metrics.DETECTIONS.labels("full", "expired").inc()
+        raise
+
     except Exception as e:
-        print(f"❌ Error in detect_letters: {e}")
-        print(f"{'='*60}\n")
+        metrics.DETECTIONS.labels("full", "error").inc()
+        logger.error(f"Error in detect_letters: {e}", extra={"fields": {"file": filename}})
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/detect/words")
-async def detect_words(file: UploadFile = File(...)):
+async def detect_words(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    session_id: Optional[str] = Form(None),
+):
     """
     Deteksi kata SIBI (102 kata)
     
     Args:
-        file: Image file (JPG, PNG, WebP)
+        file: Image file (JPG, PNG, WebP), atau body raw frame (lihat read_image_input)
+        session_id: (opsional) ID session kamera, atau header X-Session-ID
     
     Returns:
         JSON: {
@@ -184,51 +842,437 @@ async def detect_words(file: UploadFile = File(...)):
     """
     # Validasi models loaded
     if not models:
-        print("❌ Models not loaded!")
-        raise HTTPException(
-            status_code=500,
-            detail="Models not loaded. Please restart the server."
-        )
+        logger.error("Models not loaded")
+        raise models_not_ready()
     
     # Validasi model kata tersedia
     if "words" not in models:
-        print("❌ Words model not found!")
+        logger.error("Words model not found!")
         raise HTTPException(
             status_code=500,
             detail="Word detection model not available"
         )
     
+    started = time.perf_counter()
+
+    # Read image bytes (multipart) atau raw frame (application/octet-stream)
+    image_bytes, filename = await read_image_input(request, file, "words")
+    versions = requested_versions(request.headers, ["words"])
+
     try:
-        print(f"\n{'='*60}")
-        print(f"📥 Received request: /api/detect/words")
-        print(f"📁 File: {file.filename}")
-        print(f"📊 Content-Type: {file.content_type}")
-        
-        # Read image bytes
-        image_bytes = await file.read()
-        print(f"📦 Image size: {len(image_bytes)} bytes")
-        
         # Predict using 'words' model (102 kata SIBI)
-        result = predict_from_image(
-            image_bytes=image_bytes,
-            models=models,
-            pipeline=pipeline,
-            labels_map=labels_map,
+        result = await run_detection(
+            image_bytes,
             model_name="words",  # Model kata (102 kata)
-            top_k=3
+            top_k=3,
+            profile=should_profile(request.headers),
+            session_id=session_id or request.headers.get("x-session-id"),
+            versions=versions,
         )
         
-        print(f"✅ Prediction successful: {result['prediction']} ({result['confidence']:.2f}%)")
-        print(f"{'='*60}\n")
+        log_timing(
+            logger, "Prediction successful", started,
+            endpoint="/api/detect/words", file=filename, bytes=len(image_bytes),
+            prediction=result["prediction"], confidence=round(result["confidence"], 2),
+        )
         
-        return JSONResponse(content=result)
+        with metrics.stage("serialize", "words"):
+            response = render(shape_result(request, "words", result), request.headers)
+        return response
     
+    except DeadlineExceeded:
+        metrics.DETECTIONS.labels("words", "expired").inc()
+        raise
+
+    except Exception as e:
+        metrics.DETECTIONS.labels("words", "error").inc()
+        logger.error(f"Error in detect_words: {e}", extra={"fields": {"file": filename}})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/detect/all")
+async def detect_all(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    models_param: Optional[str] = Form(None, alias="models"),
+    session_id: Optional[str] = Form(None),
+):
+    """
+    Deteksi huruf DAN kata dari satu image (decode + preprocess sekali)
+
+    Args:
+        file: Image file (JPG, PNG, WebP), atau body raw frame (lihat read_image_input)
+        models: daftar model dipisah koma (default "letters,words"). Admission
+            membaca header X-Models / query ?models= (form belum terbaca):
+            tanpa salah satunya slot KEDUA model diambil, dan model di form
+            harus termasuk yang dideklarasikan di sana
+        session_id: (opsional) ID session kamera, atau header X-Session-ID
+
+    Returns:
+        JSON: {
+            "letters": {"prediction": "A", ...},
+            "words": {"prediction": "Rumah", ...}
+        }
+    """
+    if not models:
+        raise models_not_ready()
+
+    declared = request.headers.get(MODELS_HEADER) or request.query_params.get("models")
+    requested = [m.strip() for m in (models_param or declared or "letters,words").split(",") if m.strip()]
+    unknown = [m for m in requested if MODEL_ALIASES.get(m, m) not in schedulers]
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model tidak tersedia: {unknown or requested}. Gunakan 'letters' dan/atau 'words'"
+        )
+    admitted = declared_models(declared, MODEL_ALIASES, ["full", "words"])
+    if admitted is not None:
+        extra = [m for m in requested if MODEL_ALIASES.get(m, m) not in admitted]
+        if extra:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Model {extra} tidak termasuk X-Models / ?models= ({declared})"
+            )
+
+    started = time.perf_counter()
+    image_bytes, filename = await read_image_input(request, file, "all")
+    model_names = list(dict.fromkeys(MODEL_ALIASES.get(m, m) for m in requested))
+    versions = requested_versions(request.headers, model_names)
+
+    try:
+        results = await run_multi_detection(
+            image_bytes, model_names, top_k=3,
+            profile=should_profile(request.headers),
+            session_id=session_id or request.headers.get("x-session-id"),
+            versions=versions,
+        )
+
+        response = {m: results[MODEL_ALIASES.get(m, m)] for m in requested}
+        log_timing(
+            logger, "Prediction successful", started,
+            endpoint="/api/detect/all", file=filename, bytes=len(image_bytes),
+            predictions={m: r["prediction"] for m, r in response.items()},
+        )
+
+        with metrics.stage("serialize", "all"):
+            response = render(
+                {m: shape_result(request, MODEL_ALIASES.get(m, m), r) for m, r in response.items()},
+                request.headers,
+            )
+        return response
+
+    except DeadlineExceeded:
+        metrics.DETECTIONS.labels("all", "expired").inc()
+        raise
+
     except Exception as e:
-        print(f"❌ Error in detect_words: {e}")
-        print(f"{'='*60}\n")
+        metrics.DETECTIONS.labels("all", "error").inc()
+        logger.error(f"Error in detect_all: {e}", extra={"fields": {"file": filename}})
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/detect/batch")
+async def detect_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    model: str = Form("letters"),
+    top_k: int = Form(3),
+):
+    """
+    Deteksi banyak image sekaligus (offline labelling)
+
+    Args:
+        files: beberapa image, atau satu arsip .zip/.tar(.gz) berisi image
+        model: "letters" (A-Z) atau "words" (kata SIBI)
+        top_k: jumlah top predictions per image
+
+    Returns:
+        NDJSON stream (application/x-ndjson): satu baris JSON per image
+        ({"index", "filename", "prediction", ...} atau {"index", "filename", "error"}),
+        diakhiri satu baris {"summary": {...}}
+    """
+    if not models:
+        raise models_not_ready()
+
+    model_name = MODEL_ALIASES.get(model, model)
+    if model_name not in models:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model '{model}' tidak tersedia. Gunakan 'letters' atau 'words'"
+        )
+
+    entry = await route_stream(request, model_name)
+    logger.info("Bulk detection started", extra={"fields": {"files": len(files), "model": entry.key}})
+
+    def make_stream(model, labels, predict):
+        return stream_bulk_ndjson(
+            files,
+            executor,
+            model,
+            labels,
+            model_name,
+            top_k=max(1, top_k),
+            batch_size=config.BULK_BATCH_SIZE,
+            max_member_bytes=config.BULK_MAX_MEMBER_BYTES,
+            pause=yield_to_interactive,
+            predict=predict,
+        )
+
+    return StreamingResponse(
+        stream_with_entry(entry, make_stream),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": entry.version},
+    )
+
+
+@app.post("/api/detect/video")
+async def detect_video(
+    request: Request,
+    file: UploadFile = File(...),
+    model: str = Form("letters"),
+    fps: Optional[float] = Form(None),
+    top_k: int = Form(3),
+):
+    """
+    Deteksi rangkaian isyarat dari clip video (mp4, webm, mov, ...)
+
+    Video di-decode bertahap dan di-sample `fps` frame per detik; top-1
+    berurutan yang sama digabung menjadi segmen.
+
+    Args:
+        file: file video
+        model: "letters" (A-Z) atau "words" (kata SIBI)
+        fps: frame per detik yang di-sample (default TEMANISYARAT_VIDEO_SAMPLE_FPS)
+        top_k: jumlah top predictions per segmen (confidence rata-rata per frame)
+
+    Returns:
+        NDJSON stream (application/x-ndjson): satu baris per segmen
+        ({"segment": {"index", "label", "start_s", "end_s", "frames", "confidence",
+        "max_confidence", "all_predictions"}}), diakhiri satu baris {"summary": {...}};
+        clip tanpa metadata durasi yang ternyata lebih panjang dari
+        TEMANISYARAT_VIDEO_MAX_DURATION_S berhenti di batas itu dengan
+        summary "error"
+    """
+    if video.av is None:
+        raise HTTPException(status_code=501, detail="Video detection butuh PyAV (pip install av)")
+    if not models:
+        raise models_not_ready()
+
+    model_name = MODEL_ALIASES.get(model, model)
+    if model_name not in models:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model '{model}' tidak tersedia. Gunakan 'letters' atau 'words'"
+        )
+    fps = min(max(fps or config.VIDEO_SAMPLE_FPS, 0.1), config.VIDEO_MAX_FPS)
+    entry = await route_stream(request, model_name)
+
+    # Header container + stream dicek sebelum streaming dimulai (415/413 tetap bisa dikirim)
+    try:
+        container, stream = await executor.run(
+            video.open_video, file.file, config.UPLOAD_MAX_PIXELS, config.VIDEO_MAX_DURATION_S
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    logger.info("Video detection started", extra={"fields": {"file": file.filename, "model": entry.key, "fps": fps}})
+
+    def make_stream(model, labels, predict):
+        return video.stream_video_ndjson(
+            container,
+            stream,
+            executor,
+            model,
+            labels,
+            model_name,
+            fps=fps,
+            top_k=max(1, top_k),
+            batch_size=config.VIDEO_BATCH_SIZE,
+            pause=yield_to_interactive,
+            max_duration_s=config.VIDEO_MAX_DURATION_S,
+            predict=predict,
+        )
+
+    return StreamingResponse(
+        stream_with_entry(entry, make_stream, cleanup=container.close),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": entry.version},
+    )
+
+
+# =====================================================================
+#   REAL-TIME STREAMING ENDPOINT
+# =====================================================================
+
+@app.websocket("/ws/detect/{model}")
+async def ws_detect(websocket: WebSocket, model: str):
+    """
+    Deteksi real-time via WebSocket (letters/words)
+
+    Client mengirim frame kamera sebagai pesan binary, server membalas
+    pesan JSON ringkas per frame yang diproses:
+        {"seq": 12, "p": "A", "c": 95.5, "k": [["A", 95.5], ...], "ms": 41.2, "drop": 3}
+
+    Frame yang menumpuk saat inference tertinggal akan dibuang
+    (latest-frame-wins). Kirim pesan teks {"top_k": 5} untuk mengubah top_k,
+    {"raw": {"width": 224, "height": 224, "format": "rgba"}} untuk
+    mengirim pixel mentah tanpa JPEG, atau {"labels": "<table>"} (dari
+    GET /api/labels) supaya "p" / "k" berisi index label.
+    """
+    model_name = MODEL_ALIASES.get(model, model)
+    await websocket.accept()
+
+    if not models:
+        # 1013 = Try Again Later (model masih loading)
+        await websocket.close(code=1013, reason="Models are still loading")
+        return
+
+    if model_name not in schedulers:
+        await websocket.close(code=1008, reason=f"Model '{model}' tidak tersedia")
+        return
+
+    logger.info("WebSocket connected", extra={"fields": {"model": model_name}})
+
+    # Setiap koneksi adalah satu session kamera (static-frame gating)
+    session_id = f"ws-{uuid.uuid4().hex}"
+
+    async def detect(image_bytes, top_k=3):
+        # Frame kamera = interactive; saat model penuh frame ini dibalas error (Overloaded)
+        with admission.admit([model_name], "interactive"):
+            return await run_detection(image_bytes, model_name, top_k=top_k, session_id=session_id)
+
+    def labels_for(result):
+        return registry.get(model_name, result.get("model_version")).labels
+
+    try:
+        summary = await stream_detections(websocket, detect, labels_for=labels_for)
+    finally:
+        if session_store is not None:
+            session_store.discard(session_id)
+    logger.info("WebSocket closed", extra={"fields": {"model": model_name, **summary}})
+
+
+# =====================================================================
+#   EMBEDDINGS + CUSTOM SIGNS (kNN)
+# =====================================================================
+
+def signs_entry(model):
+    """Versi aktif model yang punya index sign custom (404 bila kNN nonaktif)"""
+    if not models:
+        raise models_not_ready()
+    name = MODEL_ALIASES.get(model, model)
+    try:
+        entry = registry.get(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model '{model}' tidak tersedia")
+    if not config.knn_enabled(name):
+        raise HTTPException(status_code=404, detail=f"Custom sign nonaktif untuk model '{model}'")
+    return entry
+
+
+@app.post("/api/embed")
+async def embed_image(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    model: str = Form("words"),
+):
+    """
+    Embedding penultimate AlexNet (4096-d, ter-normalisasi L2) untuk satu image
+
+    Returns:
+        {"model": "words", "version": "v0", "dim": 4096, "embedding": [...]}
+    """
+    entry = signs_entry(model)
+    image_bytes, _ = await read_image_input(request, file, entry.name)
+
+    async with registry.use(entry):
+        if entry.signs is None:
+            raise HTTPException(status_code=500, detail=f"Embedding {entry.key} tidak tersedia")
+        tensor = await executor.run(prepare_image, image_bytes, 224, entry.name)
+        embedding = await executor.run(entry.signs.embed, tensor)
+
+    return render({
+        "model": entry.name,
+        "version": entry.version,
+        "dim": entry.signs.embedder.dim,
+        "embedding": normalize(embedding.numpy())[0].tolist(),
+    }, request.headers)
+
+
+@app.get("/api/signs")
+async def list_signs(model: str = "words"):
+    """Sign custom terdaftar (jumlah contoh per sign) + mode index"""
+    entry = signs_entry(model)
+    async with registry.use(entry):
+        return entry.signs.stats() if entry.signs is not None else None
+
+
+@app.post("/api/signs")
+async def register_sign(
+    name: str = Form(...),
+    files: List[UploadFile] = File(...),
+    model: str = Form("words"),
+):
+    """
+    Daftarkan sign baru (atau tambah contoh) dari beberapa image
+
+    Embedding setiap image masuk ke index kNN versi aktif; sejak itu setiap
+    hasil deteksi model tersebut berisi field "knn". Tanpa retrain.
+
+    Returns:
+        {"name", "added", "examples", "ms", "index": stats}
+    """
+    entry = signs_entry(model)
+    name = name.strip()
+    if not name:
+        raise HTTPException(status_code=400, detail="Nama sign tidak boleh kosong")
+    if len(files) > config.KNN_MAX_EXAMPLES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maksimal {config.KNN_MAX_EXAMPLES} image contoh per request",
+        )
+
+    started = time.perf_counter()
+    images = []
+    for upload in files:
+        try:
+            images.append(await read_upload(upload))
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    async with registry.use(entry):
+        if entry.signs is None:
+            raise HTTPException(status_code=500, detail=f"Index sign {entry.key} tidak tersedia")
+        try:
+            added = await executor.run(entry.signs.register_images, name, images, entry.name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        stats = entry.signs.stats()
+
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    logger.info("Custom sign registered", extra={"fields": {
+        "model": entry.key, "sign": name, "added": added, "ms": round(elapsed_ms, 2),
+    }})
+    return {
+        "name": name,
+        "added": added,
+        "examples": stats["signs"].get(name, 0),
+        "ms": round(elapsed_ms, 2),
+        "index": stats,
+    }
+
+
+@app.delete("/api/signs/{name}")
+async def delete_sign(name: str, model: str = "words"):
+    """Hapus sign custom beserta semua contohnya"""
+    entry = signs_entry(model)
+    async with registry.use(entry):
+        removed = entry.signs is not None and await executor.run(entry.signs.remove, name)
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Sign '{name}' tidak terdaftar")
+    return {"removed": name, "index": entry.signs.stats()}
+
+
 # =====================================================================
 #   ROOT ENDPOINT
 # =====================================================================
@@ -242,10 +1286,20 @@ async def root():
         "status": "running",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
             "docs": "/docs",
             "redoc": "/redoc",
             "detect_letters": "/api/detect/letters (POST)",
             "detect_words": "/api/detect/words (POST)",
+            "detect_all": "/api/detect/all (POST, letters + words)",
+            "detect_batch": "/api/detect/batch (POST, NDJSON stream)",
+            "detect_video": "/api/detect/video (POST, NDJSON stream of segments)",
+            "stream": "/ws/detect/{letters|words} (WebSocket)",
+            "stats": "/api/stats",
+            "metrics": "/metrics (Prometheus)",
+            "models": "/api/models (GET), /api/models/reload (POST), /api/models/{model}/activate|split (POST)",
+            "embed": "/api/embed (POST, penultimate embedding)",
+            "signs": "/api/signs (GET, POST), /api/signs/{name} (DELETE)",
         },
         "models": {
             "loaded": models is not None,
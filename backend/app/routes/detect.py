@@ -1,24 +1,57 @@
-from fastapi import APIRouter, File, UploadFile, Form
-from app.utils.predict_utils import load_models, predict_from_image
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Request
+from app.utils.predict_utils import prepare_image
+from app.utils.responses import label_table
+from app.utils.uploads import UploadError, read_upload
 
 router = APIRouter()
 
-# Load models saat startup
-print("\n🚀 Loading models...")
-models, pipeline, labels_map = load_models()
-print("✅ All models ready!\n")
+# Router lama TIDAK memuat model sendiri: semua endpoint memakai ModelRegistry
+# aplikasi (app.state.registry, diisi main.py), jadi versi aktif, hot-swap,
+# A/B split dan batch scheduler sama dengan endpoint /api/detect/*.
+
+
+async def _read_image(file):
+    """Baca upload dengan batas ukuran/format/dimensi (413/415 sebelum decode)"""
+    try:
+        return await read_upload(file)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+def _registry(request):
+    """Registry aplikasi; 503 selama model belum dimuat"""
+    registry = getattr(request.app.state, "registry", None)
+    if registry is None or not registry.models:
+        raise HTTPException(status_code=503, detail="Models are still loading")
+    return registry
+
+
+async def _predict(request, image_bytes, model_name, top_k=3):
+    """Preprocess (thread pool) + batch scheduler versi yang dirutekan registry"""
+    registry = _registry(request)
+    try:
+        entry = registry.route(model_name, route_key=request.headers.get("x-session-id"))
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+
+    async with registry.use(entry):
+        tensor = await request.app.state.executor.run(prepare_image, image_bytes, 224, model_name)
+        result = await entry.scheduler.submit(tensor, top_k=top_k)
+    return dict(result, model_version=entry.version)
 
 
 @router.get("/models/info")
-async def get_models_info():
+async def get_models_info(request: Request):
+    registry = _registry(request)
     return {
-        "available_models": list(models.keys()),
+        "available_models": list(registry.models.keys()),
         "labels": {
             name: {
                 "count": len(labels),
+                "table": label_table(labels)[0],
                 "labels": labels
             }
-            for name, labels in labels_map.items()
+            for name, labels in registry.labels.items()
         }
     }
 
@@ -27,51 +60,34 @@ async def get_models_info():
 # ENDPOINT DEFAULT (BACKWARD COMPATIBILITY)
 # ====================================================
 @router.post("/detect")
-async def detect(file: UploadFile = File(...), model_type: str = Form("full")):
-    if model_type not in models:
+async def detect(request: Request, file: UploadFile = File(...), model_type: str = Form("full")):
+    registry = _registry(request)
+    if model_type not in registry.models:
         return {
             "error": f"Model '{model_type}' tidak tersedia",
-            "available_models": list(models.keys())
+            "available_models": list(registry.models.keys())
         }
-    
-    image_bytes = await file.read()
-    
-    return predict_from_image(
-        image_bytes,
-        models,
-        pipeline,
-        labels_map,
-        model_name=model_type
-    )
+
+    image_bytes = await _read_image(file)
+
+    return await _predict(request, image_bytes, model_type)
 
 
 # ====================================================
 # ENDPOINT BARU — DETEKSI HURUF (A-Z)
 # ====================================================
 @router.post("/detect/letters")
-async def detect_letters(file: UploadFile = File(...)):
-    image_bytes = await file.read()
-    
-    return predict_from_image(
-        image_bytes,
-        models,
-        pipeline,
-        labels_map,
-        model_name="full"
-    )
+async def detect_letters(request: Request, file: UploadFile = File(...)):
+    image_bytes = await _read_image(file)
+
+    return await _predict(request, image_bytes, "full")
 
 
 # ====================================================
 # ENDPOINT BARU — DETEKSI KATA (104 SIBI)
 # ====================================================
 @router.post("/detect/words")
-async def detect_words(file: UploadFile = File(...)):
-    image_bytes = await file.read()
-    
-    return predict_from_image(
-        image_bytes,
-        models,
-        pipeline,
-        labels_map,
-        model_name="words"
-    )
+async def detect_words(request: Request, file: UploadFile = File(...)):
+    image_bytes = await _read_image(file)
+
+    return await _predict(request, image_bytes, "words")
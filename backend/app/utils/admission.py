@@ -0,0 +1,322 @@
+# ====================================================
+#   ADMISSION CONTROL & DEADLINES
+# ====================================================
+#
+# Di depan inference, supaya lonjakan traffic tidak membangun antrean
+# tanpa batas:
+#
+#   - limit in-flight (berjalan + antre) per model; request yang tidak
+#     muat langsung dijawab 503 + Retry-After (tanpa membaca upload)
+#   - prioritas: interactive (WebSocket, request dengan header X-Session-ID,
+#     "X-Priority: interactive") > normal > bulk (/api/detect/batch, video).
+#     Hanya HEADER yang dibaca: admission berjalan sebelum body (form
+#     session_id) dibaca.
+#     Sebagian slot dicadangkan untuk interactive, batch scheduler melayani
+#     antrean interactive lebih dulu, dan stream bulk mengalah di antara
+#     chunk selama ada request interactive yang berjalan
+#   - route multi-model (/api/detect/all) hanya mengambil slot model yang
+#     diminta lewat "X-Models: letters" atau ?models=letters (form field
+#     belum terbaca saat admission); tanpa keduanya slot semua model diambil
+#   - deadline dari client ("X-Deadline-Ms: 800" = sisa waktu dalam ms):
+#     kerja yang deadline-nya lewat dibuang sebelum decode dan sebelum
+#     forward pass (504)
+
+import asyncio
+import contextvars
+import json
+import math
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs
+
+from app import config
+from app.utils import metrics
+
+
+DEADLINE_HEADER = b"x-deadline-ms"
+PRIORITY_HEADER = "x-priority"
+MODELS_HEADER = "x-models"
+
+# Angka kecil = dilayani lebih dulu (urutan PriorityQueue batch scheduler)
+PRIORITIES = {"interactive": 0, "normal": 1, "bulk": 2}
+
+# Deadline absolut (time.monotonic()) dan prioritas request saat ini
+deadline_var = contextvars.ContextVar("deadline", default=None)
+priority_var = contextvars.ContextVar("priority", default="normal")
+
+
+class Overloaded(Exception):
+    """Model sedang penuh; client sebaiknya mencoba lagi setelah retry_after detik"""
+
+    def __init__(self, model_name, retry_after):
+        super().__init__(f"Server sibuk (model '{model_name}'), coba lagi dalam {retry_after} detik")
+        self.model_name = model_name
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Deadline client sudah lewat; hasil tidak akan dipakai"""
+
+    def __init__(self, stage):
+        super().__init__(f"Deadline request terlewati sebelum {stage}")
+        self.stage = stage
+
+
+# ====================================================
+#   DEADLINES
+# ====================================================
+
+def deadline_expired():
+    deadline = deadline_var.get()
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def check_deadline(stage, model_name="shared"):
+    """Raise DeadlineExceeded bila deadline request ini sudah lewat"""
+    if deadline_expired():
+        metrics.ADMISSION_REJECTED.labels(model_name, priority_var.get(), "expired").inc()
+        raise DeadlineExceeded(stage)
+
+
+def request_priority(headers, session_id=None):
+    """interactive / normal / bulk dari header X-Priority (default: interactive bila ada session)"""
+    priority = (headers.get(PRIORITY_HEADER) or "").strip().lower()
+    if priority in PRIORITIES:
+        return priority
+    return "interactive" if session_id else "normal"
+
+
+def declared_models(spec, aliases, allowed):
+    """
+    Model yang dideklarasikan client ("letters,words", dari X-Models / ?models=)
+
+    Args:
+        aliases: nama endpoint -> nama model internal
+        allowed: model milik route
+
+    Returns:
+        list model internal yang dikenal (urutan tetap), atau None bila
+        tidak ada deklarasi yang bisa dipakai (= semua model route)
+    """
+    names = [aliases.get(m.strip(), m.strip()) for m in (spec or "").split(",") if m.strip()]
+    names = [name for name in dict.fromkeys(names) if name in allowed]
+    return names or None
+
+
+# ====================================================
+#   ADMISSION CONTROLLER
+# ====================================================
+
+class AdmissionController:
+    """
+    Limit in-flight per model dengan slot cadangan untuk interactive
+
+    Args:
+        max_inflight: fungsi model_name -> limit (0 = tanpa batas)
+        interactive_reserve: fraksi limit yang hanya boleh dipakai interactive
+        max_bulk: jumlah stream bulk (batch / video) yang boleh berjalan bersamaan
+    """
+
+    def __init__(self, max_inflight, interactive_reserve=0.25, max_bulk=2):
+        self.max_inflight = max_inflight
+        self.interactive_reserve = min(max(interactive_reserve, 0.0), 1.0)
+        self.max_bulk = max_bulk
+
+        self.inflight = {}        # model -> request berjalan + antre
+        self.interactive = {}     # model -> bagian interactive dari inflight
+        self.bulk = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._latency = {}        # model -> EWMA latency (detik), untuk Retry-After
+        self._idle = None
+
+    def _limit(self, model_name, priority):
+        limit = self.max_inflight(model_name)
+        if limit <= 0 or priority == "interactive":
+            return limit
+        return max(1, int(limit * (1.0 - self.interactive_reserve)))
+
+    def retry_after(self, model_name):
+        """Estimasi detik sampai slot kosong: EWMA latency x antrean per slot"""
+        latency = self._latency.get(model_name) or max(self._latency.values(), default=0.5)
+        limit = max(1, self.max_inflight(model_name))
+        backlog = self.inflight.get(model_name, 0) / limit
+        return int(min(30, max(1, math.ceil(latency * max(1.0, backlog)))))
+
+    def _reject(self, model_name, priority):
+        self.rejected += 1
+        metrics.ADMISSION_REJECTED.labels(model_name, priority, "overloaded").inc()
+        raise Overloaded(model_name, self.retry_after(model_name))
+
+    @contextmanager
+    def admit(self, model_names, priority="normal"):
+        """
+        Ambil slot untuk semua model (atau 503 tanpa menunggu)
+
+        Raises:
+            Overloaded
+        """
+        for name in model_names:
+            limit = self._limit(name, priority)
+            if limit > 0 and self.inflight.get(name, 0) >= limit:
+                self._reject(name, priority)
+
+        interactive = priority == "interactive"
+        for name in model_names:
+            self.inflight[name] = self.inflight.get(name, 0) + 1
+            if interactive:
+                self.interactive[name] = self.interactive.get(name, 0) + 1
+        self.admitted += 1
+        token = priority_var.set(priority)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            priority_var.reset(token)
+            elapsed = time.perf_counter() - started
+            for name in model_names:
+                self.inflight[name] -= 1
+                if interactive:
+                    self.interactive[name] -= 1
+                previous = self._latency.get(name)
+                self._latency[name] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            if self._idle is not None and not any(self.interactive.values()):
+                self._idle.set()
+
+    @contextmanager
+    def admit_bulk(self):
+        """Slot stream bulk: 503 bila stream bulk penuh atau ada model di atas limit non-interactive"""
+        if self.max_bulk > 0 and self.bulk >= self.max_bulk:
+            self._reject("bulk", "bulk")
+        for name, inflight in self.inflight.items():
+            limit = self._limit(name, "bulk")
+            if limit > 0 and inflight >= limit:
+                self._reject(name, "bulk")
+
+        self.bulk += 1
+        self.admitted += 1
+        token = priority_var.set("bulk")
+        try:
+            yield
+        finally:
+            priority_var.reset(token)
+            self.bulk -= 1
+
+    async def yield_to_interactive(self, timeout_s):
+        """Dipanggil stream bulk di antara chunk: tunggu (maks timeout_s) selama ada request interactive"""
+        if timeout_s <= 0 or not any(self.interactive.values()):
+            return
+        if self._idle is None:
+            self._idle = asyncio.Event()
+        self._idle.clear()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout_s)
+        except asyncio.TimeoutError:
+            pass
+
+    def stats(self):
+        return {
+            "inflight": dict(self.inflight),
+            "interactive": dict(self.interactive),
+            "limits": {name: self.max_inflight(name) for name in self.inflight},
+            "bulk_streams": self.bulk,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "latency_ewma_ms": {name: round(v * 1000.0, 2) for name, v in self._latency.items()},
+        }
+
+
+# ====================================================
+#   ASGI MIDDLEWARE
+# ====================================================
+
+class AdmissionMiddleware:
+    """
+    Deadline + admission sebelum body request dibaca
+
+    X-Deadline-Ms diubah menjadi deadline absolut saat request TIBA (waktu
+    upload ikut dihitung; default TEMANISYARAT_DEADLINE_DEFAULT_MS). Route
+    deteksi mengambil slot in-flight untuk modelnya; bila penuh dijawab 503
+    + Retry-After tanpa menyentuh upload.
+
+    Args:
+        app: ASGI app
+        controller: AdmissionController
+        routes: {path: [model]} untuk request interactive/normal; route
+            dengan beberapa model dipersempit oleh X-Models / ?models=
+        bulk_routes: path stream bulk (slot admit_bulk)
+        aliases: nama model di X-Models -> nama internal ("letters" -> "full")
+    """
+
+    def __init__(self, app, controller, routes, bulk_routes=(), aliases=None):
+        self.app = app
+        self.controller = controller
+        self.routes = routes
+        self.bulk_routes = set(bulk_routes)
+        self.aliases = aliases or {}
+
+    def _models(self, path, scope, headers):
+        """Model yang slot-nya diambil untuk request ini"""
+        models = self.routes[path]
+        if len(models) < 2:
+            return models
+        spec = headers.get(MODELS_HEADER)
+        if not spec:
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            spec = ",".join(query.get("models", []))
+        return declared_models(spec, self.aliases, models) or models
+
+    async def _send_503(self, send, error):
+        body = json.dumps({"detail": str(error), "retry_after": error.retry_after}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(error.retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = {}
+        for key, value in scope.get("headers", []):
+            if key in (DEADLINE_HEADER, PRIORITY_HEADER.encode(), MODELS_HEADER.encode(), b"x-session-id"):
+                headers[key.decode("latin-1")] = value.decode("latin-1")
+
+        budget_ms = config.DEADLINE_DEFAULT_MS
+        try:
+            budget_ms = float(headers.get(DEADLINE_HEADER.decode(), budget_ms))
+        except ValueError:
+            pass
+        token = deadline_var.set(time.monotonic() + budget_ms / 1000.0 if budget_ms > 0 else None)
+
+        try:
+            path = scope.get("path", "")
+            # Hanya POST yang mengambil slot (GET / HEAD nyasar langsung ke 405 tanpa slot)
+            if scope.get("method") != "POST":
+                slot = None
+            elif path in self.bulk_routes:
+                slot = self.controller.admit_bulk()
+            elif path in self.routes:
+                priority = request_priority(headers, headers.get("x-session-id"))
+                slot = self.controller.admit(self._models(path, scope, headers), priority)
+            else:
+                slot = None
+            if slot is None:
+                return await self.app(scope, receive, send)
+
+            try:
+                slot.__enter__()
+            except Overloaded as e:
+                return await self._send_503(send, e)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                slot.__exit__(None, None, None)
+        finally:
+            deadline_var.reset(token)
@@ -0,0 +1,235 @@
+# ====================================================
+#   THREADING AUTOTUNER
+# ====================================================
+#
+# Benchmark model (hasil load_models()) untuk kombinasi:
+#
+#   workers x intra-op thread (torch.set_num_threads) x inter-op thread x batch size
+#
+# Setiap worker adalah proses terpisah (spawn) seperti worker gunicorn, semua
+# worker mulai mengukur bersamaan (barrier). Konfigurasi dengan throughput
+# tertinggi (opsional: p95 latency batch di bawah --max-p95-ms) ditulis ke
+# TEMANISYARAT_TUNING_FILE (default backend/tuning.json); config.py
+# memakainya sebagai default saat startup (env var tetap menang).
+#
+#   python -m app.utils.autotune
+#   python -m app.utils.autotune --workers 1 2 4 --threads 1 2 4 --batch-sizes 1 8 --max-p95-ms 50
+#   python -m app.utils.autotune --standins      # tanpa file model asli
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing as mp
+import os
+import queue
+import statistics
+import sys
+import time
+
+
+def _powers_of_two(limit):
+    values, n = [], 1
+    while n <= limit:
+        values.append(n)
+        n *= 2
+    if values[-1] != limit:
+        values.append(limit)
+    return values
+
+
+def _load_models(model_names, standins):
+    """Model untuk benchmark: load_models() dengan engine yang dikonfigurasi, atau stand-in"""
+    if standins:
+        from app import config
+        from app.utils.optimize import optimize_model
+        from benchmarks.standins import make_standin_models
+
+        models, _ = make_standin_models()
+        models = {name: optimize_model(model, config.model_variant(name)) for name, model in models.items()}
+    else:
+        from app.utils.predict_utils import load_models
+        models, _, _ = load_models(backends=True)
+
+    missing = [name for name in model_names if name not in models]
+    if missing:
+        raise RuntimeError(f"❌ Model tidak tersedia: {missing} (pakai --standins tanpa file model)")
+    return {name: models[name] for name in model_names}
+
+
+def _bench_worker(model_names, standins, intra, interop, batch_size, duration_s, barrier, results):
+    """Satu proses worker: set thread, load + warmup, lalu ukur selama duration_s"""
+    import torch
+
+    # Engine non-torch (onnxruntime) membaca thread dari config saat dibuat
+    os.environ["TEMANISYARAT_INTRA_OP_THREADS"] = str(intra)
+    os.environ["TEMANISYARAT_INTEROP_THREADS"] = str(interop)
+
+    # Harus sebelum kerja paralel pertama di proses ini
+    torch.set_num_threads(intra)
+    if interop > 0:
+        torch.set_num_interop_threads(interop)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        models = _load_models(model_names, standins)
+
+    batch = torch.randn(batch_size, 3, 224, 224)
+    with torch.inference_mode():
+        for model in models.values():
+            for _ in range(2):
+                model(batch)
+
+        barrier.wait()
+        timings = []
+        started = time.perf_counter()
+        while time.perf_counter() - started < duration_s:
+            for model in models.values():
+                t0 = time.perf_counter()
+                model(batch)
+                timings.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+
+    results.put({"images": len(timings) * batch_size, "elapsed_s": elapsed, "timings": timings})
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100.0 * (len(ordered) - 1))))]
+
+
+def run_config(model_names, workers, intra, interop, batch_size, duration_s=3.0, standins=False):
+    """
+    Ukur satu kombinasi
+
+    Returns:
+        dict: images_per_s (total semua worker), p50_ms / p95_ms per batch
+    """
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(
+            target=_bench_worker,
+            args=(model_names, standins, intra, interop, batch_size, duration_s, barrier, results),
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    reports = []
+    try:
+        while len(reports) < workers:
+            try:
+                reports.append(results.get(timeout=1.0))
+            except queue.Empty:
+                # Worker yang crash (load gagal, OOM) tidak pernah mengirim hasil
+                if any(proc.exitcode not in (None, 0) for proc in procs):
+                    barrier.abort()
+                    raise RuntimeError("worker process gagal (lihat stderr)")
+    finally:
+        for proc in procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+
+    timings = [t for report in reports for t in report["timings"]]
+    return {
+        "workers": workers,
+        "intra_op_threads": intra,
+        "interop_threads": interop,
+        "batch_size": batch_size,
+        "images_per_s": round(sum(r["images"] / r["elapsed_s"] for r in reports), 2),
+        "p50_ms": round(statistics.median(timings) * 1000.0, 2),
+        "p95_ms": round(_percentile(timings, 95) * 1000.0, 2),
+    }
+
+
+def candidates(cpu_count, workers=None, threads=None, interop=None, batch_sizes=None, oversubscribe=1.0):
+    """Kombinasi yang diuji; workers x threads dibatasi cpu_count x oversubscribe"""
+    workers = workers or _powers_of_two(cpu_count)
+    threads = threads or _powers_of_two(cpu_count)
+    interop = interop or [1, 2]
+    batch_sizes = batch_sizes or [1, 4, 8]
+    return [
+        combo
+        for combo in itertools.product(workers, threads, interop, batch_sizes)
+        if combo[0] * combo[1] <= cpu_count * oversubscribe
+    ]
+
+
+def pick_best(rows, max_p95_ms=0.0):
+    """Throughput tertinggi (yang memenuhi batas p95 bila di-set)"""
+    ok = [row for row in rows if max_p95_ms <= 0 or row["p95_ms"] <= max_p95_ms]
+    return max(ok, key=lambda row: (row["images_per_s"], -row["p95_ms"])) if ok else None
+
+
+def main(argv=None):
+    from app import config
+
+    cpu_count = os.cpu_count() or 1
+
+    parser = argparse.ArgumentParser(description="Autotune workers x thread PyTorch x batch size")
+    parser.add_argument("--models", nargs="+", default=["full", "words"])
+    parser.add_argument("--workers", nargs="+", type=int, help=f"default: 1, 2, 4, ... {cpu_count}")
+    parser.add_argument("--threads", nargs="+", type=int, help="intra-op thread per worker")
+    parser.add_argument("--interop", nargs="+", type=int, help="inter-op thread per worker (default: 1 2)")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, help="default: 1 4 8")
+    parser.add_argument("--duration", type=float, default=3.0, help="detik pengukuran per kombinasi")
+    parser.add_argument("--oversubscribe", type=float, default=1.0,
+                        help="izinkan workers x threads sampai cpu_count x nilai ini")
+    parser.add_argument("--max-p95-ms", type=float, default=0.0, help="batas p95 latency per batch (0 = tanpa batas)")
+    parser.add_argument("--standins", action="store_true", help="pakai AlexNet stand-in (weights acak)")
+    parser.add_argument("--out", default=config.TUNING_FILE, help="file hasil tuning")
+    args = parser.parse_args(argv)
+
+    combos = candidates(cpu_count, args.workers, args.threads, args.interop, args.batch_sizes, args.oversubscribe)
+    print(f"\n🧮 Autotune {args.models} on {cpu_count} CPUs: {len(combos)} combinations x {args.duration:g}s")
+    print("-" * 72)
+    print(f"{'workers':>7s} {'threads':>7s} {'interop':>7s} {'batch':>5s} {'img/s':>10s} {'p50 ms':>9s} {'p95 ms':>9s}")
+    print("-" * 72)
+
+    rows = []
+    for workers, intra, interop, batch_size in combos:
+        try:
+            row = run_config(args.models, workers, intra, interop, batch_size, args.duration, args.standins)
+        except Exception as e:
+            print(f"❌ workers={workers} threads={intra} interop={interop} batch={batch_size}: {e}")
+            continue
+        rows.append(row)
+        print(f"{workers:7d} {intra:7d} {interop:7d} {batch_size:5d} {row['images_per_s']:10.1f} "
+              f"{row['p50_ms']:9.2f} {row['p95_ms']:9.2f}")
+    print("-" * 72)
+
+    if not rows:
+        print("❌ Semua kombinasi gagal; tuning tidak ditulis")
+        return 1
+    best = pick_best(rows, args.max_p95_ms)
+    if best is None:
+        print("❌ Tidak ada kombinasi yang memenuhi batas; tuning tidak ditulis")
+        return 1
+
+    import torch
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cpu_count": cpu_count,
+        "torch": torch.__version__,
+        "models": args.models,
+        "standins": args.standins,
+        "max_p95_ms": args.max_p95_ms,
+        "best": best,
+        "results": rows,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"✅ Best: {best['workers']} workers x {best['intra_op_threads']} threads "
+          f"(interop {best['interop_threads']}), batch {best['batch_size']}: "
+          f"{best['images_per_s']:.1f} img/s, p95 {best['p95_ms']:.2f} ms")
+    print(f"💾 Tuning saved: {args.out} (applied at startup; TEMANISYARAT_* env vars still override)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+# ====================================================
+#   INFERENCE BACKENDS
+# ====================================================
+#
+# Engine yang menjalankan forward pass, dipilih per model lewat
+# TEMANISYARAT_INFERENCE_BACKEND / TEMANISYARAT_INFERENCE_BACKEND_<MODEL>:
+#
+#   torch        PyTorch eager (+ varian TEMANISYARAT_MODEL_VARIANT, lihat optimize.py)
+#   onnxruntime  ONNX Runtime, CPUExecutionProvider. File <model>.onnx di
+#                samping file model; diekspor otomatis bila belum ada (di
+#                master pre-fork export ditunda ke forward pertama worker,
+#                satu worker yang meng-export di bawah file lock)
+#
+# Semua backend punya interface yang sama dengan nn.Module untuk serving:
+# backend(batch (N, 3, H, W) float32) -> logits torch.Tensor (N, classes),
+# jadi batch scheduler, cascade, bulk, video dan evaluate tidak berubah.
+#
+#   python -m app.utils.backends export --model full
+#   python -m app.utils.backends compare --model words --images dataset/kata --batch-sizes 1 8 32
+
+import argparse
+import json
+import os
+import sys
+import threading
+import warnings
+
+import torch
+
+from app import config
+from app.utils.logging_utils import get_logger
+from app.utils.model_store import weights_path_for
+from app.utils.optimize import load_inputs, optimize_model, time_forward
+
+
+try:
+    import onnxruntime as ort
+except ImportError:  # ONNX Runtime opsional: tanpa paket ini hanya backend torch
+    ort = None
+
+
+logger = get_logger("backends")
+
+
+BACKENDS = ("torch", "onnxruntime")
+
+ONNX_INPUT = "input"
+ONNX_OUTPUT = "logits"
+
+
+def onnx_path_for(model_path):
+    """alexnet_best_full.pth -> alexnet_best_full.onnx"""
+    base = model_path
+    for suffix in (".weights.pt", ".pth", ".pt"):
+        if base.endswith(suffix):
+            base = base[: -len(suffix)]
+            break
+    return base + ".onnx"
+
+
+# ====================================================
+#   BACKENDS
+# ====================================================
+
+class InferenceBackend:
+    """
+    Interface engine inference
+
+    Subclass mengimplementasikan __call__(batch) -> logits (torch.Tensor).
+    eval() ada supaya backend bisa dipakai di tempat nn.Module.
+    """
+
+    name = None
+
+    def __call__(self, batch):
+        raise NotImplementedError
+
+    def eval(self):
+        return self
+
+    def describe(self):
+        return self.name
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch eager / varian optimasi CPU (perilaku lama)"""
+
+    name = "torch"
+
+    def __init__(self, model, variant="fp32", defer_trace=False):
+        self.variant = variant or "fp32"
+        self.model = optimize_model(model, self.variant, defer_trace=defer_trace)
+
+    def __call__(self, batch):
+        return self.model(batch)
+
+    def describe(self):
+        return self.name if self.variant == "fp32" else f"{self.name}:{self.variant}"
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    ONNX Runtime dengan CPUExecutionProvider
+
+    Session dibuat saat forward pertama DI PROSES PEMAKAI: thread pool ORT
+    tidak selamat dari fork, sedangkan gunicorn memuat model di master
+    (preload) lalu fork worker.
+
+    Args:
+        path: file .onnx
+        intra_op_threads: thread per operator (0 = default ORT)
+        inter_op_threads: thread antar operator (0 = default ORT)
+        export: (model, model_path) untuk export tertunda; file .onnx dibuat
+            sebelum session pertama bila belum ada / lebih tua dari weights
+    """
+
+    name = "onnxruntime"
+
+    def __init__(self, path, intra_op_threads=0, inter_op_threads=0, export=None):
+        if ort is None:
+            raise RuntimeError("❌ ONNX Runtime belum terpasang (pip install onnxruntime)")
+        self.path = path
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self._export = export
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def session(self):
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    if self._export is not None:
+                        ensure_onnx(*self._export, self.path)
+                        self._export = None
+                    options = ort.SessionOptions()
+                    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    if self.intra_op_threads > 0:
+                        options.intra_op_num_threads = self.intra_op_threads
+                    if self.inter_op_threads > 0:
+                        options.inter_op_num_threads = self.inter_op_threads
+                    self._session = ort.InferenceSession(
+                        self.path, sess_options=options, providers=["CPUExecutionProvider"]
+                    )
+                    self._pid = os.getpid()
+        return self._session
+
+    def __call__(self, batch):
+        inputs = batch.detach().to(torch.float32).contiguous().numpy()
+        outputs = self.session().run([ONNX_OUTPUT], {ONNX_INPUT: inputs})[0]
+        return torch.from_numpy(outputs)
+
+
+# ====================================================
+#   EXPORT + FACTORY
+# ====================================================
+
+def export_onnx(model, path, input_size=224, opset=None):
+    """
+    Ekspor model PyTorch fp32 ke ONNX (dimensi batch dinamis)
+
+    Returns:
+        path file .onnx
+    """
+    model.eval()
+    example = torch.zeros(1, 3, input_size, input_size)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    # Exporter TorchScript: tidak butuh onnxscript, dan AlexNet tidak punya control flow
+    with torch.no_grad(), warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        torch.onnx.export(
+            model, (example,), tmp_path,
+            input_names=[ONNX_INPUT],
+            output_names=[ONNX_OUTPUT],
+            dynamic_axes={ONNX_INPUT: {0: "batch"}, ONNX_OUTPUT: {0: "batch"}},
+            opset_version=opset or config.ONNX_OPSET,
+            dynamo=False,
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def onnx_stale(path, model_path):
+    """True bila file .onnx belum ada atau lebih tua dari file weights / model"""
+    sources = [p for p in (weights_path_for(model_path), model_path) if os.path.exists(p)]
+    return not os.path.exists(path) or any(os.path.getmtime(path) < os.path.getmtime(p) for p in sources)
+
+
+def ensure_onnx(model, model_path, path):
+    """Export ke `path` bila stale; worker lain menunggu lock lalu memakai hasilnya"""
+    from app.utils.runtime import file_lock
+
+    if not onnx_stale(path, model_path):
+        return path
+    with file_lock(path):
+        if onnx_stale(path, model_path):
+            logger.info("ONNX export", extra={"fields": {"path": path}})
+            export_onnx(model, path)
+    return path
+
+
+def check_parity(reference, backend, inputs):
+    """
+    Bandingkan output backend terhadap model referensi (PyTorch fp32)
+
+    Returns:
+        dict: top1_agreement, max_abs_logit_diff, max_abs_prob_diff
+    """
+    with torch.no_grad():
+        expected = reference(inputs)
+        actual = backend(inputs)
+    expected_probs = torch.softmax(expected, dim=1)
+    probs = torch.softmax(actual, dim=1)
+    return {
+        "top1_agreement": float((probs.argmax(dim=1) == expected_probs.argmax(dim=1)).float().mean()),
+        "max_abs_logit_diff": float((actual - expected).abs().max()),
+        "max_abs_prob_diff": float((probs - expected_probs).abs().max()),
+    }
+
+
+def create_backend(model, model_name, model_path, backend=None, variant=None, fork_safe=False):
+    """
+    Bungkus model PyTorch yang sudah dimuat dengan engine inference
+
+    Args:
+        model: model PyTorch fp32
+        model_name: "full" / "words" (untuk config per model)
+        model_path: path file model (lokasi file .onnx)
+        backend: nama backend (default config.inference_backend(model_name))
+        variant: varian torch (default config.model_variant(model_name))
+        fork_safe: tanpa forward pass sekarang (master pre-fork): trace
+            varian script dan export ONNX ditunda ke forward pertama
+
+    Returns:
+        InferenceBackend
+    """
+    backend = (backend or config.inference_backend(model_name)).strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"❌ Backend inference tidak dikenal: '{backend}'. Pilihan: {list(BACKENDS)}")
+
+    if backend == "torch":
+        return TorchBackend(model, variant or config.model_variant(model_name), defer_trace=fork_safe)
+
+    from app.utils.runtime import threads_per_worker
+
+    path = onnx_path_for(model_path)
+    if not fork_safe:
+        ensure_onnx(model, model_path, path)
+    return OnnxRuntimeBackend(
+        path,
+        intra_op_threads=threads_per_worker(),
+        inter_op_threads=config.INTEROP_THREADS,
+        export=(model, model_path) if fork_safe else None,
+    )
+
+
+# ====================================================
+#   CLI: EXPORT + PARITY + PERBANDINGAN
+# ====================================================
+
+def compare_backends(model, model_path, engines, inputs, batch_sizes=(1, 8), iters=20):
+    """
+    Parity + latency/throughput setiap engine terhadap PyTorch fp32
+
+    Args:
+        engines: list "torch", "torch:<variant>" atau "onnxruntime"
+
+    Returns:
+        list of dict per engine
+    """
+    model.eval()
+    report = []
+    baseline = None
+    for engine in engines:
+        backend, _, variant = engine.partition(":")
+        runner = create_backend(model, "compare", model_path, backend, variant or "fp32")
+        parity = check_parity(model, runner, inputs)
+        latency = {bs: time_forward(runner, inputs[:bs].contiguous(), iters) for bs in batch_sizes}
+        if baseline is None:
+            baseline = latency
+        report.append({
+            "engine": runner.describe(),
+            **parity,
+            "latency_ms": {str(bs): round(ms, 3) for bs, ms in latency.items()},
+            "images_per_s": {str(bs): round(bs / ms * 1000.0, 1) for bs, ms in latency.items()},
+            "speedup": {str(bs): round(baseline[bs] / ms, 3) for bs, ms in latency.items()},
+        })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor ONNX + parity + perbandingan engine inference")
+    parser.add_argument("command", choices=["export", "compare"])
+    parser.add_argument("--model", default="full", help="full (huruf) atau words (kata)")
+    parser.add_argument("--engines", nargs="+", default=["torch", "torch:int8", "onnxruntime"],
+                        help="torch, torch:<variant> (lihat optimize.py), onnxruntime")
+    parser.add_argument("--images", help="folder image untuk parity (default: input acak)")
+    parser.add_argument("--limit", type=int, default=32, help="jumlah input parity")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="batas max |dp| saat export")
+    parser.add_argument("--json", help="simpan laporan ke file JSON")
+    args = parser.parse_args(argv)
+
+    from app.utils.predict_utils import load_model_file, model_path
+
+    path = model_path(args.model)
+    model, _ = load_model_file(path)
+    if model is None:
+        print(f"❌ Model '{args.model}' tidak ditemukan: {path}")
+        return 1
+    if ort is None:
+        print("❌ ONNX Runtime belum terpasang (pip install onnxruntime)")
+        return 1
+
+    limit = max(args.limit, max(args.batch_sizes))
+    inputs, source = load_inputs(args.images, limit, 224)
+
+    if args.command == "export":
+        out = export_onnx(model, onnx_path_for(path))
+        parity = check_parity(model, OnnxRuntimeBackend(out), inputs)
+        print(f"\n📦 Exported '{args.model}' -> {out} ({os.path.getsize(out) / 1e6:.1f} MB)")
+        print(f"🎯 Parity on {source}: top-1 agreement {parity['top1_agreement']*100:.1f}%, "
+              f"max |dlogit| {parity['max_abs_logit_diff']:.2e}, max |dp| {parity['max_abs_prob_diff']:.2e}")
+        if parity["max_abs_prob_diff"] > args.tolerance:
+            print(f"❌ Parity di atas toleransi {args.tolerance:g}; jangan pakai backend onnxruntime")
+            return 2
+        print("✅ Parity OK (TEMANISYARAT_INFERENCE_BACKEND=onnxruntime untuk memakainya)")
+        return 0
+
+    print(f"\n📊 Model '{args.model}' - engines on {source}")
+    report = compare_backends(model, path, args.engines, inputs, args.batch_sizes, args.iters)
+
+    print("-" * 96)
+    print(f"{'engine':20s} {'top1 agree':>10s} {'max |dp|':>10s}  latency ms / img/s (speedup) per batch")
+    print("-" * 96)
+    for row in report:
+        timings = "  ".join(
+            f"bs{bs}: {ms:7.2f} / {row['images_per_s'][bs]:7.1f} ({row['speedup'][bs]:.2f}x)"
+            for bs, ms in row["latency_ms"].items()
+        )
+        print(f"{row['engine']:20s} {row['top1_agreement']*100:9.1f}% {row['max_abs_prob_diff']:10.5f}  {timings}")
+    print("-" * 96)
+    fastest = {
+        bs: max(report, key=lambda row: row["images_per_s"][str(bs)])["engine"] for bs in args.batch_sizes
+    }
+    print("🏁 Fastest: " + ", ".join(f"bs{bs} {engine}" for bs, engine in fastest.items()))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": args.model, "inputs": source, "engines": report}, f, indent=2)
+        print(f"💾 Report saved: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
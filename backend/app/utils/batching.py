@@ -0,0 +1,239 @@
+# ====================================================
+#   DYNAMIC MICRO-BATCHING
+# ====================================================
+#
+# Request yang datang bersamaan untuk model yang sama dikumpulkan dalam
+# satu window (max batch size / max wait), di-stack menjadi satu tensor,
+# lalu dijalankan dalam SATU forward pass. Setiap caller menerima hasil
+# top-k miliknya sendiri.
+#
+# Antrean berurutan menurut prioritas request (interactive > normal > bulk,
+# lihat admission.py), lalu urutan datang. Request yang deadline-nya sudah
+# lewat dibuang sebelum forward pass.
+
+import asyncio
+import itertools
+import time
+from collections import Counter
+
+import torch
+
+from app.utils import metrics
+from app.utils.admission import PRIORITIES, DeadlineExceeded, deadline_var, priority_var
+from app.utils.predict_utils import predict_batch
+
+
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+
+class BatchScheduler:
+    """
+    Scheduler batching per model
+
+    Args:
+        model_name: nama model ("full" atau "words")
+        model: model PyTorch
+        labels: list of labels untuk model ini
+        max_batch_size: jumlah maksimum request per batch
+        max_wait_ms: waktu tunggu maksimum setelah request pertama masuk
+        executor: InferenceExecutor untuk forward pass (None = jalan
+            langsung di event loop)
+        max_concurrency: jumlah batch yang boleh berjalan bersamaan
+        knn: CustomSigns (embeddings.py); selama berisi sign, batch
+            dijalankan lewat knn.predict_batch (logits + embedding)
+    """
+
+    def __init__(self, model_name, model, labels, max_batch_size=8, max_wait_ms=5.0,
+                 executor=None, max_concurrency=1, knn=None):
+        self.model_name = model_name
+        self.model = model
+        self.labels = labels
+        self.knn = knn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.executor = executor
+        self.max_concurrency = max(1, int(max_concurrency))
+
+        self._queue = None
+        self._seq = itertools.count()
+        self._task = None
+        self._slots = None
+        self._inflight = set()
+
+        # Statistik untuk tuning window terhadap latency p99
+        self._batches = 0
+        self._requests = 0
+        self._last_batch_size = 0
+        self._batch_sizes = Counter()
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ------------------------------------------------
+    #   LIFECYCLE
+    # ------------------------------------------------
+
+    def start(self):
+        """Mulai loop scheduler di event loop yang sedang berjalan"""
+        if self._task is None:
+            self.model.eval()
+            self._queue = asyncio.PriorityQueue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Hentikan loop scheduler dan gagalkan request yang masih antre"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+        while not self._queue.empty():
+            future = self._queue.get_nowait()[4]
+            if not future.done():
+                future.set_exception(RuntimeError("Batch scheduler stopped"))
+
+    # ------------------------------------------------
+    #   PUBLIC API
+    # ------------------------------------------------
+
+    async def submit(self, tensor, top_k=3):
+        """
+        Masukkan satu tensor (shape (1, 3, H, W)) ke antrean batch
+
+        Returns:
+            dict: hasil prediksi untuk tensor ini
+        """
+        if self._task is None:
+            raise RuntimeError(f"Batch scheduler '{self.model_name}' belum dijalankan")
+
+        future = asyncio.get_running_loop().create_future()
+        priority = PRIORITIES.get(priority_var.get(), 1)
+        await self._queue.put((
+            priority, next(self._seq), tensor, top_k, future, time.perf_counter(), deadline_var.get(),
+        ))
+        return await future
+
+    def stats(self):
+        """Statistik queue depth dan ukuran batch yang terealisasi"""
+        return {
+            "model": self.model_name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "inflight_batches": len(self._inflight),
+            "batches": self._batches,
+            "requests": self._requests,
+            "last_batch_size": self._last_batch_size,
+            "avg_batch_size": (self._requests / self._batches) if self._batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+            "avg_queue_wait_ms": (self._wait_total / self._requests * 1000.0) if self._requests else 0.0,
+            "max_queue_wait_ms": self._wait_max * 1000.0,
+        }
+
+    # ------------------------------------------------
+    #   INTERNAL
+    # ------------------------------------------------
+
+    async def _collect(self):
+        """Tunggu request pertama lalu kumpulkan sisanya sampai window habis"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                # Window habis: ambil yang sudah ada di antrean saja
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            # Selama batch sebelumnya masih berjalan, request baru terus
+            # menumpuk di antrean sehingga batch berikutnya lebih besar
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+
+            # Lewati caller yang sudah membatalkan request / deadline-nya lewat
+            batch = [item for item in batch if not item[4].done() and not self._expired(item)]
+            if not batch:
+                self._slots.release()
+                continue
+
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    def _expired(self, item):
+        deadline = item[6]
+        if deadline is None or time.monotonic() < deadline:
+            return False
+        metrics.ADMISSION_REJECTED.labels(self.model_name, PRIORITY_NAMES[item[0]], "expired").inc()
+        item[4].set_exception(DeadlineExceeded("forward pass"))
+        return True
+
+    def _forward(self, tensors, top_ks):
+        if self.knn is not None and self.knn.active():
+            return self.knn.predict_batch(torch.cat(tensors, dim=0), self.labels, self.model_name, list(top_ks))
+        return predict_batch(
+            self.model,
+            torch.cat(tensors, dim=0),
+            self.labels,
+            self.model_name,
+            list(top_ks),
+        )
+
+    async def _dispatch(self, batch):
+        try:
+            await self._dispatch_batch(batch)
+        finally:
+            self._slots.release()
+
+    async def _dispatch_batch(self, batch):
+        now = time.perf_counter()
+        _, _, tensors, top_ks, futures, enqueued, _ = zip(*batch)
+
+        try:
+            if self.executor is not None:
+                results = await self.executor.run(self._forward, tensors, top_ks)
+            else:
+                results = self._forward(tensors, top_ks)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+        size = len(batch)
+        self._batches += 1
+        self._requests += size
+        self._last_batch_size = size
+        self._batch_sizes[size] += 1
+        for t in enqueued:
+            waited = now - t
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
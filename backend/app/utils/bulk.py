@@ -0,0 +1,250 @@
+# ====================================================
+#   BULK DETECTION (NDJSON)
+# ====================================================
+#
+# Banyak gambar (multipart list atau satu arsip zip/tar) dibaca satu per
+# satu, diproses per batch, dan hasilnya di-stream sebagai NDJSON. Hanya
+# satu batch yang berada di memori pada satu waktu, berapapun ukuran arsip.
+
+import os
+import tarfile
+import time
+import zipfile
+import zlib
+from functools import partial
+
+from app.utils.predict_utils import predict_batch, prepare_into
+from app.utils.preprocess import get_engine
+from app.utils.responses import dumps
+from app.utils.uploads import UploadError, validate_image
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+# Error saat membaca isi member yang rusak (data terkompresi rusak, arsip
+# terpotong, CRC salah, kompresi / enkripsi tidak didukung)
+MEMBER_ERRORS = (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError,
+                 RuntimeError, NotImplementedError)
+
+
+# ====================================================
+#   INPUT ITERATION
+# ====================================================
+
+def is_archive(upload):
+    """Cek apakah UploadFile adalah arsip zip/tar"""
+    name = (upload.filename or "").lower()
+    content_type = (upload.content_type or "").lower()
+    return name.endswith(ARCHIVE_EXTENSIONS) or content_type in (
+        "application/zip",
+        "application/x-zip-compressed",
+        "application/x-tar",
+        "application/gzip",
+        "application/x-gzip",
+    )
+
+
+def _is_image_member(name):
+    base = os.path.basename(name)
+    return (
+        not base.startswith(".")
+        and "__MACOSX" not in name
+        and name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def _iter_zip(fileobj, max_member_bytes):
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not _is_image_member(info.filename):
+                continue
+            if info.file_size > max_member_bytes:
+                yield info.filename, ValueError(f"File terlalu besar ({info.file_size} bytes)")
+                continue
+            try:
+                with archive.open(info) as member:
+                    # Jangan percaya file_size di header zip: baca maksimal limit + 1
+                    payload = _bounded(member.read(max_member_bytes + 1), max_member_bytes)
+            except MEMBER_ERRORS as e:
+                # Central directory utuh: member berikutnya tetap bisa dibaca
+                payload = ValueError(f"Gagal membaca file dari arsip: {e}")
+            yield info.filename, payload
+
+
+def _iter_tar(fileobj, max_member_bytes):
+    # Mode stream ("r|*"): member dibaca berurutan tanpa index seluruh arsip
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for info in archive:
+            if not info.isfile() or not _is_image_member(info.name):
+                continue
+            if info.size > max_member_bytes:
+                yield info.name, ValueError(f"File terlalu besar ({info.size} bytes)")
+                continue
+            try:
+                member = archive.extractfile(info)
+                payload = _bounded(member.read(max_member_bytes + 1), max_member_bytes)
+            except MEMBER_ERRORS as e:
+                # Mode stream tidak bisa melompati data yang rusak: arsip berhenti di sini
+                yield info.name, ValueError(f"Gagal membaca file dari arsip (sisa arsip dilewati): {e}")
+                return
+            yield info.name, payload
+
+
+def _bounded(data, max_member_bytes):
+    if len(data) > max_member_bytes:
+        return ValueError(f"File terlalu besar (> {max_member_bytes} bytes)")
+    return data
+
+
+def _checked(filename, payload, max_member_bytes):
+    """Validasi format + dimensi dari header (tanpa decode); error jadi payload"""
+    if isinstance(payload, Exception):
+        return filename, payload
+    try:
+        validate_image(payload, max_bytes=max_member_bytes)
+    except UploadError as e:
+        return filename, e
+    return filename, payload
+
+
+def iter_images(uploads, max_member_bytes):
+    """
+    Iterasi (filename, image_bytes) dari list UploadFile secara lazy
+
+    Arsip zip/tar dibuka member per member. Item yang gagal dibaca atau
+    ditolak validasi header (format, ukuran, dimensi) di-yield sebagai
+    (filename, Exception) supaya bisa dilaporkan per baris.
+    """
+    for upload in uploads:
+        upload.file.seek(0)
+        if not is_archive(upload):
+            payload = _bounded(upload.file.read(max_member_bytes + 1), max_member_bytes)
+            yield _checked(upload.filename, payload, max_member_bytes)
+            continue
+
+        try:
+            if zipfile.is_zipfile(upload.file):
+                upload.file.seek(0)
+                members = _iter_zip(upload.file, max_member_bytes)
+            else:
+                upload.file.seek(0)
+                members = _iter_tar(upload.file, max_member_bytes)
+            for filename, payload in members:
+                yield _checked(filename, payload, max_member_bytes)
+        except MEMBER_ERRORS as e:
+            # Arsip tidak bisa dibaca sama sekali / lagi: satu baris error untuk arsipnya
+            yield upload.filename, ValueError(f"Arsip tidak valid: {e}")
+
+
+def next_chunk(iterator, size):
+    """Ambil maksimal `size` item berikutnya dari iterator"""
+    chunk = []
+    for item in iterator:
+        chunk.append(item)
+        if len(chunk) >= size:
+            break
+    return chunk
+
+
+# ====================================================
+#   BATCH PROCESSING
+# ====================================================
+
+def process_chunk(chunk, start_index, model, labels, model_name, top_k, predict=None):
+    """
+    Preprocess + satu forward pass untuk satu chunk
+
+    Args:
+        predict: (opsional) pengganti predict_batch(model, ...), mis.
+            embeddings.batch_predictor (hasil + "knn")
+
+    Returns:
+        list of dict: satu record per item (hasil prediksi atau error)
+    """
+    engine = get_engine()
+    batch = engine.new_batch(len(chunk))
+    records = []
+    ok_records = []
+
+    for offset, (filename, payload) in enumerate(chunk):
+        record = {"index": start_index + offset, "filename": filename}
+        records.append(record)
+        if isinstance(payload, Exception):
+            record["error"] = str(payload)
+            continue
+        try:
+            # Tulis langsung ke baris berikutnya di buffer batch
+            prepare_into(payload, out=batch[len(ok_records)], model_name=model_name)
+            ok_records.append(record)
+        except Exception as e:
+            record["error"] = f"Gagal membaca image: {e}"
+
+    if ok_records:
+        if predict is None:
+            predict = partial(predict_batch, model)
+        results = predict(
+            batch[:len(ok_records)],
+            labels,
+            model_name,
+            [top_k] * len(ok_records),
+        )
+        for record, result in zip(ok_records, results):
+            record.update(result)
+
+    return records
+
+
+async def stream_bulk_ndjson(uploads, executor, model, labels, model_name,
+                             top_k=3, batch_size=32, max_member_bytes=20 * 1024 * 1024, pause=None,
+                             predict=None):
+    """
+    Async generator NDJSON: satu baris per image, lalu satu baris summary
+
+    Args:
+        pause: (opsional) coroutine function yang di-await sebelum setiap
+            chunk, mis. admission.yield_to_interactive
+        predict: (opsional) pengganti predict_batch(model, ...), lihat process_chunk
+    """
+    started = time.perf_counter()
+    iterator = iter_images(uploads, max_member_bytes)
+    index = 0
+    errors = 0
+    error = None
+
+    try:
+        while True:
+            if pause is not None:
+                await pause()
+            chunk = await executor.run(next_chunk, iterator, batch_size)
+            if not chunk:
+                break
+
+            records = await executor.run(
+                process_chunk, chunk, index, model, labels, model_name, top_k, predict
+            )
+            index += len(chunk)
+
+            lines = []
+            for record in records:
+                if "error" in record:
+                    errors += 1
+                lines.append(dumps(record))
+            yield "\n".join(lines) + "\n"
+    except Exception as e:
+        # Error tak terduga di tengah stream: baris yang sudah dikirim tetap
+        # berlaku dan summary SELALU dikirim (client tahu stream berhenti)
+        error = f"Bulk detection berhenti: {e}"
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "model_used": model_name,
+        "total": index,
+        "succeeded": index - errors,
+        "failed": errors,
+        "elapsed_s": round(elapsed, 3),
+        "images_per_s": round(index / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    if error:
+        summary["error"] = error
+    yield dumps({"summary": summary}) + "\n"
@@ -0,0 +1,149 @@
+# ====================================================
+#   PREDICTION CACHE
+# ====================================================
+#
+# Cache hasil prediksi (LRU + TTL) dengan key (model_name, hash image, top_k).
+# Lapisan opsional perceptual hash (dHash 64-bit) melayani frame yang
+# hampir identik (jarak Hamming <= threshold) dari kamera yang mengirim
+# ulang frame yang nyaris sama.
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from app.utils.preprocess import RawFrame, open_image
+
+
+def content_hash(image_bytes):
+    """Hash isi file (exact match); RawFrame di-hash beserta dimensinya"""
+    if isinstance(image_bytes, RawFrame):
+        digest = hashlib.blake2b(image_bytes.data, digest_size=16)
+        digest.update(f"{image_bytes.width}x{image_bytes.height}x{image_bytes.channels}".encode())
+        return digest.digest()
+    return hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+
+def dhash(image_bytes, hash_size=8):
+    """
+    Difference hash 64-bit dari image
+
+    JPEG di-decode dengan draft mode (skala 1/8) karena hanya butuh
+    thumbnail grayscale (hash_size + 1) x hash_size.
+    """
+    image = open_image(image_bytes)
+    if image.format == "JPEG":
+        image.draft("L", (hash_size * 8, hash_size * 8))
+    image = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+
+    pixels = np.asarray(image, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class PredictionCache:
+    """
+    Cache LRU + TTL untuk hasil prediksi
+
+    Args:
+        max_entries: jumlah maksimum entry (LRU eviction)
+        ttl_s: umur maksimum entry dalam detik
+        phash_distance: jarak Hamming maksimum untuk near-duplicate
+            (< 0 = lapisan perceptual hash nonaktif)
+    """
+
+    def __init__(self, max_entries=1024, ttl_s=30.0, phash_distance=-1):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self.phash_distance = int(phash_distance)
+
+        self._entries = OrderedDict()  # key -> (expires_at, result, phash)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.phash_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def phash_enabled(self):
+        return self.phash_distance >= 0
+
+    # ------------------------------------------------
+    #   LOOKUP
+    # ------------------------------------------------
+
+    def get(self, model_name, digest, top_k):
+        """Cari hasil untuk image yang identik (byte per byte)"""
+        key = (model_name, digest, top_k)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._entries[key]
+                self.expirations += 1
+            return None
+
+    def get_similar(self, model_name, phash, top_k):
+        """Cari hasil untuk image yang hampir identik (perceptual hash)"""
+        if not self.phash_enabled or phash is None:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            # Scan dari entry paling baru: frame kamera berurutan paling mirip
+            for key in reversed(self._entries):
+                expires_at, result, other = self._entries[key]
+                if key[0] != model_name or key[2] != top_k or other is None or expires_at <= now:
+                    continue
+                if bin(phash ^ other).count("1") <= self.phash_distance:
+                    self._entries.move_to_end(key)
+                    self.phash_hits += 1
+                    return dict(result)
+        return None
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    # ------------------------------------------------
+    #   STORE
+    # ------------------------------------------------
+
+    def put(self, model_name, digest, top_k, result, phash=None):
+        key = (model_name, digest, top_k)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, result, phash)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counter hit/miss/eviction untuk sizing cache"""
+        lookups = self.hits + self.phash_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "phash_distance": self.phash_distance,
+            "hits": self.hits,
+            "phash_hits": self.phash_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": ((self.hits + self.phash_hits) / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,399 @@
+# ====================================================
+#   CONFIDENCE CASCADE
+# ====================================================
+#
+# Dua stage per model:
+#
+#   1. first stage murah: jaringan kecil hasil distilasi di samping file
+#      model (<model>.fast.weights.pt, misalnya mobilenet_v3_small), atau
+#      bila tidak ada DAN TEMANISYARAT_CASCADE_RESIZE_FALLBACK=1, model
+#      yang sama pada input beresolusi lebih rendah
+#      (TEMANISYARAT_CASCADE_INPUT_SIZE, default 128); tanpa keduanya
+#      cascade tidak dipasang
+#   2. AlexNet penuh, HANYA bila confidence top-1 first stage di bawah
+#      TEMANISYARAT_CASCADE_THRESHOLD (skala 0-100, sama dengan "confidence")
+#
+# Statistik: rasio keputusan (fast / full) dan agreement first stage vs
+# AlexNet - dari request yang di-escalate, plus audit sampel request yang
+# diterima first stage (TEMANISYARAT_CASCADE_AUDIT_RATE, dijalankan di
+# background tanpa menambah latency).
+#
+# Memilih threshold dari validation set (folder <label>/<image>):
+#   python -m app.utils.cascade --model full --images data/val --target-agreement 0.99
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from app.utils import metrics, predict_utils
+from app.utils.backends import TorchBackend
+from app.utils.batching import BatchScheduler
+from app.utils.model_store import WEIGHTS_SUFFIX, load_weights
+from app.utils.optimize import optimize_model
+
+
+FAST_SUFFIX = ".fast" + WEIGHTS_SUFFIX
+
+def fast_path_for(model_path):
+    """alexnet_best_full.pth -> alexnet_best_full.fast.weights.pt, model.pth -> model.fast.weights.pt"""
+    return os.path.splitext(model_path)[0] + FAST_SUFFIX
+
+
+class ResizeInput(nn.Module):
+    """Wrapper yang memperkecil input (N, 3, 224, 224) sebelum forward"""
+
+    def __init__(self, model, size):
+        super().__init__()
+        self.model = model
+        self.size = int(size)
+
+    def forward(self, x):
+        if x.shape[-1] != self.size or x.shape[-2] != self.size:
+            x = F.interpolate(x, size=(self.size, self.size), mode="bilinear",
+                              align_corners=False, antialias=True)
+        return self.model(x)
+
+
+def torch_module(backend, model_path, variant=None, model=None, defer_trace=False):
+    """
+    Modul PyTorch model utama untuk first stage resize
+
+    Backend ONNX Runtime diekspor dengan input 224px tetap, jadi tidak bisa
+    dipakai: modul milik TorchBackend dipakai ulang, selain itu model asli
+    (di-load dari model_path bila tidak diberikan) dioptimasi dengan varian
+    yang sama.
+
+    Args:
+        backend: model utama (InferenceBackend atau nn.Module)
+        model: (opsional) model PyTorch asli yang sudah di-load
+    """
+    if isinstance(backend, TorchBackend):
+        return backend.model
+    if isinstance(backend, nn.Module):
+        return backend
+    if model is None:
+        model, _ = predict_utils.load_model_file(model_path)
+        if model is None:
+            raise FileNotFoundError(f"❌ File model tidak ditemukan: {model_path}")
+    return optimize_model(model, variant or "fp32", defer_trace=defer_trace)
+
+
+def build_first_stage(backend, model_path, input_size=0, variant=None, defer_trace=False,
+                      model=None, resize_fallback=True):
+    """
+    First stage untuk satu model
+
+    Args:
+        backend: model utama (dipakai ulang bila tidak ada model distilasi,
+            lihat torch_module)
+        model_path: path file model utama (untuk mencari *.fast.weights.pt)
+        input_size: resolusi input first stage (0 = 224 untuk model
+            distilasi, 128 untuk model utama)
+        variant: varian optimasi CPU (lihat optimize.py)
+        defer_trace: lihat optimize_model (master pre-fork)
+        model: (opsional) model PyTorch asli, lihat torch_module
+        resize_fallback: pakai model utama beresolusi rendah bila tidak ada
+            model distilasi
+
+    Returns:
+        (nn.Module, deskripsi), atau (None, alasan) bila tidak ada model
+        distilasi dan resize_fallback False
+    """
+    fast_path = fast_path_for(model_path)
+    if os.path.exists(fast_path):
+        fast = load_weights(fast_path)
+        if variant:
+            fast = optimize_model(fast, variant, defer_trace=defer_trace)
+        size = input_size or 224
+        kind = f"distilled:{os.path.basename(fast_path)}@{size}px"
+    elif not resize_fallback:
+        return None, f"no {os.path.basename(fast_path)}"
+    else:
+        fast = torch_module(backend, model_path, variant, model=model, defer_trace=defer_trace)
+        size = input_size or 128
+        kind = f"resize@{size}px"
+
+    if size != 224:
+        fast = ResizeInput(fast, size)
+    return fast.eval(), kind
+
+
+class Cascade:
+    """
+    Cascade first stage -> AlexNet untuk satu versi model
+
+    Args:
+        model_name: nama model ("full" / "words")
+        fast_scheduler: BatchScheduler first stage (input tensor 224, resize di model)
+        full_scheduler: BatchScheduler AlexNet
+        threshold: confidence top-1 minimum (0-100) agar hasil first stage dipakai
+        audit_rate: fraksi request yang diterima first stage yang juga
+            dijalankan di AlexNet (background) untuk mengukur agreement
+    """
+
+    def __init__(self, model_name, fast_scheduler, full_scheduler, threshold=90.0,
+                 audit_rate=0.05, kind="resize"):
+        self.model_name = model_name
+        self.fast_scheduler = fast_scheduler
+        self.full_scheduler = full_scheduler
+        self.threshold = float(threshold)
+        self.audit_rate = float(audit_rate)
+        self.kind = kind
+
+        self.fast = 0
+        self.full = 0
+        self.agreement = {"escalated": [0, 0], "audit": [0, 0]}  # source -> [agree, total]
+        self._audits = set()
+
+    def start(self):
+        self.fast_scheduler.start()
+
+    async def stop(self):
+        for task in list(self._audits):
+            task.cancel()
+        await self.fast_scheduler.stop()
+
+    def _record_agreement(self, source, fast, full):
+        agree = fast["prediction"] == full["prediction"]
+        counts = self.agreement[source]
+        counts[0] += int(agree)
+        counts[1] += 1
+        metrics.CASCADE_AGREEMENT.labels(self.model_name, source, "agree" if agree else "disagree").inc()
+
+    async def _audit(self, tensor, fast, top_k):
+        try:
+            full = await self.full_scheduler.submit(tensor, top_k=top_k)
+            self._record_agreement("audit", fast, full)
+        except Exception:
+            pass
+
+    async def submit(self, tensor, top_k=3):
+        """
+        Jalankan cascade untuk satu tensor (1, 3, 224, 224)
+
+        Returns:
+            dict: hasil prediksi (format sama dengan predict_from_image,
+            ditambah "cascade_stage": "fast" atau "full")
+        """
+        fast = await self.fast_scheduler.submit(tensor, top_k=top_k)
+
+        if fast["confidence"] >= self.threshold:
+            self.fast += 1
+            metrics.CASCADE_DECISIONS.labels(self.model_name, "fast").inc()
+            if self.audit_rate > 0 and random.random() < self.audit_rate:
+                task = asyncio.get_running_loop().create_task(self._audit(tensor, fast, top_k))
+                self._audits.add(task)
+                task.add_done_callback(self._audits.discard)
+            return dict(fast, model_used=self.model_name, cascade_stage="fast")
+
+        full = await self.full_scheduler.submit(tensor, top_k=top_k)
+        self.full += 1
+        metrics.CASCADE_DECISIONS.labels(self.model_name, "full").inc()
+        self._record_agreement("escalated", fast, full)
+        return dict(full, cascade_stage="full")
+
+    def stats(self):
+        total = self.fast + self.full
+        return {
+            "first_stage": self.kind,
+            "threshold": self.threshold,
+            "requests": total,
+            "fast": self.fast,
+            "full": self.full,
+            "fast_ratio": (self.fast / total) if total else 0.0,
+            "agreement": {
+                source: {"agree": agree, "total": n, "rate": (agree / n) if n else None}
+                for source, (agree, n) in self.agreement.items()
+            },
+            "batching": self.fast_scheduler.stats(),
+        }
+
+
+def make_cascade(name, fast_model, kind, labels, full_scheduler, executor, settings):
+    """Bangun Cascade (+ BatchScheduler first stage) dari config.cascade_settings()"""
+    max_batch_size, max_wait_ms = settings["batch_window"]
+    fast_scheduler = BatchScheduler(
+        f"{name}:fast", fast_model, labels,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+        executor=executor,
+        max_concurrency=settings["max_concurrency"],
+    )
+    return Cascade(
+        name, fast_scheduler, full_scheduler,
+        threshold=settings["threshold"],
+        audit_rate=settings["audit_rate"],
+        kind=kind,
+    )
+
+
+# ====================================================
+#   THRESHOLD CALIBRATION
+# ====================================================
+
+def _load_validation_set(image_dir, labels, limit=0):
+    """Folder <label>/<image>: (path, index label atau None)"""
+    index = {label.lower(): i for i, label in enumerate(labels)}
+    samples = []
+    for root, _, files in os.walk(image_dir):
+        label = index.get(os.path.basename(root).lower())
+        for f in sorted(files):
+            if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".bmp")):
+                samples.append((os.path.join(root, f), label))
+    random.Random(0).shuffle(samples)
+    return samples[:limit] if limit else samples
+
+
+def collect_predictions(fast_model, full_model, samples, batch_size=32):
+    """
+    Jalankan kedua stage pada validation set
+
+    Returns:
+        dict berisi tensor fast_conf, fast_top1, full_top1, target
+        (-1 = tanpa label) dan latency rata-rata per image kedua stage
+    """
+    from app.utils.preprocess import get_engine
+
+    engine = get_engine(224)
+    fast_conf, fast_top1, full_top1, targets = [], [], [], []
+    fast_s = full_s = 0.0
+
+    with torch.no_grad():
+        for start in range(0, len(samples), batch_size):
+            chunk = samples[start:start + batch_size]
+            batch = engine.new_batch(len(chunk))
+            for i, (path, _) in enumerate(chunk):
+                with open(path, "rb") as f:
+                    engine.prepare(f.read(), out=batch[i])
+
+            started = time.perf_counter()
+            fast_probs = torch.softmax(fast_model(batch), dim=1)
+            fast_s += time.perf_counter() - started
+            started = time.perf_counter()
+            full_probs = torch.softmax(full_model(batch), dim=1)
+            full_s += time.perf_counter() - started
+
+            conf, top1 = fast_probs.max(dim=1)
+            fast_conf.append(conf * 100.0)
+            fast_top1.append(top1)
+            full_top1.append(full_probs.argmax(dim=1))
+            targets.extend(-1 if label is None else label for _, label in chunk)
+
+    n = max(1, len(samples))
+    return {
+        "fast_conf": torch.cat(fast_conf),
+        "fast_top1": torch.cat(fast_top1),
+        "full_top1": torch.cat(full_top1),
+        "target": torch.tensor(targets),
+        "fast_ms": fast_s / n * 1000.0,
+        "full_ms": full_s / n * 1000.0,
+    }
+
+
+def sweep_thresholds(preds, thresholds):
+    """
+    Evaluasi cascade untuk setiap threshold
+
+    Returns:
+        list of dict: fast_ratio, agreement dengan AlexNet-only, akurasi
+        (bila ada label) dan estimasi latency relatif terhadap AlexNet-only
+    """
+    labelled = preds["target"] >= 0
+    full_correct = (preds["full_top1"] == preds["target"])[labelled].float().mean().item() if labelled.any() else None
+
+    rows = []
+    for threshold in thresholds:
+        accept = preds["fast_conf"] >= threshold
+        final = torch.where(accept, preds["fast_top1"], preds["full_top1"])
+        fast_ratio = accept.float().mean().item()
+        cost = preds["fast_ms"] + (1.0 - fast_ratio) * preds["full_ms"]
+        rows.append({
+            "threshold": float(threshold),
+            "fast_ratio": round(fast_ratio, 4),
+            "agreement": round((final == preds["full_top1"]).float().mean().item(), 4),
+            "accuracy": round((final == preds["target"])[labelled].float().mean().item(), 4) if labelled.any() else None,
+            "full_only_accuracy": round(full_correct, 4) if full_correct is not None else None,
+            "relative_cost": round(cost / preds["full_ms"], 4) if preds["full_ms"] else None,
+        })
+    return rows
+
+
+def pick_threshold(rows, target_agreement=0.99):
+    """Threshold terendah (paling hemat) yang agreement-nya >= target"""
+    ok = [row for row in rows if row["agreement"] >= target_agreement]
+    return min(ok, key=lambda row: row["threshold"]) if ok else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pilih threshold cascade dari validation set")
+    parser.add_argument("--model", default="full", help="full (huruf) atau words (kata)")
+    parser.add_argument("--images", required=True, help="folder validation set (<label>/<image>)")
+    parser.add_argument("--target-agreement", type=float, default=0.99,
+                        help="agreement minimum dengan AlexNet-only (0-1)")
+    parser.add_argument("--input-size", type=int, default=0, help="resolusi first stage (0 = otomatis)")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--json", help="simpan sweep ke file JSON")
+    args = parser.parse_args(argv)
+
+    from app import config
+    from app.utils.registry import ModelRegistry
+
+    registry = ModelRegistry()
+    targets = registry.scan()
+    if args.model not in targets:
+        print(f"❌ Model '{args.model}' tidak tersedia: {list(targets)}")
+        return 1
+    entry = registry.load_sync(registry.get(args.model, targets[args.model]))
+
+    # Kalibrasi selalu boleh mengukur fallback resize (dasar untuk
+    # TEMANISYARAT_CASCADE_RESIZE_FALLBACK); backend ONNX diganti modul PyTorch
+    fast_model, kind = build_first_stage(
+        entry.model, entry.path, args.input_size, config.model_variant(entry.name)
+    )
+    samples = _load_validation_set(args.images, entry.labels, args.limit)
+    if not samples:
+        print(f"❌ Tidak ada image di {args.images}")
+        return 1
+
+    print(f"\n📊 Cascade calibration '{entry.key}' ({kind}) on {len(samples)} images")
+    preds = collect_predictions(fast_model, entry.model, samples)
+    thresholds = [t / 2.0 for t in range(0, 200)] + [99.5, 99.9]
+    rows = sweep_thresholds(preds, sorted(set(thresholds)))
+
+    print(f"⏱️ first stage {preds['fast_ms']:.2f} ms/img, AlexNet {preds['full_ms']:.2f} ms/img")
+    print("-" * 72)
+    print(f"{'threshold':>9s} {'fast %':>8s} {'agree':>8s} {'accuracy':>9s} {'rel. cost':>10s}")
+    print("-" * 72)
+    shown = rows[::10] + [row for row in rows[-2:] if row not in rows[::10]]
+    for row in shown:
+        accuracy = f"{row['accuracy']*100:8.2f}%" if row["accuracy"] is not None else f"{'-':>9s}"
+        print(f"{row['threshold']:9.1f} {row['fast_ratio']*100:7.1f}% {row['agreement']*100:7.2f}% "
+              f"{accuracy} {row['relative_cost']:10.3f}")
+    print("-" * 72)
+
+    best = pick_threshold(rows, args.target_agreement)
+    if best is None:
+        print(f"⚠️ Tidak ada threshold dengan agreement >= {args.target_agreement:.2%}; cascade tidak disarankan")
+    else:
+        print(f"✅ TEMANISYARAT_CASCADE_THRESHOLD_{args.model.upper()}={best['threshold']:g} "
+              f"(fast {best['fast_ratio']:.1%}, agreement {best['agreement']:.2%}, "
+              f"cost {best['relative_cost']:.2f}x)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": entry.key, "first_stage": kind, "images": len(samples),
+                       "recommended": best, "sweep": rows}, f, indent=2)
+        print(f"💾 Sweep saved: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# ====================================================
+#   EMBEDDINGS + CUSTOM SIGNS (kNN)
+# ====================================================
+#
+# Sign baru tanpa retrain: embedding layer penultimate AlexNet (input
+# Linear terakhir, 4096-d) dari beberapa contoh image disimpan di
+# VectorIndex per versi model. Selama index berisi sign, batch scheduler
+# model tersebut menghasilkan logits DAN embedding dalam satu forward pass;
+# setiap hasil softmax mendapat field tambahan:
+#
+#   "knn": {"label": "Sepeda", "similarity": 0.93, "match": true, "votes": 4,
+#           "neighbours": [["Sepeda", 0.93], ...]}
+#
+# Index dipersist ke TEMANISYARAT_KNN_DIR/<model>@<versi>.knn.npz (embedding
+# terikat pada weights versi itu; versi baru mulai dengan index kosong).
+#
+# Multi-worker (gunicorn): setiap worker punya salinan index di memori,
+# file .npz adalah sumber kebenaran. Register / remove dijalankan di bawah
+# file lock: index dimuat ulang dari file dulu (perubahan worker lain ikut
+# digabung), diubah, lalu disimpan (atomic rename). Sebelum setiap kNN,
+# worker membandingkan stempel file (inode + mtime + ukuran) dan memuat
+# ulang index bila file diganti worker lain. Stempel yang sama (index_version)
+# masuk ke key prediction cache + session, jadi hasil lama tidak terpakai
+# lagi di semua worker begitu index berubah.
+
+import os
+import threading
+import time
+
+import torch
+import torch.nn as nn
+
+from app.utils import metrics
+from app.utils.predict_utils import predict_batch, prepare_image, results_from_logits
+from app.utils.runtime import file_lock
+from app.utils.vector_index import VectorIndex
+
+
+class Embedder:
+    """
+    Logits + embedding penultimate dalam satu forward pass (PyTorch fp32)
+
+    Butuh struktur torchvision AlexNet: features -> avgpool -> classifier
+    (nn.Sequential yang diakhiri nn.Linear).
+    """
+
+    def __init__(self, model):
+        classifier = getattr(model, "classifier", None)
+        if not (hasattr(model, "features") and hasattr(model, "avgpool")
+                and isinstance(classifier, nn.Sequential) and isinstance(classifier[-1], nn.Linear)):
+            raise ValueError("❌ Embedding butuh model AlexNet (features / avgpool / classifier)")
+        self.model = model.eval()
+        self.dim = classifier[-1].in_features
+
+    def __call__(self, batch):
+        """
+        Returns:
+            (logits (N, classes), embeddings (N, dim))
+        """
+        model = self.model
+        with torch.no_grad():
+            x = torch.flatten(model.avgpool(model.features(batch)), 1)
+            embeddings = model.classifier[:-1](x)
+            logits = model.classifier[-1](embeddings)
+        return logits, embeddings
+
+
+class CustomSigns:
+    """
+    Sign custom untuk satu versi model: index kNN + persistence
+
+    Args:
+        key: "<model>@<versi>"
+        embedder: Embedder untuk versi ini
+        path: file .npz index (dimuat bila sudah ada)
+        k: jumlah tetangga yang di-vote
+        threshold: cosine similarity minimum untuk "match"
+        project_to / approx_min / nprobe: lihat VectorIndex
+    """
+
+    def __init__(self, key, embedder, path, k=5, threshold=0.85, project_to=256, approx_min=20000, nprobe=8):
+        self.key = key
+        self.embedder = embedder
+        self.path = path
+        self.k = k
+        self.threshold = threshold
+        self.project_to = project_to
+        self.approx_min = approx_min
+        self.nprobe = nprobe
+        self.reloads = 0
+
+        self._stamp = None
+        self._reload_lock = threading.Lock()
+        self.index = self._empty()
+        self._sync()
+        self.reloads = 0
+
+    def _empty(self):
+        return VectorIndex(self.embedder.dim, self.project_to, approx_min=self.approx_min, nprobe=self.nprobe)
+
+    def _file_stamp(self):
+        """(inode, mtime, ukuran) file index; None bila belum ada"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _sync(self):
+        """Muat ulang index bila file diganti (worker lain); return index terbaru"""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return self.index
+        with self._reload_lock:
+            stamp = self._file_stamp()
+            if stamp != self._stamp:
+                if stamp is None:
+                    self.index = self._empty()
+                else:
+                    self.index = VectorIndex.load(self.path, approx_min=self.approx_min, nprobe=self.nprobe)
+                self.reloads += 1
+                self._stamp = stamp
+            return self.index
+
+    def _update(self, mutate):
+        """
+        Satu penulis pada satu waktu (antar thread dan antar worker):
+        muat ulang dari file, ubah, simpan
+
+        Args:
+            mutate: fungsi index -> (hasil, perlu disimpan)
+        """
+        with file_lock(self.path):
+            index = self._sync()
+            result, changed = mutate(index)
+            if changed:
+                index.save(self.path)
+                with self._reload_lock:
+                    self._stamp = self._file_stamp()
+            return result
+
+    def active(self):
+        return len(self._sync()) > 0
+
+    # ------------------------------------------------
+    #   REGISTRATION
+    # ------------------------------------------------
+
+    def embed(self, batch):
+        """Embedding (N, dim) untuk batch tensor"""
+        return self.embedder(batch)[1]
+
+    def register(self, name, embeddings):
+        """Tambah contoh untuk sign `name` lalu simpan index"""
+        vectors = embeddings.numpy()
+        return self._update(lambda index: (index.add(name, vectors), True))
+
+    def register_images(self, name, images, model_name="shared"):
+        """
+        Preprocess + embed image contoh (satu batch) lalu register
+
+        Args:
+            images: list bytes image / RawFrame
+
+        Returns:
+            jumlah contoh yang ditambahkan
+        """
+        batch = torch.cat([prepare_image(image, 224, model_name) for image in images], dim=0)
+        return self.register(name, self.embed(batch))
+
+    def remove(self, name):
+        def mutate(index):
+            removed = index.remove(name)
+            return removed, removed
+
+        return self._update(mutate)
+
+    # ------------------------------------------------
+    #   kNN
+    # ------------------------------------------------
+
+    def classify(self, embeddings):
+        """Hasil kNN per baris embedding (None bila index kosong)"""
+        results = self._sync().classify(embeddings.numpy(), self.k)
+        for result in results:
+            if result is not None:
+                result["match"] = result["similarity"] >= self.threshold
+        return results
+
+    def predict_batch(self, batch, labels, model_name, top_ks):
+        """predict_batch() + hasil kNN, dari satu forward pass"""
+        started = time.perf_counter()
+        logits, embeddings = self.embedder(batch)
+        metrics.observe_stage("forward", model_name, time.perf_counter() - started)
+
+        results = results_from_logits(logits, labels, model_name, top_ks)
+
+        started = time.perf_counter()
+        for result, knn in zip(results, self.classify(embeddings)):
+            if knn is not None:
+                result["knn"] = knn
+        metrics.observe_stage("knn", model_name, time.perf_counter() - started)
+        return results
+
+    def stats(self):
+        index = self._sync()
+        return {"key": self.key, "k": self.k, "threshold": self.threshold, "reloads": self.reloads, **index.stats()}
+
+
+def batch_predictor(model, signs=None):
+    """
+    Fungsi predict_batch untuk stream bulk / video: seperti batch scheduler,
+    pakai CustomSigns.predict_batch (hasil + "knn") selama index berisi sign
+
+    Args:
+        model: model versi yang sedang di-stream
+        signs: CustomSigns versi tersebut (None bila kNN nonaktif)
+
+    Returns:
+        fungsi (batch, labels, model_name, top_ks) -> list of dict
+    """
+    def predict(batch, labels, model_name, top_ks):
+        # Dicek per batch: sign yang didaftarkan di tengah stream ikut dipakai
+        if signs is not None and signs.active():
+            return signs.predict_batch(batch, labels, model_name, top_ks)
+        return predict_batch(model, batch, labels, model_name, top_ks)
+
+    return predict
+
+
+def signs_path(knn_dir, key):
+    """Path file index untuk "<model>@<versi>" """
+    return os.path.join(knn_dir, f"{key}.knn.npz")
+
+
+def index_version(path):
+    """
+    Versi file index (inode-mtime-ukuran, hex): berubah setiap register /
+    remove dari worker mana pun. Dipakai di key prediction cache + session
+
+    Returns:
+        str, atau None bila file belum ada (belum pernah ada sign)
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"
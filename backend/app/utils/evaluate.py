@@ -0,0 +1,248 @@
+# ====================================================
+#   OFFLINE EVALUATION
+# ====================================================
+#
+# Akurasi + throughput model "full" / "words" pada dataset berlabel:
+#
+#   dataset/
+#     A/  img001.jpg ...        (nama folder = label, atau urutan folder
+#     B/  ...                    terurut = urutan LABELS_HURUF / LABELS_KATA)
+#
+# Image di-stream lewat DataLoader multi-worker dengan preprocessing yang
+# sama persis dengan prepare_image(), lalu di-inference per batch.
+#
+#   python -m app.utils.evaluate --model full --data dataset/huruf
+#   python -m app.utils.evaluate --model words --data dataset/kata --workers 8 --batch-size 64 --json eval.json
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from app.utils.bulk import IMAGE_EXTENSIONS
+from app.utils.predict_utils import prepare_into
+
+
+class ImageFolderDataset(Dataset):
+    """(tensor 3x224x224, index label) dari folder <label>/<image>"""
+
+    def __init__(self, samples, size=224):
+        self.samples = samples
+        self.size = size
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __getitem__(self, index):
+        path, target = self.samples[index]
+        with open(path, "rb") as f:
+            image_bytes = f.read()
+        try:
+            tensor = prepare_into(image_bytes, size=self.size, model_name="eval")
+        except Exception:
+            # Image rusak: dihitung terpisah, tidak menghentikan evaluasi
+            return torch.zeros(3, self.size, self.size), target, False
+        return tensor, target, True
+
+
+def scan_dataset(data_dir, labels):
+    """
+    Petakan folder kelas ke index label
+
+    Nama folder dicocokkan dengan label (case-insensitive); bila tidak ada
+    yang cocok, urutan folder terurut dipakai (konvensi ImageFolder).
+
+    Returns:
+        (samples [(path, index)], issues [str], mapping "name" / "order")
+    """
+    classes = sorted(
+        d for d in os.listdir(data_dir)
+        if os.path.isdir(os.path.join(data_dir, d)) and not d.startswith(".")
+    )
+    index = {label.lower(): i for i, label in enumerate(labels)}
+    issues = []
+
+    if any(c.lower() in index for c in classes):
+        mapping = "name"
+        class_index = {c: index.get(c.lower()) for c in classes}
+        unknown = [c for c, i in class_index.items() if i is None]
+        if unknown:
+            issues.append(f"Folder tanpa label yang cocok (dilewati): {unknown}")
+        missing = [label for label in labels if label.lower() not in {c.lower() for c in classes}]
+        if missing:
+            issues.append(f"Label tanpa folder data: {missing}")
+    else:
+        mapping = "order"
+        class_index = {c: i if i < len(labels) else None for i, c in enumerate(classes)}
+        if len(classes) != len(labels):
+            issues.append(f"Jumlah folder ({len(classes)}) != jumlah label ({len(labels)})")
+
+    samples = []
+    for c in classes:
+        target = class_index[c]
+        if target is None:
+            continue
+        for root, _, files in os.walk(os.path.join(data_dir, c)):
+            for f in sorted(files):
+                if f.lower().endswith(IMAGE_EXTENSIONS):
+                    samples.append((os.path.join(root, f), target))
+    return samples, issues, mapping
+
+
+def check_output_size(model, labels, size=224):
+    """Jumlah output model vs jumlah label (None bila cocok, pesan bila tidak)"""
+    with torch.no_grad():
+        outputs = model(torch.zeros(1, 3, size, size)).shape[-1]
+    if outputs != len(labels):
+        return f"Model punya {outputs} output, label mapping berisi {len(labels)}"
+    return None
+
+
+def evaluate(model, labels, samples, batch_size=32, workers=4, top_k=5):
+    """
+    Jalankan evaluasi
+
+    Returns:
+        dict: top1 / topk accuracy, confusion matrix (list of list,
+        baris = label asli, kolom = prediksi), per-class recall, throughput
+    """
+    num_classes = len(labels)
+    loader = DataLoader(
+        ImageFolderDataset(samples),
+        batch_size=batch_size,
+        num_workers=workers,
+        shuffle=False,
+        persistent_workers=False,
+        prefetch_factor=4 if workers > 0 else None,
+    )
+
+    confusion = torch.zeros(num_classes, num_classes, dtype=torch.int64)
+    top1 = topk = total = unreadable = 0
+    forward_s = 0.0
+    k = min(top_k, num_classes)
+
+    started = time.perf_counter()
+    with torch.inference_mode():
+        for batch, targets, ok in loader:
+            if not ok.all():
+                unreadable += int((~ok).sum())
+                batch, targets = batch[ok], targets[ok]
+                if len(batch) == 0:
+                    continue
+
+            t0 = time.perf_counter()
+            outputs = model(batch)[:, :num_classes]
+            forward_s += time.perf_counter() - t0
+
+            ranked = outputs.topk(k, dim=1).indices
+            predicted = ranked[:, 0]
+            top1 += int((predicted == targets).sum())
+            topk += int((ranked == targets.unsqueeze(1)).any(dim=1).sum())
+            total += len(targets)
+            confusion.index_put_((targets, predicted), torch.ones_like(targets), accumulate=True)
+    elapsed = time.perf_counter() - started
+
+    support = confusion.sum(dim=1)
+    recall = confusion.diag().double() / support.clamp(min=1).double()
+    return {
+        "images": total,
+        "unreadable": unreadable,
+        "top1": top1 / total if total else 0.0,
+        f"top{k}": topk / total if total else 0.0,
+        "top_k": k,
+        "images_per_s": total / elapsed if elapsed else 0.0,
+        "forward_images_per_s": total / forward_s if forward_s else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "per_class": [
+            {"label": labels[i], "support": int(support[i]), "recall": round(float(recall[i]), 4)}
+            for i in range(num_classes)
+        ],
+        "confusion": confusion.tolist(),
+    }
+
+
+def top_confusions(confusion, labels, n=10):
+    """Pasangan (asli -> prediksi) yang paling sering salah"""
+    pairs = [
+        (count, labels[i], labels[j])
+        for i, row in enumerate(confusion)
+        for j, count in enumerate(row)
+        if i != j and count > 0
+    ]
+    return sorted(pairs, reverse=True)[:n]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluasi akurasi + throughput model pada dataset berlabel")
+    parser.add_argument("--model", default="full", help="full (huruf) atau words (kata)")
+    parser.add_argument("--version", help="versi registry (default: versi aktif)")
+    parser.add_argument("--data", required=True, help="folder dataset (<label>/<image>)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1), help="worker DataLoader")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=0, help="evaluasi maksimal N image")
+    parser.add_argument("--force", action="store_true", help="tetap evaluasi walau output model != jumlah label")
+    parser.add_argument("--json", help="simpan hasil (termasuk confusion matrix) ke file JSON")
+    args = parser.parse_args(argv)
+
+    from app.utils.registry import ModelRegistry
+
+    registry = ModelRegistry()
+    targets = registry.scan()
+    if args.model not in targets:
+        print(f"❌ Model '{args.model}' tidak tersedia: {list(targets)}")
+        return 1
+    entry = registry.load_sync(registry.get(args.model, args.version or targets[args.model]), warmup=False)
+    labels = entry.labels
+
+    mismatch = check_output_size(entry.model, labels)
+    samples, issues, mapping = scan_dataset(args.data, labels)
+    if args.limit:
+        samples = samples[:args.limit]
+
+    print(f"\n📊 Evaluasi '{entry.key}' pada {args.data}: {len(samples)} image, "
+          f"{len(labels)} label (folder -> label via {mapping})")
+    if mismatch:
+        print(f"❌ MISMATCH: {mismatch}")
+    for issue in issues:
+        print(f"⚠️ {issue}")
+    if mismatch and not args.force:
+        print("❌ Evaluasi dibatalkan (pakai --force untuk tetap menjalankan)")
+        return 2
+    if not samples:
+        print(f"❌ Tidak ada image di {args.data}")
+        return 1
+
+    report = evaluate(entry.model, labels, samples, args.batch_size, args.workers, args.top_k)
+    k = report["top_k"]
+
+    print("-" * 60)
+    print(f"🎯 Top-1 accuracy : {report['top1']*100:.2f}%")
+    print(f"🎯 Top-{k} accuracy : {report[f'top{k}']*100:.2f}%")
+    print(f"⚡ Throughput     : {report['images_per_s']:.1f} img/s end-to-end, "
+          f"{report['forward_images_per_s']:.1f} img/s forward only")
+    if report["unreadable"]:
+        print(f"⚠️ Image rusak     : {report['unreadable']}")
+    print("-" * 60)
+    worst = sorted((c for c in report["per_class"] if c["support"]), key=lambda c: c["recall"])[:5]
+    print("📉 Recall terendah: " + ", ".join(f"{c['label']} {c['recall']*100:.1f}%" for c in worst))
+    confusions = top_confusions(report["confusion"], labels)
+    if confusions:
+        print("🔀 Salah terbanyak: " + ", ".join(f"{a}->{b} ({n})" for n, a, b in confusions))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "model": entry.key, "data": args.data, "labels": labels, "mapping": mapping,
+                "mismatch": mismatch, "issues": issues, **report,
+            }, f, indent=2)
+        print(f"💾 Report saved: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
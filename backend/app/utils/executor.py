@@ -0,0 +1,78 @@
+# ====================================================
+#   INFERENCE EXECUTOR
+# ====================================================
+#
+# Decode image, transform dan forward pass adalah kerja CPU yang sinkron.
+# Semua kerja itu dijalankan di thread pool terbatas supaya event loop
+# FastAPI tetap bebas melayani /health dan menerima upload baru.
+# PyTorch melepas GIL selama operasi tensor, sehingga thread pool cukup
+# tanpa perlu memuat ulang model di setiap proses.
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InferenceExecutor:
+    """
+    Thread pool terbatas untuk kerja inference
+
+    Args:
+        max_workers: jumlah thread inference
+        max_pending: jumlah maksimum job (berjalan + antre) di pool;
+            caller berikutnya menunggu slot kosong (backpressure)
+    """
+
+    def __init__(self, max_workers=4, max_pending=64):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(self.max_workers, int(max_pending))
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="inference",
+        )
+        self._slots = None
+        self._pending = 0
+        self._running = 0
+        self._running_lock = threading.Lock()
+        self._completed = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Jalankan fn(*args, **kwargs) di thread pool dan tunggu hasilnya"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        self._pending += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                # Bawa contextvars (request_id untuk logging) ke thread worker
+                context = contextvars.copy_context()
+                call = functools.partial(context.run, self._call, fn, *args, **kwargs)
+                return await loop.run_in_executor(self._pool, call)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+
+    def _call(self, fn, *args, **kwargs):
+        with self._running_lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._running_lock:
+                self._running -= 1
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def stats(self):
+        """Jumlah thread, job yang berjalan dan antrean executor"""
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": self._running,
+            "queued": max(0, self._pending - self._running),
+            "completed": self._completed,
+        }
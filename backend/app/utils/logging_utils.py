@@ -0,0 +1,154 @@
+# ====================================================
+#   STRUCTURED NON-BLOCKING LOGGING
+# ====================================================
+#
+# Logging di hot path (request handler, prediksi) TIDAK menulis langsung ke
+# stdout: record dimasukkan ke queue (QueueHandler) dan ditulis oleh thread
+# QueueListener, sehingga I/O tidak pernah memblokir request. Setiap record
+# membawa request_id (header X-Request-ID) lewat contextvars.
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+import uuid
+
+from app import config
+
+
+LOGGER_NAME = "temanisyarat"
+
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Tambahkan request_id dari context ke setiap record"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu baris JSON per record (field tambahan lewat extra={"fields": {...}})"""
+
+    def format(self, record):
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return text
+
+
+def setup_logging(level=None, fmt=None):
+    """
+    Pasang QueueHandler pada logger "temanisyarat" (idempotent)
+
+    Args:
+        level: DEBUG/INFO/WARNING/... (default TEMANISYARAT_LOG_LEVEL)
+        fmt: "json" atau "text" (default TEMANISYARAT_LOG_FORMAT)
+    """
+    global _listener
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel((level or config.LOG_LEVEL).upper())
+    if _listener is not None:
+        return logger
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if (fmt or config.LOG_FORMAT) == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    return logger
+
+
+def shutdown_logging():
+    """Flush queue dan hentikan thread listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name):
+    """Logger anak, contoh get_logger("predict") -> temanisyarat.predict"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+# ====================================================
+#   REQUEST ID MIDDLEWARE
+# ====================================================
+
+class RequestIdMiddleware:
+    """
+    Ambil X-Request-ID dari client (atau buat baru), simpan di context
+    untuk logging, dan kembalikan di header response
+    """
+
+    header = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for key, value in scope.get("headers", []):
+            if key == self.header:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((self.header, request_id.encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
+
+def log_timing(logger, message, started, **fields):
+    """Log INFO dengan durasi ms sejak `started` (time.perf_counter())"""
+    fields["ms"] = round((time.perf_counter() - started) * 1000.0, 2)
+    logger.info(message, extra={"fields": fields})
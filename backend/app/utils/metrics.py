@@ -0,0 +1,326 @@
+# ====================================================
+#   PROMETHEUS METRICS
+# ====================================================
+#
+# Implementasi minimal format teks Prometheus (tanpa dependency tambahan).
+# Observasi hanya berupa bisect + increment di bawah lock per metric,
+# cukup murah untuk selalu aktif di production.
+#
+# Stage pipeline deteksi (histogram temanisyarat_stage_seconds):
+#   upload_read -> decode -> transform -> forward -> topk -> serialize
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _render_child(self, key, child):
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class GaugeFunc(_Metric):
+    """Gauge yang nilainya diambil dari callback saat scrape"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames, callback):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.callback().items()):
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, key, child):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+        yield f"{self.name}_count{labels} {child.count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ====================================================
+#   METRICS TEMANISYARAT
+# ====================================================
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "temanisyarat_stage_seconds",
+    "Latency per stage pipeline deteksi (forward/topk/knn per batch)",
+    ("stage", "model"),
+))
+
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "temanisyarat_batch_size",
+    "Ukuran batch per forward pass",
+    ("model",),
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+))
+
+DETECTIONS = REGISTRY.register(Counter(
+    "temanisyarat_detections_total",
+    "Jumlah deteksi per model dan hasil (ok, cached, gated, error)",
+    ("model", "outcome"),
+))
+
+CASCADE_DECISIONS = REGISTRY.register(Counter(
+    "temanisyarat_cascade_decisions_total",
+    "Keputusan cascade per model (fast = dijawab first stage, full = di-escalate ke AlexNet)",
+    ("model", "stage"),
+))
+
+CASCADE_AGREEMENT = REGISTRY.register(Counter(
+    "temanisyarat_cascade_agreement_total",
+    "Top-1 first stage vs AlexNet (source: escalated / audit)",
+    ("model", "source", "outcome"),
+))
+
+UPLOADS_REJECTED = REGISTRY.register(Counter(
+    "temanisyarat_uploads_rejected_total",
+    "Upload yang ditolak sebelum decode (too_large, too_many_pixels, unsupported, invalid)",
+    ("reason",),
+))
+
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "temanisyarat_admission_rejected_total",
+    "Request yang ditolak admission control (overloaded = 503, expired = deadline lewat)",
+    ("model", "priority", "reason"),
+))
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "temanisyarat_http_requests_total",
+    "Jumlah HTTP request per endpoint dan status",
+    ("method", "path", "status"),
+))
+
+HTTP_ERRORS = REGISTRY.register(Counter(
+    "temanisyarat_http_errors_total",
+    "Jumlah HTTP request dengan status >= 500 atau exception",
+    ("method", "path"),
+))
+
+HTTP_SECONDS = REGISTRY.register(Histogram(
+    "temanisyarat_http_request_seconds",
+    "Latency HTTP request end-to-end",
+    ("method", "path"),
+))
+
+HTTP_INFLIGHT = REGISTRY.register(Gauge(
+    "temanisyarat_http_inflight_requests",
+    "Jumlah HTTP request yang sedang diproses",
+))
+
+
+def stage(name, model):
+    """Context manager untuk mengukur satu stage: with stage("decode", "full"): ..."""
+    return STAGE_SECONDS.labels(name, model).time()
+
+
+def observe_stage(name, model, seconds):
+    STAGE_SECONDS.labels(name, model).observe(seconds)
+
+
+def render():
+    """Seluruh metric dalam format teks Prometheus"""
+    return REGISTRY.render()
+
+
+# ====================================================
+#   ASGI MIDDLEWARE
+# ====================================================
+
+class MetricsMiddleware:
+    """
+    Hitung request, error, latency dan in-flight per endpoint
+
+    Label path memakai template route ("/ws/detect/{model}") bukan URL
+    mentah, supaya cardinality tetap kecil.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    def _route_path(self, scope):
+        if self._route_paths is None:
+            router = scope.get("app") and getattr(scope["app"], "router", None)
+            if router is not None:
+                self._route_paths = {
+                    getattr(route, "endpoint", None): route.path for route in router.routes
+                }
+        endpoint = scope.get("endpoint")
+        return (self._route_paths or {}).get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        inflight = HTTP_INFLIGHT.labels()
+        inflight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status["code"] = 500
+            raise
+        finally:
+            inflight.dec()
+            method = scope.get("method", "")
+            path = self._route_path(scope)
+            HTTP_SECONDS.labels(method, path).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, path, status["code"]).inc()
+            if status["code"] >= 500:
+                HTTP_ERRORS.labels(method, path).inc()
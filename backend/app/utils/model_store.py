@@ -0,0 +1,128 @@
+# ====================================================
+#   WEIGHTS-ONLY MODEL STORE
+# ====================================================
+#
+# Model lama disimpan sebagai pickle seluruh nn.Module (weights_only=False)
+# dan butuh shim fungsi dummy di __main__. Format baru hanya menyimpan
+# state_dict + metadata arsitektur:
+#
+#   alexnet_best_full.weights.pt  = {"format", "arch", "num_classes", "state_dict"}
+#
+# File dimuat dengan torch.load(weights_only=True, mmap=True): tensor
+# langsung di-mmap dari file (tanpa unpickle kode, tanpa copy ke heap) dan
+# model dibangun di device "meta" lalu di-assign ke tensor tersebut.
+#
+# Konversi sekali dari file lama:
+#   python -m app.utils.model_store convert
+
+import os
+import sys
+
+import torch
+import torch.nn as nn
+
+
+WEIGHTS_SUFFIX = ".weights.pt"
+FORMAT_VERSION = 1
+
+# Arsitektur torchvision yang didukung -> key weight layer output
+# (AlexNet untuk model utama; yang kecil untuk first stage cascade)
+ARCHITECTURES = {
+    "alexnet": "classifier.6.weight",
+    "mobilenet_v3_small": "classifier.3.weight",
+    "squeezenet1_1": "classifier.1.weight",
+}
+
+
+def weights_path_for(legacy_path):
+    """alexnet_best_full.pth -> alexnet_best_full.weights.pt"""
+    return os.path.splitext(legacy_path)[0] + WEIGHTS_SUFFIX
+
+
+def build_model(arch, num_classes, device="meta"):
+    """Bangun arsitektur kosong (default di device meta, tanpa alokasi)"""
+    if arch not in ARCHITECTURES:
+        raise ValueError(f"❌ Arsitektur '{arch}' belum didukung. Pilihan: {list(ARCHITECTURES)}")
+
+    import torchvision.models
+
+    with torch.device(device):
+        return getattr(torchvision.models, arch)(num_classes=num_classes)
+
+
+def _infer_arch(model):
+    """Cari arsitektur torchvision yang kompatibel dengan module ini"""
+    state = model.state_dict()
+    for arch, head in ARCHITECTURES.items():
+        if head in state:
+            candidate = build_model(arch, state[head].shape[0])
+            if set(candidate.state_dict()) == set(state):
+                return arch
+
+    raise ValueError(
+        f"❌ Module {type(model).__name__} tidak kompatibel dengan {list(ARCHITECTURES)}"
+    )
+
+
+def save_weights(model, path):
+    """Simpan model sebagai file weights-only"""
+    arch = _infer_arch(model)
+    state = {k: v.detach().contiguous() for k, v in model.state_dict().items()}
+    torch.save({
+        "format": FORMAT_VERSION,
+        "arch": arch,
+        "num_classes": int(state[ARCHITECTURES[arch]].shape[0]),
+        "state_dict": state,
+    }, path)
+    return path
+
+
+def load_weights(path, mmap=True):
+    """
+    Muat model dari file weights-only
+
+    Returns:
+        nn.Module dalam eval mode, parameter di-mmap dari file
+    """
+    checkpoint = torch.load(path, map_location="cpu", weights_only=True, mmap=mmap)
+    if checkpoint.get("format") != FORMAT_VERSION:
+        raise RuntimeError(f"❌ Format weights tidak dikenal: {path}")
+
+    model = build_model(checkpoint["arch"], checkpoint["num_classes"])
+    model.load_state_dict(checkpoint["state_dict"], assign=True)
+    return model.eval()
+
+
+def warmup_model(model, batch_sizes=(1,), size=224):
+    """Forward pass dummy supaya alokasi memori / kernel selection terjadi sebelum traffic"""
+    model.eval()
+    with torch.no_grad():
+        for batch_size in batch_sizes:
+            model(torch.zeros(batch_size, 3, size, size))
+
+
+def convert_legacy(legacy_path, out_path=None):
+    """Konversi pickle nn.Module lama ke file weights-only"""
+    from app.utils.predict_utils import try_torch_load
+
+    model = try_torch_load(legacy_path)
+    if not isinstance(model, nn.Module):
+        raise ValueError(f"❌ {legacy_path} tidak berisi nn.Module")
+    return save_weights(model, out_path or weights_path_for(legacy_path))
+
+
+if __name__ == "__main__":
+    # Usage: python -m app.utils.model_store convert [file.pth ...]
+    if len(sys.argv) < 2 or sys.argv[1] != "convert":
+        print("Usage: python -m app.utils.model_store convert [file.pth ...]")
+        sys.exit(1)
+
+    from app.utils.predict_utils import MODELS_DIR
+
+    paths = sys.argv[2:] or [
+        os.path.join(MODELS_DIR, name)
+        for name in ("alexnet_best_full.pth", "alexnet_best_words.pth")
+    ]
+    for legacy in paths:
+        out = convert_legacy(legacy)
+        print(f"✅ {legacy} -> {out}")
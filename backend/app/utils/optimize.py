@@ -0,0 +1,257 @@
+# ====================================================
+#   CPU MODEL OPTIMIZATION
+# ====================================================
+#
+# Varian model untuk inference CPU (tanpa GPU), dipilih per model lewat
+# TEMANISYARAT_MODEL_VARIANT / TEMANISYARAT_MODEL_VARIANT_<MODEL>.
+# Opsi bisa digabung dengan koma, contoh "int8,channels_last,script":
+#
+#   fp32           model asli (eager)
+#   int8           dynamic quantization nn.Linear ke int8 - classifier
+#                  AlexNet memegang ~95% parameter model
+#   channels_last  memory format NHWC untuk layer konvolusi
+#   script         torch.jit.trace + freeze
+#   compile        torch.compile (butuh compiler C++ di server)
+#
+# Laporan akurasi + speedup terhadap fp32:
+#   python -m app.utils.optimize --model full --variants int8 int8,script
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+import torch
+import torch.nn as nn
+
+
+VARIANT_OPTIONS = ("fp32", "int8", "channels_last", "script", "compile")
+
+
+class ChannelsLastInput(nn.Module):
+    """Wrapper yang mengubah input ke channels_last sebelum forward"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x):
+        return self.model(x.contiguous(memory_format=torch.channels_last))
+
+
+class DeferredTrace(nn.Module):
+    """
+    Varian script yang di-trace saat forward pertama DI PROSES PEMAKAI
+
+    Dipakai saat model dimuat di master pre-fork: torch.jit.trace menjalankan
+    forward pass, dan thread pool OpenMP yang hidup sebelum fork tidak aman
+    dipakai di worker.
+    """
+
+    def __init__(self, model, input_size=224):
+        super().__init__()
+        self.model = model
+        self.input_size = input_size
+        self._traced = {}  # pid -> module hasil trace + freeze
+        self._lock = threading.Lock()
+
+    def forward(self, x):
+        traced = self._traced.get(os.getpid())
+        if traced is None:
+            with self._lock:
+                traced = self._traced.get(os.getpid())
+                if traced is None:
+                    example = torch.zeros(1, 3, self.input_size, self.input_size)
+                    with torch.no_grad():
+                        traced = torch.jit.freeze(torch.jit.trace(self.model, example).eval())
+                    self._traced = {os.getpid(): traced}
+        return traced(x)
+
+
+def parse_variant(variant):
+    """ "int8,channels_last" -> {"int8", "channels_last"} (dengan validasi)"""
+    options = {opt.strip().lower() for opt in (variant or "fp32").split(",") if opt.strip()}
+    unknown = options - set(VARIANT_OPTIONS)
+    if unknown:
+        raise ValueError(
+            f"❌ Varian model tidak dikenal: {sorted(unknown)}. "
+            f"Pilihan: {list(VARIANT_OPTIONS)}"
+        )
+    if "script" in options and "compile" in options:
+        raise ValueError("❌ Varian 'script' dan 'compile' tidak bisa digabung")
+    return options
+
+
+def optimize_model(model, variant="fp32", input_size=224, defer_trace=False):
+    """
+    Buat varian model yang dioptimasi untuk CPU
+
+    Args:
+        model: model PyTorch fp32
+        variant: string opsi dipisah koma (lihat VARIANT_OPTIONS)
+        input_size: ukuran input untuk tracing (script)
+        defer_trace: trace varian script saat forward pertama, bukan
+            sekarang (master pre-fork, lihat DeferredTrace)
+
+    Returns:
+        model baru dalam eval mode (model asli tidak diubah bila
+        varian != fp32)
+    """
+    options = parse_variant(variant)
+    model.eval()
+    if options <= {"fp32"}:
+        return model
+
+    model = copy.deepcopy(model)
+
+    if "int8" in options:
+        model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+    if "channels_last" in options:
+        model = ChannelsLastInput(model.to(memory_format=torch.channels_last)).eval()
+
+    if "script" in options and defer_trace:
+        model = DeferredTrace(model, input_size).eval()
+    elif "script" in options:
+        example = torch.zeros(1, 3, input_size, input_size)
+        with torch.no_grad():
+            model = torch.jit.freeze(torch.jit.trace(model, example).eval())
+    elif "compile" in options:
+        model = torch.compile(model)
+
+    return model
+
+
+# ====================================================
+#   PARITY + SPEEDUP REPORT
+# ====================================================
+
+def load_inputs(image_dir, limit, size):
+    """
+    Input benchmark untuk CLI optimize / backends: image dari folder
+    (preprocessing sama dengan serving) atau input acak
+
+    Returns:
+        (batch tensor (N, 3, size, size), deskripsi sumber)
+    """
+    if image_dir:
+        from app.utils.preprocess import get_engine
+
+        engine = get_engine(size)
+        paths = []
+        for root, _, files in os.walk(image_dir):
+            paths.extend(
+                os.path.join(root, f) for f in sorted(files)
+                if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".bmp"))
+            )
+        paths = paths[:limit]
+        if paths:
+            batch = engine.new_batch(len(paths))
+            for i, path in enumerate(paths):
+                with open(path, "rb") as f:
+                    engine.prepare(f.read(), out=batch[i])
+            return batch, f"{len(paths)} images from {image_dir}"
+
+    generator = torch.Generator().manual_seed(0)
+    return torch.randn(limit, 3, size, size, generator=generator), f"{limit} random inputs"
+
+
+def time_forward(model, batch, iters, warmup=3):
+    """Median latency forward pass (ms) untuk satu batch, setelah warmup"""
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(batch)
+        timings = []
+        for _ in range(iters):
+            start = time.perf_counter()
+            model(batch)
+            timings.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(timings)
+
+
+def compare_variants(model, variants, inputs, batch_sizes=(1, 8), iters=20):
+    """
+    Bandingkan varian model terhadap baseline fp32
+
+    Returns:
+        list of dict per varian: top1_agreement, max_abs_prob_diff,
+        latency_ms per batch size dan speedup terhadap fp32
+    """
+    model.eval()
+    with torch.no_grad():
+        baseline_probs = torch.softmax(model(inputs), dim=1)
+    baseline_top1 = baseline_probs.argmax(dim=1)
+
+    baseline_latency = {
+        bs: time_forward(model, inputs[:bs].contiguous(), iters) for bs in batch_sizes
+    }
+
+    report = []
+    for variant in ["fp32"] + [v for v in variants if v != "fp32"]:
+        optimized = optimize_model(model, variant, input_size=inputs.shape[-1])
+        with torch.no_grad():
+            probs = torch.softmax(optimized(inputs), dim=1)
+
+        latency = (
+            baseline_latency if variant == "fp32" else
+            {bs: time_forward(optimized, inputs[:bs].contiguous(), iters) for bs in batch_sizes}
+        )
+        report.append({
+            "variant": variant,
+            "top1_agreement": float((probs.argmax(dim=1) == baseline_top1).float().mean()),
+            "max_abs_prob_diff": float((probs - baseline_probs).abs().max()),
+            "latency_ms": {str(bs): round(ms, 3) for bs, ms in latency.items()},
+            "speedup": {
+                str(bs): round(baseline_latency[bs] / ms, 3) for bs, ms in latency.items()
+            },
+        })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laporan akurasi + speedup varian model CPU")
+    parser.add_argument("--model", default="full", help="full (huruf) atau words (kata)")
+    parser.add_argument("--variants", nargs="+", default=["int8", "channels_last", "script", "int8,script"])
+    parser.add_argument("--images", help="folder image untuk parity (default: input acak)")
+    parser.add_argument("--limit", type=int, default=32, help="jumlah input parity")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--json", help="simpan laporan ke file JSON")
+    args = parser.parse_args(argv)
+
+    from app.utils.predict_utils import load_models
+
+    models, _, _ = load_models()
+    if args.model not in models:
+        print(f"❌ Model '{args.model}' tidak tersedia: {list(models)}")
+        return 1
+
+    limit = max(args.limit, max(args.batch_sizes))
+    inputs, source = load_inputs(args.images, limit, 224)
+    print(f"\n📊 Model '{args.model}' - parity on {source}")
+
+    report = compare_variants(models[args.model], args.variants, inputs, args.batch_sizes, args.iters)
+
+    print("-" * 78)
+    print(f"{'variant':24s} {'top1 agree':>10s} {'max |dp|':>10s}  latency ms (speedup) per batch")
+    print("-" * 78)
+    for row in report:
+        timings = "  ".join(
+            f"bs{bs}: {ms:7.2f} ({row['speedup'][bs]:.2f}x)" for bs, ms in row["latency_ms"].items()
+        )
+        print(f"{row['variant']:24s} {row['top1_agreement']*100:9.1f}% {row['max_abs_prob_diff']:10.5f}  {timings}")
+    print("-" * 78)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": args.model, "inputs": source, "variants": report}, f, indent=2)
+        print(f"💾 Report saved: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
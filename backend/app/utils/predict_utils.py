@@ -1,6 +1,9 @@
 # ====================================================
 #   DUMMY FUNCTIONS AGAR PICKLE TIDAK ERROR
 # ====================================================
+#
+# Hanya dibutuhkan untuk file pickle lama (alexnet_best_*.pth berisi seluruh
+# nn.Module). File weights-only (*.weights.pt) tidak butuh shim ini.
 
 def auto_contrast(x=None, *args, **kwargs):
     return x
@@ -17,25 +20,35 @@ def resize_image(x=None, *args, **kwargs):
 def filter_null(x=None, *args, **kwargs):
     return x
 
-# ==== FIX UTAMA: MASUKKAN FUNGSI DUMMY KE __main__ ====
-import sys
-sys.modules['__main__'].auto_contrast = auto_contrast
-sys.modules['__main__'].auto_orient = auto_orient
-sys.modules['__main__'].dynamic_crop = dynamic_crop
-sys.modules['__main__'].resize_image = resize_image
-sys.modules['__main__'].filter_null = filter_null
+
+def install_pickle_shim():
+    """FIX UTAMA: MASUKKAN FUNGSI DUMMY KE __main__ (sebelum unpickle file lama)"""
+    import sys
+    sys.modules['__main__'].auto_contrast = auto_contrast
+    sys.modules['__main__'].auto_orient = auto_orient
+    sys.modules['__main__'].dynamic_crop = dynamic_crop
+    sys.modules['__main__'].resize_image = resize_image
+    sys.modules['__main__'].filter_null = filter_null
 
 
 # ====================================================
 #   IMPORTS
 # ====================================================
 
-import io
+import logging
 import os
 import pickle
+import time
 import torch
-import torch.nn.functional as F
-from PIL import Image
+
+from app import config
+from app.utils import metrics
+from app.utils.logging_utils import get_logger
+from app.utils.model_store import load_weights, weights_path_for
+from app.utils.preprocess import RawFrame, get_engine
+
+
+logger = get_logger("predict")
 
 
 # ====================================================
@@ -70,7 +83,7 @@ LABELS_KATA = [
 # ====================================================
 
 ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-MODELS_DIR = os.path.join(ROOT, "app", "models")
+MODELS_DIR = config.MODELS_DIR or os.path.join(ROOT, "app", "models")
 
 
 # ====================================================
@@ -78,16 +91,49 @@ MODELS_DIR = os.path.join(ROOT, "app", "models")
 # ====================================================
 
 def try_torch_load(path):
-    """Load PyTorch model dengan error handling"""
+    """Load PyTorch model (pickle lama) dengan error handling"""
+    install_pickle_shim()
     try:
         return torch.load(path, map_location="cpu", weights_only=False)
     except Exception as e:
         raise RuntimeError(f"❌ Gagal memuat model {path}: {e}")
 
 
-def load_models():
+def load_model_file(path):
+    """
+    Load satu model, utamakan file weights-only (mmap) bila tersedia
+
+    Returns:
+        (model, source) atau (None, None) bila file tidak ditemukan
+    """
+    weights = weights_path_for(path)
+    if os.path.exists(weights):
+        try:
+            return load_weights(weights), "weights-only"
+        except Exception as e:
+            raise RuntimeError(f"❌ Gagal memuat model {weights}: {e}")
+    if os.path.exists(path):
+        return try_torch_load(path), "legacy pickle"
+    return None, None
+
+
+def model_path(model_name):
+    """Path file model default untuk "full" / "words" di MODELS_DIR"""
+    return os.path.join(MODELS_DIR, f"alexnet_best_{model_name}.pth")
+
+
+# Waktu load per model dari pemanggilan load_models() terakhir
+load_timings = {}
+
+
+def load_models(backends=False):
     """
     Load model huruf dan kata dengan label mapping yang benar
+
+    Args:
+        backends: bungkus model dengan engine inference yang dikonfigurasi
+            (TEMANISYARAT_INFERENCE_BACKEND, lihat backends.py); False =
+            nn.Module fp32 apa adanya (untuk tooling export / optimasi)
     
     Returns:
         models: dict berisi model {'full': model_huruf, 'words': model_kata}
@@ -97,31 +143,49 @@ def load_models():
     models = {}
     labels_map = {}
 
-    full_path = os.path.join(MODELS_DIR, "alexnet_best_full.pth")
-    words_path = os.path.join(MODELS_DIR, "alexnet_best_words.pth")
+    full_path = model_path("full")
+    words_path = model_path("words")
 
     # Load model huruf (A-Z)
-    if os.path.exists(full_path):
-        models["full"] = try_torch_load(full_path)
+    started = time.perf_counter()
+    model, source = load_model_file(full_path)
+    if model is not None:
+        models["full"] = model
         labels_map["full"] = LABELS_HURUF
-        print(f"✅ Model HURUF loaded: {len(LABELS_HURUF)} classes (A-Z)")
+        load_timings["full"] = time.perf_counter() - started
+        print(f"✅ Model HURUF loaded ({source}, {load_timings['full']:.2f}s): {len(LABELS_HURUF)} classes (A-Z)")
     else:
         print(f"⚠️ Model huruf tidak ditemukan: {full_path}")
 
     # Load model kata (104 kata SIBI)
-    if os.path.exists(words_path):
-        models["words"] = try_torch_load(words_path)
+    started = time.perf_counter()
+    model, source = load_model_file(words_path)
+    if model is not None:
+        models["words"] = model
         labels_map["words"] = LABELS_KATA
-        print(f"✅ Model KATA loaded: {len(LABELS_KATA)} classes")
+        load_timings["words"] = time.perf_counter() - started
+        print(f"✅ Model KATA loaded ({source}, {load_timings['words']:.2f}s): {len(LABELS_KATA)} classes")
     else:
         print(f"⚠️ Model kata tidak ditemukan: {words_path}")
 
+    if backends:
+        from app.utils.backends import create_backend
+
+        for name, model in models.items():
+            models[name] = create_backend(model, name, model_path(name))
+            print(f"⚙️ Model '{name}' engine: {models[name].describe()}")
+
+    # Pipeline lama tidak dipakai untuk inference; hanya dimuat bila diminta
+    if not config.LOAD_LEGACY_PIPELINE:
+        return models, None, labels_map
+
     # Fallback: coba load preprocessing pipeline (legacy support)
     pipeline_local = None
     prep2 = os.path.join(MODELS_DIR, "preprocess_pipeline.pkl")
     prep1 = os.path.join(MODELS_DIR, "preprocessing.pkl")
     
     if os.path.exists(prep2):
+        install_pickle_shim()
         try:
             with open(prep2, "rb") as f:
                 pipeline_local = pickle.load(f)
@@ -129,6 +193,7 @@ def load_models():
         except Exception as e:
             print(f"⚠️ Gagal load pipeline: {e}")
     elif os.path.exists(prep1):
+        install_pickle_shim()
         try:
             with open(prep1, "rb") as f:
                 pipeline_local = pickle.load(f)
@@ -143,33 +208,44 @@ def load_models():
 #   IMAGE PREPARATION
 # ====================================================
 
-def prepare_image(image_bytes, size=224):
+def prepare_image(image_bytes, size=224, model_name="shared"):
     """
     Preprocess image untuk model AlexNet
     
     Args:
-        image_bytes: bytes dari image
+        image_bytes: bytes dari image, atau RawFrame (tanpa decode)
         size: ukuran target (default 224x224 untuk AlexNet)
+        model_name: label model untuk metrics stage decode/transform
     
     Returns:
         tensor: torch.Tensor siap untuk inference
     """
-    from torchvision import transforms
-
-    # Load image dan convert ke RGB
-    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-
-    # Transform standar ImageNet (digunakan AlexNet)
-    transform = transforms.Compose([
-        transforms.Resize((size, size)),
-        transforms.ToTensor(),
-        transforms.Normalize(
-            mean=[0.485, 0.456, 0.406],  # ImageNet mean
-            std=[0.229, 0.224, 0.225]     # ImageNet std
-        )
-    ])
+    return prepare_into(image_bytes, size=size, model_name=model_name).unsqueeze(0)  # Add batch dimension
 
-    return transform(image).unsqueeze(0)  # Add batch dimension
+
+def prepare_into(image_bytes, out=None, size=224, model_name="shared"):
+    """
+    Decode + transform satu image ke tensor (3, size, size), opsional
+    langsung ke buffer `out` (misalnya satu baris tensor batch)
+    """
+    # Engine dibangun sekali (lihat app/utils/preprocess.py): JPEG draft
+    # decode + normalisasi ImageNet dalam satu operasi vektor
+    engine = get_engine(size)
+
+    started = time.perf_counter()
+    if isinstance(image_bytes, RawFrame):
+        # Raw frame: tidak ada decode, pixel langsung dari buffer request
+        tensor = engine.from_raw(image_bytes, out=out)
+        metrics.observe_stage("transform", model_name, time.perf_counter() - started)
+        return tensor
+
+    image = engine.decode(image_bytes)
+    decoded = time.perf_counter()
+    tensor = engine.to_tensor(image, out=out)
+
+    metrics.observe_stage("decode", model_name, decoded - started)
+    metrics.observe_stage("transform", model_name, time.perf_counter() - decoded)
+    return tensor
 
 
 # ====================================================
@@ -182,7 +258,7 @@ def predict_from_image(image_bytes, models, pipeline, labels_map, model_name="fu
     
     Args:
         image_bytes: bytes dari image
-        models: dict berisi model
+        models: dict berisi model (nn.Module atau InferenceBackend)
         pipeline: preprocessing pipeline (tidak digunakan, untuk backward compatibility)
         labels_map: dict mapping model_name -> list of labels
         model_name: "full" untuk huruf (A-Z), "words" untuk kata (104 kata)
@@ -214,51 +290,102 @@ def predict_from_image(image_bytes, models, pipeline, labels_map, model_name="fu
     model = models[model_name]
     labels = labels_map[model_name]
     
-    print(f"\n{'='*50}")
-    print(f"🔍 Melakukan deteksi dengan model: {model_name.upper()}")
-    print(f"📊 Total classes: {len(labels)}")
-    print(f"{'='*50}")
+    logger.debug("Melakukan deteksi", extra={"fields": {"model": model_name, "classes": len(labels)}})
     
     # Set model ke eval mode
     model.eval()
 
     # Preprocess image
-    tensor = prepare_image(image_bytes)
-    print(f"✅ Image preprocessed: shape {tensor.shape}")
+    tensor = prepare_image(image_bytes, model_name=model_name)
+    logger.debug("Image preprocessed", extra={"fields": {"shape": list(tensor.shape)}})
+
+    return predict_batch(model, tensor, labels, model_name, [top_k])[0]
+
 
+def predict_batch(model, batch, labels, model_name, top_ks):
+    """
+    Jalankan satu forward pass untuk satu batch tensor
+
+    Args:
+        model: model PyTorch (sudah dalam eval mode) atau InferenceBackend
+        batch: torch.Tensor dengan shape (N, 3, H, W)
+        labels: list of labels untuk model ini
+        model_name: nama model ("full" atau "words")
+        top_ks: list berisi top_k untuk masing-masing baris batch
+
+    Returns:
+        list of dict: satu hasil prediksi per baris batch (format sama
+        dengan predict_from_image)
+    """
     # Inference
+    started = time.perf_counter()
     with torch.no_grad():
-        outputs = model(tensor)
-        probs = F.softmax(outputs, dim=1).squeeze(0).cpu().numpy()
+        outputs = model(batch)
+    metrics.observe_stage("forward", model_name, time.perf_counter() - started)
+
+    return results_from_logits(outputs, labels, model_name, top_ks)
+
+
+def results_from_logits(outputs, labels, model_name, top_ks):
+    """
+    Hasil prediksi per baris dari logits satu batch (lihat predict_batch)
+
+    Returns:
+        list of dict: satu hasil prediksi per baris batch
+    """
+    started = time.perf_counter()
 
     # Validasi output model sesuai dengan jumlah label
-    if len(probs) != len(labels):
-        print(f"\n⚠️  WARNING: MISMATCH DETECTED!")
-        print(f"   Model output: {len(probs)} classes")
-        print(f"   Label mapping: {len(labels)} classes")
-        print(f"   Pastikan model di-train dengan {len(labels)} classes!")
-        print(f"{'='*50}\n")
+    num_outputs = outputs.shape[1]
+    if num_outputs != len(labels):
+        logger.warning(
+            "MISMATCH DETECTED: pastikan model di-train dengan jumlah classes yang sama dengan label mapping",
+            extra={"fields": {"model": model_name, "model_output": num_outputs, "labels": len(labels)}},
+        )
+
+    # Top-k langsung dari logits (tanpa softmax penuh + argsort di NumPy):
+    # confidence = exp(logit - logsumexp(logits)) hanya untuk k teratas
+    k = min(max(top_ks), num_outputs)
+    with torch.no_grad():
+        outputs = outputs.float()
+        values, indices = outputs.topk(k, dim=1)
+        confidences = (values - outputs.logsumexp(dim=1, keepdim=True)).exp_().mul_(100.0)
+
+    results = [
+        build_result(row_conf[:top_k], row_idx[:top_k], labels, model_name)
+        for row_conf, row_idx, top_k in zip(confidences.tolist(), indices.tolist(), top_ks)
+    ]
+
+    metrics.observe_stage("topk", model_name, time.perf_counter() - started)
+    metrics.BATCH_SIZE.labels(model_name).observe(len(top_ks))
+    return results
+
 
-    # Get top-k predictions
-    top_idx = probs.argsort()[-top_k:][::-1]
+def build_result(confidences, indices, labels, model_name):
+    """
+    Susun dict hasil prediksi dari top-k satu baris
+
+    Args:
+        confidences: list confidence (0-100), urut menurun
+        indices: list index class yang sesuai dengan confidences
+        labels: list of labels untuk model ini
+        model_name: nama model yang digunakan
 
+    Returns:
+        dict: hasil prediksi (lihat predict_from_image)
+    """
     results = []
-    print(f"\n📈 Top-{top_k} Predictions:")
-    print("-" * 50)
-    
-    for rank, idx in enumerate(top_idx, 1):
+    for idx, confidence in zip(indices, confidences):
         if idx < len(labels):
-            label = labels[idx]
-            confidence = float(probs[idx] * 100)
             results.append({
-                "letter": label,
+                "letter": labels[idx],
                 "confidence": confidence
             })
-            print(f"  {rank}. {label:15s} → {confidence:5.2f}%")
         else:
-            print(f"  {rank}. Index {idx} out of range (max: {len(labels)-1})")
-
-    print("-" * 50)
+            logger.warning(
+                "Index out of range",
+                extra={"fields": {"model": model_name, "index": idx, "max": len(labels) - 1}},
+            )
 
     if not results:
         raise ValueError("❌ Tidak ada hasil prediksi yang valid")
@@ -271,8 +398,11 @@ def predict_from_image(image_bytes, models, pipeline, labels_map, model_name="fu
         "model_used": model_name,
         "total_classes": len(labels)
     }
-    
-    print(f"\n✅ HASIL AKHIR: {result['prediction']} ({result['confidence']:.2f}%)")
-    print(f"{'='*50}\n")
-    
-    return result
\ No newline at end of file
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Top-k predictions", extra={"fields": {
+            "model": model_name,
+            "top_k": [(r["letter"], round(r["confidence"], 2)) for r in results],
+        }})
+
+    return result
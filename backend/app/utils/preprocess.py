@@ -0,0 +1,280 @@
+# ====================================================
+#   FAST IMAGE PREPROCESSING ENGINE
+# ====================================================
+#
+# Pengganti transforms.Compose yang dibangun ulang di setiap request:
+#   1. JPEG di-decode langsung mendekati ukuran target (PIL draft mode,
+#      scaling DCT 1/2, 1/4, 1/8) sehingga frame kamera 1280x720 tidak
+#      perlu di-decode penuh sebelum di-resize ke 224x224.
+#   2. Resize bilinear (sama dengan transforms.Resize untuk PIL image).
+#   3. ToTensor + Normalize digabung menjadi satu operasi vektor
+#      uint8 -> float: x * (1 / (255 * std)) - mean / std, ditulis
+#      langsung ke buffer tujuan (misalnya satu baris tensor batch).
+#   4. Raw frame (RawFrame): buffer RGB/RGBA uint8 yang sudah di-resize
+#      client dibungkus zero-copy (torch.frombuffer), tanpa PIL dan codec.
+
+import io
+import sys
+import warnings
+
+import numpy as np
+import torch
+from PIL import Image
+
+from app import config
+
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+# Array dari PIL bersifat read-only; tensor hasil from_numpy hanya dibaca
+# (copy_ ke buffer tujuan), jadi warning ini aman diabaikan
+warnings.filterwarnings("ignore", message="The given NumPy array is not writable")
+warnings.filterwarnings("ignore", message="The given buffer is not writable")
+
+
+# ====================================================
+#   RAW FRAME INPUT
+# ====================================================
+
+RAW_FORMATS = {"rgb": 3, "rgba": 4}
+
+# Max abs diff yang diizinkan antara engine (tanpa draft) dan transform torchvision lama
+PARITY_TOLERANCE = 1e-4
+
+
+class RawFrame:
+    """
+    Frame mentah uint8 (HxWx3 RGB atau HxWx4 RGBA, row-major) dari client
+
+    Args:
+        data: bytes / bytearray / memoryview pixel
+        width, height: dimensi frame
+        channels: 3 (RGB) atau 4 (RGBA); ditebak dari panjang data bila None
+    """
+
+    __slots__ = ("data", "width", "height", "channels")
+
+    def __init__(self, data, width, height, channels=None):
+        width, height = int(width), int(height)
+        if width <= 0 or height <= 0:
+            raise ValueError("Dimensi raw frame harus > 0")
+        if channels is None:
+            channels = len(data) // (width * height) if len(data) % (width * height) == 0 else 0
+        if channels not in (3, 4):
+            raise ValueError("Raw frame harus RGB (3 channel) atau RGBA (4 channel) uint8")
+        if len(data) != width * height * channels:
+            raise ValueError(
+                f"Ukuran raw frame {len(data)} bytes tidak sesuai {width}x{height}x{channels}"
+            )
+
+        self.data = data
+        self.width = width
+        self.height = height
+        self.channels = channels
+
+    def __len__(self):
+        return len(self.data)
+
+    def pixels(self):
+        """Tensor uint8 (3, H, W) yang berbagi memori dengan data (tanpa copy)"""
+        hwc = torch.frombuffer(self.data, dtype=torch.uint8).view(self.height, self.width, self.channels)
+        return hwc[..., :3].permute(2, 0, 1)
+
+    def to_image(self):
+        """PIL image RGB (hanya untuk hashing / thumbnail, bukan jalur inference)"""
+        array = np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.width, self.channels)
+        return Image.fromarray(np.ascontiguousarray(array[..., :3]), "RGB")
+
+
+def raw_frame_from_headers(data, headers, size=None):
+    """
+    Bangun RawFrame dari body application/octet-stream + header
+    X-Frame-Width, X-Frame-Height dan X-Frame-Format (rgb / rgba, opsional)
+
+    Args:
+        size: bila diisi, frame wajib berukuran size x size (input model)
+
+    Raises:
+        ValueError: header tidak lengkap atau ukuran tidak sesuai
+    """
+    try:
+        width = int(headers.get("x-frame-width", ""))
+        height = int(headers.get("x-frame-height", ""))
+    except ValueError:
+        raise ValueError("Header X-Frame-Width dan X-Frame-Height wajib diisi (integer)")
+
+    fmt = headers.get("x-frame-format")
+    channels = None
+    if fmt:
+        channels = RAW_FORMATS.get(fmt.lower())
+        if channels is None:
+            raise ValueError(f"X-Frame-Format '{fmt}' tidak dikenal. Gunakan {list(RAW_FORMATS)}")
+
+    if size is not None and (width, height) != (size, size):
+        raise ValueError(f"Raw frame harus berukuran {size}x{size}, diterima {width}x{height}")
+    return RawFrame(data, width, height, channels)
+
+
+def open_image(image):
+    """bytes atau RawFrame -> PIL image (lazy untuk bytes, format asli tetap terbaca)"""
+    if isinstance(image, RawFrame):
+        return image.to_image()
+    return Image.open(io.BytesIO(image))
+
+
+class PreprocessEngine:
+    """
+    Engine preprocessing yang dibangun sekali dan dipakai ulang
+
+    Args:
+        size: ukuran sisi output (224 untuk AlexNet)
+        mean, std: normalisasi per channel (default ImageNet)
+        draft: gunakan reduced-scale JPEG decoding
+    """
+
+    def __init__(self, size=224, mean=IMAGENET_MEAN, std=IMAGENET_STD, draft=True):
+        self.size = int(size)
+        self.draft = draft
+
+        mean = torch.tensor(mean, dtype=torch.float32).view(3, 1, 1)
+        std = torch.tensor(std, dtype=torch.float32).view(3, 1, 1)
+        self._scale = 1.0 / (255.0 * std)
+        self._shift = mean / std
+
+    # ------------------------------------------------
+    #   STAGES
+    # ------------------------------------------------
+
+    def decode(self, image_bytes):
+        """Decode bytes menjadi PIL image RGB berukuran size x size"""
+        image = Image.open(io.BytesIO(image_bytes))
+
+        if self.draft and image.format == "JPEG":
+            # Decoder memilih skala terkecil yang masih >= ukuran target
+            image.draft("RGB", (self.size, self.size))
+
+        return self.fit(image)
+
+    def fit(self, image):
+        """PIL image apapun -> RGB size x size (dipakai juga untuk frame video)"""
+        image = image.convert("RGB")
+        if image.size != (self.size, self.size):
+            image = image.resize((self.size, self.size), Image.BILINEAR)
+        return image
+
+    def to_tensor(self, image, out=None):
+        """
+        Konversi image RGB (PIL atau array HxWx3 uint8) ke tensor ternormalisasi
+
+        Args:
+            image: PIL image atau numpy array uint8 HxWx3
+            out: tensor float32 (3, size, size) tujuan; dialokasikan bila None
+
+        Returns:
+            torch.Tensor (3, size, size)
+        """
+        array = np.asarray(image)
+        return self._normalize(torch.from_numpy(array).permute(2, 0, 1), out)
+
+    def from_raw(self, frame, out=None):
+        """
+        RawFrame berukuran size x size -> tensor ternormalisasi (3, size, size)
+
+        Pixel dibaca langsung dari buffer request; satu-satunya copy adalah
+        konversi uint8 -> float ke buffer tujuan.
+        """
+        if (frame.width, frame.height) != (self.size, self.size):
+            raise ValueError(
+                f"Raw frame harus berukuran {self.size}x{self.size}, "
+                f"diterima {frame.width}x{frame.height}"
+            )
+        return self._normalize(frame.pixels(), out)
+
+    def _normalize(self, pixels, out=None):
+        """uint8 (3, size, size) -> float32 ternormalisasi di `out`"""
+        if out is None:
+            out = torch.empty((3, self.size, self.size), dtype=torch.float32)
+
+        out.copy_(pixels)
+        out.mul_(self._scale).sub_(self._shift)
+        return out
+
+    # ------------------------------------------------
+    #   PUBLIC API
+    # ------------------------------------------------
+
+    def prepare(self, image_bytes, out=None):
+        """bytes / RawFrame -> tensor (3, size, size), opsional langsung ke buffer `out`"""
+        if isinstance(image_bytes, RawFrame):
+            return self.from_raw(image_bytes, out=out)
+        return self.to_tensor(self.decode(image_bytes), out=out)
+
+    def new_batch(self, n):
+        """Alokasikan buffer batch (n, 3, size, size) untuk diisi prepare(out=...)"""
+        return torch.empty((n, 3, self.size, self.size), dtype=torch.float32)
+
+    def prepare_batch(self, images):
+        """list of bytes -> tensor batch (N, 3, size, size)"""
+        batch = self.new_batch(len(images))
+        for i, image_bytes in enumerate(images):
+            self.prepare(image_bytes, out=batch[i])
+        return batch
+
+
+_engines = {}
+
+
+def get_engine(size=224):
+    """Engine bersama per ukuran output (dibuat sekali)"""
+    engine = _engines.get(size)
+    if engine is None:
+        engine = _engines[size] = PreprocessEngine(size=size, draft=config.PREPROCESS_JPEG_DRAFT)
+    return engine
+
+
+# ====================================================
+#   PARITY CHECK
+# ====================================================
+
+def reference_transform(image_bytes, size=224):
+    """Transform torchvision lama (acuan untuk parity check)"""
+    from torchvision import transforms
+
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    transform = transforms.Compose([
+        transforms.Resize((size, size)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=list(IMAGENET_MEAN), std=list(IMAGENET_STD)),
+    ])
+    return transform(image)
+
+
+def parity_check(image_bytes, size=224):
+    """
+    Bandingkan engine dengan transform torchvision lama
+
+    Returns:
+        dict: max abs diff tanpa draft (harus ~1e-6) dan dengan draft
+        (berbeda sedikit karena decode di resolusi lebih rendah)
+    """
+    reference = reference_transform(image_bytes, size)
+    exact = PreprocessEngine(size=size, draft=False).prepare(image_bytes)
+    drafted = PreprocessEngine(size=size, draft=True).prepare(image_bytes)
+    return {
+        "max_abs_diff": float((exact - reference).abs().max()),
+        "max_abs_diff_draft": float((drafted - reference).abs().max()),
+        "mean_abs_diff_draft": float((drafted - reference).abs().mean()),
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python -m app.utils.preprocess image1.jpg [image2.jpg ...]
+    failed = False
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            report = parity_check(f.read())
+        ok = report["max_abs_diff"] < PARITY_TOLERANCE
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} {path}: {report}")
+    sys.exit(1 if failed else 0)
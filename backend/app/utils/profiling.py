@@ -0,0 +1,68 @@
+# ====================================================
+#   OPT-IN PROFILING
+# ====================================================
+#
+# Profiling inference per request, diaktifkan lewat:
+#   - header "X-Profile: 1" (hanya bila TEMANISYARAT_PROFILE_ALLOW_HEADER=1)
+#   - sampling global TEMANISYARAT_PROFILE_SAMPLE_RATE (0.0 - 1.0)
+#
+# Request yang di-profile dijalankan di luar batch scheduler (batch sendiri)
+# supaya trace hanya berisi kerja request tersebut. Trace ditulis ke
+# TEMANISYARAT_PROFILE_DIR:
+#   torch    -> <request_id>-<label>.trace.json (chrome://tracing / Perfetto)
+#   cprofile -> <request_id>-<label>.prof       (snakeviz / pstats)
+
+import cProfile
+import os
+import random
+import re
+
+import torch
+
+from app import config
+
+
+PROFILE_HEADER = "x-profile"
+
+
+def should_profile(headers):
+    """Tentukan apakah request ini di-profile"""
+    if config.PROFILE_ALLOW_HEADER and headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    rate = config.PROFILE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def trace_path(request_id, label, mode=None):
+    mode = mode or config.PROFILE_MODE
+    # request_id bisa datang dari client (X-Request-ID): jangan biarkan jadi path
+    request_id = re.sub(r"[^A-Za-z0-9_-]", "_", request_id) or "request"
+    suffix = ".trace.json" if mode == "torch" else ".prof"
+    return os.path.join(config.PROFILE_DIR, f"{request_id}-{label}{suffix}")
+
+
+def run_profiled(fn, request_id, label, *args, mode=None, **kwargs):
+    """
+    Jalankan fn(*args, **kwargs) di bawah profiler dan simpan trace ke disk
+
+    Returns:
+        (hasil fn, path trace)
+    """
+    mode = mode or config.PROFILE_MODE
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    path = trace_path(request_id, label, mode)
+
+    if mode == "torch":
+        with torch.profiler.profile(
+            activities=[torch.profiler.ProfilerActivity.CPU],
+            record_shapes=True,
+        ) as prof:
+            with torch.profiler.record_function(f"inference:{label}"):
+                result = fn(*args, **kwargs)
+        prof.export_chrome_trace(path)
+    else:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(fn, *args, **kwargs)
+        profiler.dump_stats(path)
+
+    return result, path
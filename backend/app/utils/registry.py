@@ -0,0 +1,626 @@
+# ====================================================
+#   MODEL REGISTRY
+# ====================================================
+#
+# Model ditemukan dari folder model (TEMANISYARAT_MODELS_DIR):
+#
+#   alexnet_best_full.pth / .weights.pt     -> full@v0  (label LABELS_HURUF)
+#   alexnet_best_words.pth / .weights.pt    -> words@v0 (label LABELS_KATA)
+#   <name>/<version>/model.weights.pt       -> <name>@<version> (atau model.pth)
+#   <name>/<version>/labels.json            -> ["A", "B", ...] atau {"labels": [...]}
+#
+# Per model ada satu versi aktif (versi terbaru, atau dipin lewat
+# TEMANISYARAT_MODEL_VERSION_<NAME>). Versi baru dimuat + di-warmup di
+# background lalu pointer versi aktif ditukar sekali assignment, jadi
+# request yang sedang berjalan tetap selesai di versi lama. A/B routing:
+# TEMANISYARAT_MODEL_SPLIT_<NAME>="v1:90,v2:10" (sticky per session).
+#
+# Versi yang tidak aktif dan idle lebih dari TEMANISYARAT_REGISTRY_IDLE_TTL_S
+# di-evict (scheduler dihentikan, weights dilepas); jumlah versi non-aktif
+# yang dimuat dibatasi TEMANISYARAT_REGISTRY_MAX_LOADED.
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import torch
+
+from app import config
+from app.utils import predict_utils
+from app.utils.cascade import build_first_stage, make_cascade
+from app.utils.batching import BatchScheduler
+from app.utils.logging_utils import get_logger
+from app.utils.model_store import warmup_model
+from app.utils.backends import create_backend
+from app.utils.embeddings import CustomSigns, Embedder, signs_path
+from app.utils.responses import label_table
+
+
+logger = get_logger("registry")
+
+LEGACY_VERSION = "v0"
+
+# Nama model -> (file lama, label bawaan)
+LEGACY_MODELS = {
+    "full": ("alexnet_best_full.pth", predict_utils.LABELS_HURUF),
+    "words": ("alexnet_best_words.pth", predict_utils.LABELS_KATA),
+}
+
+LABELS_MANIFEST = "labels.json"
+
+
+def version_key(version):
+    """Urutan natural: v2 < v10, 2024-01-02 < 2024-01-10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", version)]
+
+
+def parse_split(spec):
+    """ "v1:90,v2:10" -> [("v1", 90.0), ("v2", 10.0)] """
+    split = []
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        version, _, weight = item.partition(":")
+        split.append((version.strip(), float(weight) if weight.strip() else 1.0))
+    if any(weight < 0 for _, weight in split) or (split and sum(w for _, w in split) <= 0):
+        raise ValueError(f"❌ Split A/B tidak valid: {spec!r}")
+    return split
+
+
+def read_labels(path):
+    """Baca labels.json (list, atau object dengan key "labels")"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    labels = data.get("labels") if isinstance(data, dict) else data
+    if not isinstance(labels, list) or not labels:
+        raise ValueError(f"❌ Manifest label tidak valid: {path}")
+    return [str(label) for label in labels]
+
+
+class ModelVersion:
+    """Satu versi model di registry beserta state load-nya"""
+
+    def __init__(self, name, version, path, labels_path=None, labels=None):
+        self.name = name
+        self.version = version
+        self.path = path
+        self.labels_path = labels_path
+        self.labels = labels
+
+        self.model = None          # InferenceBackend (lihat backends.py)
+        self.backend = None
+        self.scheduler = None
+        self.fast_model = None     # first stage cascade (None = cascade nonaktif)
+        self.fast_kind = None
+        self.cascade = None
+        self.signs = None          # CustomSigns (None = kNN nonaktif)
+        self.state = "available"   # available -> loading -> loaded -> ready | failed | evicted
+        self.error = None
+        self.warmed = False
+        self.load_s = None
+        self.warmup_s = None
+        self.loaded_at = None
+        self.last_used = 0.0
+        self.requests = 0
+        self.inflight = 0
+
+        self._lock = threading.Lock()
+        self._task = None
+
+    @property
+    def key(self):
+        return f"{self.name}@{self.version}"
+
+    def info(self):
+        return {
+            "version": self.version,
+            "state": self.state,
+            "error": self.error,
+            "path": self.path,
+            "backend": self.backend,
+            "classes": len(self.labels) if self.labels else None,
+            "label_table": label_table(self.labels)[0] if self.labels else None,
+            "load_s": self.load_s,
+            "warmup_s": self.warmup_s,
+            "idle_s": round(time.monotonic() - self.last_used, 1) if self.last_used else None,
+            "requests": self.requests,
+            "inflight": self.inflight,
+            "cascade": self.cascade.stats() if self.cascade is not None else None,
+            "signs": self.signs.stats() if self.signs is not None else None,
+        }
+
+
+def discover(models_dir):
+    """
+    Scan folder model
+
+    Returns:
+        dict: name -> {version: ModelVersion}
+    """
+    found = {}
+
+    for name, (filename, labels) in LEGACY_MODELS.items():
+        path = os.path.join(models_dir, filename)
+        weights = predict_utils.weights_path_for(path)
+        if os.path.exists(weights) or os.path.exists(path):
+            found.setdefault(name, {})[LEGACY_VERSION] = ModelVersion(
+                name, LEGACY_VERSION, path, labels=list(labels)
+            )
+
+    if not os.path.isdir(models_dir):
+        return found
+
+    for name in sorted(os.listdir(models_dir)):
+        model_dir = os.path.join(models_dir, name)
+        if not os.path.isdir(model_dir) or name.startswith((".", "_")):
+            continue
+        for version in sorted(os.listdir(model_dir)):
+            version_dir = os.path.join(model_dir, version)
+            labels_path = os.path.join(version_dir, LABELS_MANIFEST)
+            if not os.path.isfile(labels_path):
+                continue
+            path = os.path.join(version_dir, "model.pth")
+            if not (os.path.exists(path) or os.path.exists(predict_utils.weights_path_for(path))):
+                continue
+            found.setdefault(name, {})[version] = ModelVersion(
+                name, version, path, labels_path=labels_path
+            )
+
+    return found
+
+
+class ModelRegistry:
+    """
+    Registry model + versi, dengan hot-swap dan idle eviction
+
+    Dict `models`, `labels` dan `schedulers` selalu berisi versi AKTIF per
+    nama model dan diperbarui di tempat saat swap, sehingga kode lama yang
+    memakai models[name] tetap bekerja.
+
+    Args:
+        models_dir: folder model (None = predict_utils.MODELS_DIR saat scan)
+        executor: InferenceExecutor untuk batch scheduler
+        idle_ttl_s: evict versi non-aktif yang idle selama ini (0 = tidak pernah)
+        max_loaded: jumlah maksimum versi non-aktif yang dimuat (0 = tanpa batas)
+    """
+
+    def __init__(self, models_dir=None, executor=None, idle_ttl_s=600.0, max_loaded=0):
+        self.models_dir = models_dir
+        self.executor = executor
+        self.idle_ttl_s = float(idle_ttl_s)
+        self.max_loaded = int(max_loaded)
+
+        self.models = {}
+        self.labels = {}
+        self.schedulers = {}
+
+        self._versions = {}
+        self._active = {}
+        self._splits = {}
+        self._scan_lock = threading.Lock()
+        self.swaps = 0
+        self.evictions = 0
+
+    # ------------------------------------------------
+    #   DISCOVERY
+    # ------------------------------------------------
+
+    def scan(self):
+        """
+        Scan ulang folder model; versi yang sudah dimuat tetap dipakai
+
+        Returns:
+            dict: name -> versi yang SEHARUSNYA aktif (pin atau terbaru)
+        """
+        models_dir = self.models_dir or predict_utils.MODELS_DIR
+        with self._scan_lock:
+            found = discover(models_dir)
+            for name, versions in found.items():
+                known = self._versions.setdefault(name, {})
+                for version, entry in versions.items():
+                    known.setdefault(version, entry)
+
+            targets = {}
+            for name, versions in self._versions.items():
+                target = self._target(name)
+                if target is not None:
+                    targets[name] = target
+
+                # Split dari env hanya dipakai sekali; set_split() saat runtime tidak ditimpa scan
+                if name not in self._splits:
+                    split = parse_split(config.per_model("MODEL_SPLIT", name, "", config.env_str))
+                    self._splits[name] = [(v, w) for v, w in split if v in versions]
+            return targets
+
+    def _target(self, name):
+        """Versi yang seharusnya aktif: pin env, atau versi terbaru yang tidak gagal"""
+        versions = self._versions.get(name) or {}
+        pinned = config.per_model("MODEL_VERSION", name, "", config.env_str)
+        if pinned:
+            if pinned in versions:
+                return pinned
+            logger.warning("Pinned version not found", extra={"fields": {"model": name, "version": pinned}})
+        healthy = [v for v, entry in versions.items() if entry.state != "failed"]
+        return max(healthy, key=version_key) if healthy else None
+
+    def names(self):
+        return list(self._active)
+
+    def get(self, name, version=None):
+        """ModelVersion untuk name@version (default versi aktif); KeyError bila tidak ada"""
+        versions = self._versions.get(name)
+        if not versions:
+            raise KeyError(f"Model '{name}' tidak tersedia")
+        version = version or self._active.get(name)
+        if version not in versions:
+            raise KeyError(f"Versi '{version}' untuk model '{name}' tidak tersedia")
+        return versions[version]
+
+    # ------------------------------------------------
+    #   LOADING
+    # ------------------------------------------------
+
+    def load_sync(self, entry, warmup=True, fork_safe=False):
+        """
+        Muat (+ optimasi varian CPU + warmup) satu versi di thread pemanggil
+
+        Label manifest divalidasi terhadap jumlah output model; versi yang
+        tidak cocok ditandai failed dan tidak pernah diaktifkan.
+
+        Args:
+            fork_safe: master pre-fork; tanpa forward pass (trace varian
+                script dan export ONNX ditunda ke worker)
+        """
+        with entry._lock:
+            try:
+                if entry.model is None:
+                    entry.state = "loading"
+                    started = time.perf_counter()
+                    if entry.labels is None:
+                        entry.labels = read_labels(entry.labels_path)
+                    model, _ = predict_utils.load_model_file(entry.path)
+                    if model is None:
+                        raise FileNotFoundError(f"❌ File model tidak ditemukan: {entry.path}")
+
+                    variant = config.model_variant(entry.name)
+                    entry.model = create_backend(
+                        model, entry.name, entry.path, variant=variant, fork_safe=fork_safe
+                    )
+                    entry.backend = entry.model.describe()
+
+                    cascade = config.cascade_settings(entry.name)
+                    if cascade is not None:
+                        entry.fast_model, entry.fast_kind = build_first_stage(
+                            entry.model, entry.path, cascade["input_size"], variant,
+                            defer_trace=fork_safe, model=model,
+                            resize_fallback=cascade["resize_fallback"],
+                        )
+                        if entry.fast_model is None:
+                            logger.warning(
+                                "Cascade disabled: no distilled first stage",
+                                extra={"fields": {"model": entry.key, "reason": entry.fast_kind}},
+                            )
+                            entry.fast_kind = None
+
+                    if config.knn_enabled(entry.name):
+                        # Embedding dari model fp32 asli (apa pun backend-nya),
+                        # supaya vektor di index konsisten antar varian
+                        try:
+                            entry.signs = CustomSigns(
+                                entry.key, Embedder(model), signs_path(config.KNN_DIR, entry.key),
+                                k=config.KNN_K,
+                                threshold=config.KNN_THRESHOLD,
+                                project_to=config.KNN_DIM,
+                                approx_min=config.KNN_APPROX_MIN,
+                                nprobe=config.KNN_NPROBE,
+                            )
+                        except Exception as e:
+                            logger.warning(
+                                "Custom signs disabled",
+                                extra={"fields": {"model": entry.key, "error": str(e)}},
+                            )
+                    entry.load_s = round(time.perf_counter() - started, 3)
+                    entry.loaded_at = time.time()
+                    entry.warmed = False
+                    entry.state = "loaded"
+
+                if warmup and not entry.warmed:
+                    started = time.perf_counter()
+                    stages = [entry.model] + ([entry.fast_model] if entry.fast_model is not None else [])
+                    for model in stages:
+                        warmup_model(model, batch_sizes=config.WARMUP_BATCH_SIZES)
+                        with torch.no_grad():
+                            outputs = model(torch.zeros(1, 3, 224, 224)).shape[-1]
+                        if outputs != len(entry.labels):
+                            raise ValueError(
+                                f"❌ {entry.key}: model punya {outputs} output, "
+                                f"manifest label berisi {len(entry.labels)}"
+                            )
+                    entry.warmup_s = round(time.perf_counter() - started, 3)
+                    entry.warmed = True
+            except Exception as e:
+                entry.model = None
+                entry.fast_model = None
+                entry.signs = None
+                entry.state = "failed"
+                entry.error = str(e)
+                raise
+            return entry
+
+    def _start_scheduler(self, entry):
+        if entry.scheduler is None:
+            max_batch_size, max_wait_ms = config.batch_window(entry.name)
+            entry.scheduler = BatchScheduler(
+                entry.name, entry.model, entry.labels,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                executor=self.executor,
+                max_concurrency=config.BATCH_MAX_CONCURRENCY,
+                knn=entry.signs,
+            )
+            entry.scheduler.start()
+        settings = config.cascade_settings(entry.name)
+        if entry.cascade is None and entry.fast_model is not None and settings is not None:
+            entry.cascade = make_cascade(
+                entry.name, entry.fast_model, entry.fast_kind, entry.labels,
+                entry.scheduler, self.executor, settings,
+            )
+            entry.cascade.start()
+        entry.state = "ready"
+        entry.error = None
+
+    async def ensure_ready(self, entry):
+        """Muat + warmup (di thread terpisah) dan jalankan scheduler bila belum"""
+        if entry.scheduler is not None:
+            return entry
+
+        if entry._task is None:
+            loop = asyncio.get_running_loop()
+
+            async def load():
+                try:
+                    await loop.run_in_executor(None, self.load_sync, entry)
+                    self._start_scheduler(entry)
+                finally:
+                    entry._task = None
+
+            entry._task = loop.create_task(load())
+        await asyncio.shield(entry._task)
+        return entry
+
+    def _publish(self, entry):
+        """Jadikan entry versi aktif (assignment atomik per dict)"""
+        self.models[entry.name] = entry.model
+        self.labels[entry.name] = entry.labels
+        self.schedulers[entry.name] = entry.scheduler
+        previous = self._active.get(entry.name)
+        self._active[entry.name] = entry.version
+        if previous is not None and previous != entry.version:
+            self.swaps += 1
+            logger.info("Model swapped", extra={"fields": {"model": entry.name, "from": previous, "to": entry.version}})
+
+    async def activate(self, name, version):
+        """Muat + warmup versi di background lalu swap versi aktif"""
+        entry = self.get(name, version)
+        await self.ensure_ready(entry)
+        self._publish(entry)
+        return entry
+
+    async def refresh(self):
+        """
+        Scan ulang folder dan hot-swap ke versi target yang berubah
+
+        Returns:
+            list of "name@version" yang baru diaktifkan
+        """
+        loop = asyncio.get_running_loop()
+        targets = await loop.run_in_executor(None, self.scan)
+        activated = []
+        for name, version in targets.items():
+            # Versi yang gagal dilewati (dan hanya dicoba lagi lewat activate()
+            # eksplisit); target berikutnya adalah versi sehat terbaru
+            while version is not None and self._active.get(name) != version:
+                try:
+                    entry = await self.activate(name, version)
+                    activated.append(entry.key)
+                except Exception as e:
+                    logger.error(f"Activation failed: {e}", extra={"fields": {"model": name, "version": version}})
+                    retry = self._target(name)
+                    version = retry if retry != version else None  # versi dipin gagal
+                else:
+                    break
+        return activated
+
+    def load_active(self, warmup=True, fork_safe=False):
+        """
+        Muat versi target semua model secara sinkron (startup / preload master)
+
+        Bila versi target gagal dimuat, versi sebelumnya (urutan menurun)
+        dicoba supaya satu file rusak tidak menggagalkan startup.
+        """
+        targets = self.scan()
+        for name, target in list(targets.items()):
+            candidates = [target] + sorted(
+                (v for v in self._versions[name] if v != target), key=version_key, reverse=True
+            )
+            for version in candidates:
+                try:
+                    self.load_sync(self.get(name, version), warmup=warmup, fork_safe=fork_safe)
+                    targets[name] = version
+                    break
+                except Exception as e:
+                    logger.error(f"Load failed: {e}", extra={"fields": {"model": name, "version": version}})
+            else:
+                raise RuntimeError(f"❌ Tidak ada versi model '{name}' yang bisa dimuat")
+        return targets
+
+    async def start_active(self, targets):
+        """Jalankan scheduler versi target (sudah dimuat) dan publish sebagai aktif"""
+        for name, version in targets.items():
+            entry = self.get(name, version)
+            await self.ensure_ready(entry)
+            self._publish(entry)
+
+    # ------------------------------------------------
+    #   ROUTING
+    # ------------------------------------------------
+
+    def set_split(self, name, spec):
+        """Atur split A/B saat runtime ("" = matikan)"""
+        versions = self._versions.get(name) or {}
+        split = parse_split(spec)
+        unknown = [v for v, _ in split if v not in versions]
+        if unknown:
+            raise KeyError(f"Versi tidak tersedia untuk '{name}': {unknown}")
+        self._splits[name] = split
+
+    def route(self, name, version=None, route_key=None):
+        """
+        Pilih versi untuk satu request
+
+        Args:
+            version: versi eksplisit dari client (mengalahkan split)
+            route_key: key sticky (session ID) supaya satu session selalu
+                mendapat versi yang sama; None = acak
+        """
+        if version:
+            return self.get(name, version)
+
+        split = self._splits.get(name)
+        if split:
+            total = sum(weight for _, weight in split)
+            if route_key:
+                digest = hashlib.blake2b(f"{name}:{route_key}".encode(), digest_size=8).digest()
+                point = int.from_bytes(digest, "big") / 2**64 * total
+            else:
+                point = random.random() * total
+            for candidate, weight in split:
+                if point < weight:
+                    return self.get(name, candidate)
+                point -= weight
+        return self.get(name)
+
+    @asynccontextmanager
+    async def use(self, entry):
+        """Pastikan versi siap dan tandai sedang dipakai (tidak bisa di-evict)"""
+        entry.inflight += 1
+        try:
+            await self.ensure_ready(entry)
+            entry.last_used = time.monotonic()
+            entry.requests += 1
+            yield entry
+        finally:
+            entry.inflight -= 1
+            entry.last_used = time.monotonic()
+
+    # ------------------------------------------------
+    #   EVICTION
+    # ------------------------------------------------
+
+    async def _evict(self, entry):
+        scheduler, entry.scheduler = entry.scheduler, None
+        cascade, entry.cascade = entry.cascade, None
+        entry.model = None
+        entry.fast_model = None
+        entry.signs = None
+        entry.warmed = False
+        entry.state = "evicted"
+        self.evictions += 1
+        if cascade is not None:
+            await cascade.stop()
+        if scheduler is not None:
+            await scheduler.stop()
+        logger.info("Model evicted", extra={"fields": {"model": entry.name, "version": entry.version}})
+
+    async def evict_idle(self):
+        """Evict versi non-aktif yang idle, lalu batasi jumlah versi non-aktif yang dimuat"""
+        now = time.monotonic()
+        candidates = [
+            entry
+            for name, versions in self._versions.items()
+            for entry in versions.values()
+            if entry.scheduler is not None
+            and entry.version != self._active.get(name)
+            and entry.inflight == 0
+        ]
+        # Yang paling lama idle dievict lebih dulu
+        candidates.sort(key=lambda e: e.last_used)
+
+        evicted = []
+        loaded = len(candidates)
+        for entry in candidates:
+            idle = self.idle_ttl_s > 0 and now - entry.last_used > self.idle_ttl_s
+            over = self.max_loaded > 0 and loaded > self.max_loaded
+            if idle or over:
+                await self._evict(entry)
+                evicted.append(entry.key)
+                loaded -= 1
+        return evicted
+
+    async def maintain(self, interval_s, poll=False):
+        """Loop background: idle eviction (+ scan folder bila poll)"""
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                if poll:
+                    await self.refresh()
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"Registry maintenance failed: {e}")
+
+    async def stop(self):
+        for versions in self._versions.values():
+            for entry in versions.values():
+                if entry.cascade is not None:
+                    await entry.cascade.stop()
+                    entry.cascade = None
+                if entry.scheduler is not None:
+                    await entry.scheduler.stop()
+                    entry.scheduler = None
+        self.schedulers.clear()
+
+    # ------------------------------------------------
+    #   INFO
+    # ------------------------------------------------
+
+    def loaded_schedulers(self):
+        """name@version -> scheduler untuk semua versi yang sedang dimuat"""
+        return {
+            entry.key: entry.scheduler
+            for versions in self._versions.values()
+            for entry in versions.values()
+            if entry.scheduler is not None
+        }
+
+    def loaded_cascades(self):
+        """name@version -> Cascade untuk versi yang cascade-nya aktif"""
+        return {
+            entry.key: entry.cascade
+            for versions in self._versions.values()
+            for entry in versions.values()
+            if entry.cascade is not None
+        }
+
+    def info(self):
+        return {
+            "models": {
+                name: {
+                    "active": self._active.get(name),
+                    "split": [{"version": v, "weight": w} for v, w in self._splits.get(name, [])],
+                    "versions": [
+                        versions[v].info() for v in sorted(versions, key=version_key)
+                    ],
+                }
+                for name, versions in self._versions.items()
+            },
+            "swaps": self.swaps,
+            "evictions": self.evictions,
+            "idle_ttl_s": self.idle_ttl_s,
+            "max_loaded": self.max_loaded,
+        }
@@ -0,0 +1,151 @@
+# ====================================================
+#   RESPONSE SERIALIZATION
+# ====================================================
+#
+# Negosiasi format response deteksi:
+#
+#   encoding  JSON (orjson bila terpasang) atau MessagePack dengan
+#             "Accept: application/msgpack"
+#   bentuk    hasil lengkap (default), atau ringkas dengan
+#             "X-Response-Format: compact":
+#               {"p": "A", "c": 95.5, "k": [["A", 95.5], ["S", 2.1]], "v": "v1"}
+#
+# Label table: client yang sudah mengambil GET /api/labels mengirim
+# "X-Label-Table: <table>" (pisahkan dengan koma untuk beberapa model);
+# hasil ringkas dari model dengan table yang sama berisi index label:
+#   {"p": 0, "c": 95.5, "k": [[0, 95.5], [18, 2.1]], "v": "v1", "t": "3f9c0e1a2b4d"}
+#
+# Hasil kNN sign custom (lihat embeddings.py) diringkas menjadi
+#   "n": ["Sepeda", 0.93, true]   (label, similarity, match)
+
+import hashlib
+import json
+from functools import lru_cache
+
+from fastapi.responses import JSONResponse, Response
+
+
+try:
+    import orjson
+except ImportError:  # orjson opsional: fallback ke json standar
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack opsional: tanpa paket ini response selalu JSON
+    msgpack = None
+
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+FORMAT_HEADER = "x-response-format"
+LABEL_TABLE_HEADER = "x-label-table"
+
+# Response bergantung pada ketiga header ini (encoding, bentuk, label table):
+# cache HTTP / CDN harus membedakannya
+VARY = "Accept, X-Response-Format, X-Label-Table"
+
+
+# ====================================================
+#   LABEL TABLES
+# ====================================================
+
+@lru_cache(maxsize=64)
+def _label_table(labels):
+    digest = hashlib.sha1("\n".join(labels).encode("utf-8")).hexdigest()[:12]
+    return digest, {label: i for i, label in enumerate(labels)}
+
+
+def label_table(labels):
+    """
+    ID label table (hash isi + urutan label) dan mapping label -> index
+
+    Returns:
+        (table_id, {label: index})
+    """
+    return _label_table(tuple(labels))
+
+
+def client_tables(headers):
+    """Label table yang sudah dimiliki client (header X-Label-Table)"""
+    value = headers.get(LABEL_TABLE_HEADER) or ""
+    return {table.strip() for table in value.split(",") if table.strip()}
+
+
+# ====================================================
+#   NEGOTIATION
+# ====================================================
+
+def wants_msgpack(headers):
+    accept = (headers.get("accept") or "").lower()
+    return msgpack is not None and any(media in accept for media in MSGPACK_TYPES)
+
+
+def wants_compact(headers):
+    return (headers.get(FORMAT_HEADER) or "").strip().lower() == "compact"
+
+
+def compact_prediction(result, labels=None, tables=()):
+    """
+    Hasil ringkas: tanpa model_used / total_classes, confidence 2 desimal
+
+    Args:
+        result: hasil prediksi (format predict_from_image)
+        labels: label list model yang menghasilkan result (untuk index)
+        tables: label table milik client; index dipakai bila cocok
+    """
+    top = result["all_predictions"]
+    table, index = label_table(labels) if labels else (None, None)
+
+    if table is not None and table in tables:
+        compact = {
+            "p": index[result["prediction"]],
+            "c": round(result["confidence"], 2),
+            "k": [[index[p["letter"]], round(p["confidence"], 2)] for p in top],
+            "t": table,
+        }
+    else:
+        compact = {
+            "p": result["prediction"],
+            "c": round(result["confidence"], 2),
+            "k": [[p["letter"], round(p["confidence"], 2)] for p in top],
+        }
+
+    if "model_version" in result:
+        compact["v"] = result["model_version"]
+    if "knn" in result:
+        knn = result["knn"]
+        compact["n"] = [knn["label"], knn["similarity"], knn["match"]]
+    return compact
+
+
+# ====================================================
+#   ENCODERS
+# ====================================================
+
+def dumps(content):
+    """JSON string (orjson bila tersedia)"""
+    if orjson is not None:
+        return orjson.dumps(content).decode("utf-8")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse dengan encoder orjson (fallback: json standar)"""
+
+    def render(self, content):
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content):
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def render(content, headers, status_code=200):
+    """Response dengan encoding sesuai header Accept (Vary: lihat VARY)"""
+    response_class = MsgPackResponse if wants_msgpack(headers) else FastJSONResponse
+    return response_class(content=content, status_code=status_code, headers={"Vary": VARY})
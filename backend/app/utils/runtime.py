@@ -0,0 +1,118 @@
+# ====================================================
+#   MULTI-PROCESS RUNTIME
+# ====================================================
+#
+# Menjalankan banyak worker per server tanpa RSS tumbuh linear:
+#
+#   1. Pre-fork (gunicorn.conf.py, preload_app): model dimuat SEKALI di
+#      proses master sebelum fork. Tensor parameter adalah buffer terpisah
+#      dari object Python, sehingga refcount tidak menyentuhnya dan halaman
+#      memori tetap dibagi copy-on-write oleh semua worker. gc.freeze()
+#      mencegah GC menulis ke header object yang diwariskan.
+#   2. File weights-only (*.weights.pt) dimuat dengan mmap: tanpa pre-fork
+#      pun (uvicorn --workers N) halaman weights fp32 dibagi lewat page cache.
+#
+# Setiap worker membatasi intra-op thread PyTorch ke cpu_count / workers
+# supaya proses tidak saling berebut core.
+#
+# Master TIDAK menjalankan forward pass apa pun (termasuk torch.jit.trace
+# varian script dan export ONNX): keduanya ditunda ke forward pertama di
+# worker (lihat optimize.DeferredTrace dan backends.OnnxRuntimeBackend).
+
+import fcntl
+import gc
+import os
+from contextlib import contextmanager
+
+import torch
+
+from app import config
+
+
+def threads_per_worker(workers=None):
+    """Jumlah intra-op thread per worker (0 = biarkan default PyTorch)"""
+    if config.INTRA_OP_THREADS > 0:
+        return config.INTRA_OP_THREADS
+    workers = workers or config.WORKERS
+    if workers <= 1:
+        return 0
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def configure_threads(workers=None):
+    """
+    Atur thread PyTorch untuk proses ini (panggil di worker setelah fork)
+
+    Returns:
+        dict: intra_op / interop thread yang berlaku
+    """
+    intra = threads_per_worker(workers)
+    if intra > 0:
+        torch.set_num_threads(intra)
+
+    if config.INTEROP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(config.INTEROP_THREADS)
+        except RuntimeError:
+            # Hanya bisa di-set sekali, sebelum kerja paralel pertama
+            pass
+
+    return {
+        "intra_op_threads": torch.get_num_threads(),
+        "interop_threads": torch.get_num_interop_threads(),
+    }
+
+
+def preload_for_fork():
+    """
+    Muat (dan optimasi) model di proses master sebelum worker di-fork
+
+    Tidak ada forward pass di master: thread pool OpenMP yang sudah hidup
+    sebelum fork tidak aman dipakai di child. Warmup, tracing varian script
+    dan export ONNX terjadi per worker saat startup (fork_safe=True).
+    """
+    from app.main import prepare_models
+
+    targets = prepare_models(warmup=False, fork_safe=True)
+
+    # Object yang ada sekarang tidak akan pernah di-scan GC lagi, sehingga
+    # halaman memori yang diwariskan ke worker tidak ter-copy
+    gc.collect()
+    gc.freeze()
+    return targets
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Lock eksklusif antar proses (flock pada file <path>.lock)
+
+    Dipakai saat beberapa worker bisa menulis artefak yang sama (export
+    ONNX, index sign custom).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def memory_report():
+    """RSS dan memori shared proses ini (Linux, dari /proc/self/status + smaps_rollup)"""
+    report = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "RssAnon:", "RssFile:", "RssShmem:")):
+                    key, value = line.split(":", 1)
+                    report[key.lower()] = value.strip()
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(("Pss:", "Shared_Clean:", "Shared_Dirty:", "Private_Dirty:")):
+                    key, value = line.split(":", 1)
+                    report[key.lower()] = value.strip()
+    except OSError:
+        pass
+    return report
@@ -0,0 +1,160 @@
+# ====================================================
+#   PER-SESSION STATIC-FRAME GATING
+# ====================================================
+#
+# Mode kamera real-time: user yang menahan satu isyarat mengirim banyak
+# frame yang hampir sama. Per session disimpan thumbnail grayscale kecil
+# dari frame TERAKHIR YANG DI-INFER beserta hasilnya. Frame baru yang
+# bedanya (mean absolute difference) di bawah threshold langsung mendapat
+# hasil sebelumnya tanpa decode penuh dan forward pass.
+#
+# Thumbnail dibandingkan dengan frame yang terakhir di-infer (bukan frame
+# terakhir yang diterima), sehingga pergeseran pelan tetap terdeteksi.
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from app.utils.preprocess import open_image
+
+
+def thumbnail(image_bytes, size=16):
+    """
+    Thumbnail grayscale size x size (uint8) untuk perbandingan frame
+
+    JPEG di-decode dengan draft mode (skala 1/8 bila memungkinkan), jauh
+    lebih murah dari decode penuh untuk model.
+    """
+    image = open_image(image_bytes)
+    if image.format == "JPEG":
+        image.draft("L", (size * 8, size * 8))
+    image = image.convert("L").resize((size, size), Image.BILINEAR)
+    return np.asarray(image, dtype=np.uint8)
+
+
+def frame_difference(a, b):
+    """Mean absolute difference dua thumbnail, dinormalisasi ke 0.0 - 1.0"""
+    if a.shape != b.shape:
+        return 1.0
+    return float(np.abs(a.astype(np.int16) - b).mean()) / 255.0
+
+
+class _Session:
+    __slots__ = ("thumb", "results", "expires_at", "skipped")
+
+    def __init__(self, thumb, expires_at):
+        self.thumb = thumb
+        self.results = {}  # (model_name, top_k) -> result
+        self.expires_at = expires_at
+        self.skipped = 0
+
+
+class SessionStore:
+    """
+    Store session terbatas (LRU) dan kedaluwarsa (TTL)
+
+    Args:
+        max_sessions: jumlah session maksimum (LRU eviction)
+        ttl_s: session dihapus bila tidak ada frame selama ttl_s detik
+        threshold: beda frame maksimum (0.0 - 1.0) untuk memakai ulang hasil
+        max_skipped: paksa inference setelah sekian frame berturut-turut
+            di-skip (0 = tanpa batas)
+    """
+
+    def __init__(self, max_sessions=1024, ttl_s=60.0, threshold=0.02, max_skipped=30):
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl_s = float(ttl_s)
+        self.threshold = float(threshold)
+        self.max_skipped = int(max_skipped)
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.frames = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _get(self, session_id, now):
+        session = self._sessions.get(session_id)
+        if session is not None and session.expires_at <= now:
+            del self._sessions[session_id]
+            self.expirations += 1
+            session = None
+        return session
+
+    def lookup(self, session_id, thumb, model_names, top_k):
+        """
+        Cari hasil sebelumnya bila frame tidak berubah
+
+        Returns:
+            dict model_name -> result bila SEMUA model bisa dilayani dari
+            session, selain itu None (frame harus di-infer)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.frames += 1
+            session = self._get(session_id, now)
+            if session is None:
+                return None
+
+            session.expires_at = now + self.ttl_s
+            self._sessions.move_to_end(session_id)
+
+            if self.max_skipped > 0 and session.skipped >= self.max_skipped:
+                return None
+            if frame_difference(thumb, session.thumb) > self.threshold:
+                return None
+
+            results = {}
+            for name in model_names:
+                result = session.results.get((name, top_k))
+                if result is None:
+                    return None
+                results[name] = dict(result)
+
+            session.skipped += 1
+            self.skipped += 1
+            return results
+
+    def update(self, session_id, thumb, results, top_k):
+        """Simpan thumbnail + hasil frame yang baru saja di-infer"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._get(session_id, now)
+            if session is None or frame_difference(thumb, session.thumb) > self.threshold:
+                # Frame baru (atau session baru): hasil lama tidak berlaku lagi
+                session = _Session(thumb, now)
+                self._sessions[session_id] = session
+
+            session.thumb = thumb
+            session.skipped = 0
+            session.expires_at = now + self.ttl_s
+            for name, result in results.items():
+                session.results[(name, top_k)] = dict(result)
+
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        """Jumlah session dan rasio inference yang di-skip"""
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_s": self.ttl_s,
+            "threshold": self.threshold,
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "skip_ratio": (self.skipped / self.frames) if self.frames else 0.0,
+        }
@@ -0,0 +1,157 @@
+# ====================================================
+#   REAL-TIME STREAMING (WEBSOCKET)
+# ====================================================
+#
+# Client mengirim frame kamera (binary JPEG/PNG/WebP) secara terus-menerus.
+# Server hanya menyimpan frame TERBARU (latest-frame-wins): frame lama yang
+# belum sempat diproses dibuang, sehingga server yang lambat tidak pernah
+# membangun backlog yang terus membesar.
+
+import asyncio
+import json
+import time
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app import config
+from app.utils.logging_utils import get_logger
+from app.utils.preprocess import RAW_FORMATS, RawFrame
+from app.utils.responses import compact_prediction, dumps
+from app.utils.uploads import validate_image
+
+
+logger = get_logger("stream")
+
+
+class LatestFrameSlot:
+    """Slot berisi satu frame; put() menimpa frame yang belum diambil"""
+
+    def __init__(self):
+        self._frame = None
+        self._seq = 0
+        self._event = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        self.received += 1
+        if self._frame is not None:
+            self.dropped += 1
+        self._seq += 1
+        self._frame = (self._seq, frame)
+        self._event.set()
+
+    async def get(self):
+        """Tunggu sampai ada frame, lalu ambil (seq, frame)"""
+        await self._event.wait()
+        self._event.clear()
+        item, self._frame = self._frame, None
+        return item
+
+
+def compact_result(result, seq, elapsed_ms, dropped, labels=None, tables=()):
+    """
+    Pesan prediksi ringkas untuk WebSocket
+
+    Format: {"seq", "p" (label), "c" (confidence), "k" ([[label, conf]...]),
+             "ms" (latency server), "drop" (total frame dibuang)}; label
+    berupa index (+ "t") bila client sudah mengirim label table-nya
+    """
+    return {
+        "seq": seq,
+        **compact_prediction(result, labels, tables),
+        "ms": round(elapsed_ms, 1),
+        "drop": dropped,
+    }
+
+
+async def _receive_frames(websocket, slot, options):
+    """
+    Baca pesan dari client: binary = frame, text = opsi JSON
+
+    Opsi: {"top_k": 5} dan/atau {"raw": {"width": 224, "height": 224, "format": "rgba"}}
+    (frame binary berikutnya berupa pixel mentah, bukan JPEG; "raw": null
+    untuk kembali ke image ter-encode) dan/atau {"labels": "<table>"} (label
+    table dari GET /api/labels; hasil berisi index label)
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        if message.get("bytes") is not None:
+            frame = message["bytes"]
+            if config.UPLOAD_MAX_BYTES > 0 and len(frame) > config.UPLOAD_MAX_BYTES:
+                await websocket.send_json({"error": f"Frame terlalu besar (maksimum {config.UPLOAD_MAX_BYTES} bytes)"})
+                continue
+            slot.put(frame)
+        elif message.get("text"):
+            try:
+                data = json.loads(message["text"])
+                if "top_k" in data:
+                    options["top_k"] = max(1, int(data["top_k"]))
+                if "labels" in data:
+                    tables = data["labels"] or []
+                    options["tables"] = {tables} if isinstance(tables, str) else set(map(str, tables))
+                if "raw" in data:
+                    raw = data["raw"]
+                    options["raw"] = None if raw is None else (
+                        int(raw["width"]), int(raw["height"]),
+                        RAW_FORMATS[str(raw.get("format", "rgba")).lower()],
+                    )
+            except (ValueError, TypeError, KeyError, AttributeError):
+                await websocket.send_json({"error": "Pesan teks harus JSON, contoh: {\"top_k\": 3}"})
+
+
+async def _process_frames(websocket, slot, detect, options, labels_for=None):
+    """Proses frame terbaru satu per satu dan kirim hasilnya"""
+    while True:
+        seq, frame = await slot.get()
+        started = time.perf_counter()
+        try:
+            if options.get("raw"):
+                frame = RawFrame(frame, *options["raw"])
+            else:
+                # Format + dimensi dari header saja, sebelum decode
+                validate_image(frame)
+            result = await detect(frame, top_k=options["top_k"])
+        except Exception as e:
+            await websocket.send_json({"seq": seq, "error": str(e)})
+            continue
+
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        labels = labels_for(result) if labels_for is not None and options["tables"] else None
+        message = compact_result(result, seq, elapsed_ms, slot.dropped, labels, options["tables"])
+        await websocket.send_text(dumps(message))
+
+
+async def stream_detections(websocket: WebSocket, detect, top_k=3, labels_for=None):
+    """
+    Layani satu koneksi WebSocket sampai client disconnect
+
+    Args:
+        websocket: koneksi yang sudah di-accept
+        detect: coroutine function detect(image_bytes, top_k=...) -> dict
+        top_k: default top_k (bisa diubah client lewat pesan teks)
+        labels_for: (opsional) fungsi result -> label list model yang
+            menghasilkannya, untuk hasil berisi index label
+    """
+    slot = LatestFrameSlot()
+    options = {"top_k": top_k, "raw": None, "tables": set()}
+
+    tasks = [
+        asyncio.create_task(_receive_frames(websocket, slot, options)),
+        asyncio.create_task(_process_frames(websocket, slot, detect, options, labels_for)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                logger.warning(f"WebSocket stream closed with error: {exc!r}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return {"received": slot.received, "dropped": slot.dropped}
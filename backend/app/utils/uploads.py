@@ -0,0 +1,229 @@
+# ====================================================
+#   BOUNDED UPLOAD INGESTION
+# ====================================================
+#
+# Upload ditolak sedini mungkin, sebelum memori dan CPU terpakai:
+#
+#   1. BodyLimitMiddleware: Content-Length > limit -> 413 tanpa membaca
+#      body; body chunked dihitung saat streaming dan diputus di limit
+#   2. read_upload(): file dibaca per chunk (maksimal limit + 1 byte);
+#      magic bytes dicek di chunk pertama -> 415 untuk non-image
+#   3. validate_image(): lebar x tinggi dibaca dari header (tanpa decode)
+#      -> 413 untuk decompression bomb
+
+import io
+import warnings
+
+from PIL import Image
+
+from app import config
+from app.utils import metrics
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Overhead multipart (boundary, header part, field form) di atas ukuran file
+MULTIPART_SLACK = 64 * 1024
+
+# Magic bytes -> format (format yang bisa di-decode preprocess)
+SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"BM", "bmp"),
+)
+
+
+class UploadError(ValueError):
+    """Upload ditolak; status_code = 413 (terlalu besar) / 415 (bukan image) / 400"""
+
+    def __init__(self, status_code, reason, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+
+
+def reject(status_code, reason, detail):
+    """Buat UploadError dan hitung di temanisyarat_uploads_rejected_total"""
+    metrics.UPLOADS_REJECTED.labels(reason).inc()
+    return UploadError(status_code, reason, detail)
+
+
+def sniff_format(head):
+    """Format image dari beberapa byte pertama (None = tidak dikenal)"""
+    for signature, fmt in SIGNATURES:
+        if head.startswith(signature):
+            return fmt
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def check_format(head):
+    """Raise 415 bila magic bytes bukan JPEG/PNG/WebP/BMP"""
+    fmt = sniff_format(head)
+    if fmt is None:
+        raise reject(415, "unsupported", "❌ Format tidak didukung. Gunakan JPG, PNG, WebP atau BMP")
+    return fmt
+
+
+def validate_image(data, max_bytes=None, max_pixels=None):
+    """
+    Validasi image ter-encode tanpa decode pixel
+
+    Args:
+        data: bytes image
+        max_bytes: ukuran maksimum (default TEMANISYARAT_UPLOAD_MAX_BYTES)
+        max_pixels: lebar x tinggi maksimum (default TEMANISYARAT_UPLOAD_MAX_PIXELS)
+
+    Returns:
+        (format, width, height)
+
+    Raises:
+        UploadError: 413 terlalu besar / terlalu banyak pixel,
+            415 format tidak didukung, 400 header rusak
+    """
+    max_bytes = config.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    max_pixels = config.UPLOAD_MAX_PIXELS if max_pixels is None else max_pixels
+
+    if max_bytes > 0 and len(data) > max_bytes:
+        raise reject(413, "too_large", f"❌ File terlalu besar ({len(data)} bytes, maksimum {max_bytes})")
+    fmt = check_format(bytes(data[:16]))
+
+    # Image.open hanya membaca header; pixel baru di-decode saat load()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            with Image.open(io.BytesIO(data)) as image:
+                width, height = image.size
+    except Image.DecompressionBombError:
+        raise reject(413, "too_many_pixels", "❌ Dimensi image terlalu besar")
+    except Exception as e:
+        raise reject(400, "invalid", f"❌ Header image tidak valid: {e}")
+
+    if max_pixels > 0 and width * height > max_pixels:
+        raise reject(
+            413, "too_many_pixels",
+            f"❌ Dimensi image terlalu besar ({width}x{height}, maksimum {max_pixels} pixel)"
+        )
+    return fmt, width, height
+
+
+async def read_upload(upload, max_bytes=None, max_pixels=None):
+    """
+    Baca UploadFile per chunk dengan batas ukuran, lalu validasi header
+
+    Returns:
+        bytes image (sudah lolos validate_image)
+    """
+    max_bytes = config.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+
+    size = getattr(upload, "size", None)
+    if max_bytes > 0 and size is not None and size > max_bytes:
+        raise reject(413, "too_large", f"❌ File terlalu besar ({size} bytes, maksimum {max_bytes})")
+
+    buffer = bytearray()
+    while True:
+        chunk = await upload.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if not buffer:
+            check_format(chunk[:16])
+        buffer += chunk
+        if max_bytes > 0 and len(buffer) > max_bytes:
+            raise reject(413, "too_large", f"❌ File terlalu besar (maksimum {max_bytes} bytes)")
+
+    data = bytes(buffer)
+    validate_image(data, max_bytes, max_pixels)
+    return data
+
+
+# ====================================================
+#   ASGI MIDDLEWARE
+# ====================================================
+
+class BodyLimitMiddleware:
+    """
+    Batasi ukuran body request HTTP
+
+    Args:
+        app: ASGI app
+        max_bytes: limit default (bytes, 0 = tanpa batas)
+        overrides: {path prefix: limit} untuk endpoint dengan body besar
+            (contoh /api/detect/batch)
+    """
+
+    def __init__(self, app, max_bytes, overrides=None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.overrides = sorted((overrides or {}).items(), key=lambda kv: -len(kv[0]))
+
+    def _limit(self, path):
+        for prefix, limit in self.overrides:
+            if path.startswith(prefix):
+                return limit
+        return self.max_bytes
+
+    async def _send_413(self, send, limit):
+        body = ('{"detail":"❌ Request terlalu besar (maksimum %d bytes)"}' % limit).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        limit = self._limit(scope.get("path", ""))
+        if limit <= 0:
+            return await self.app(scope, receive, send)
+
+        for key, value in scope.get("headers", []):
+            if key == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > limit:
+                    metrics.UPLOADS_REJECTED.labels("too_large").inc()
+                    return await self._send_413(send, limit)
+                break
+
+        state = {"received": 0, "rejected": False, "started": False}
+
+        async def limited_receive():
+            if state["rejected"]:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > limit:
+                    # Body chunked melebihi limit: jawab 413 dan putus pembacaan
+                    state["rejected"] = True
+                    metrics.UPLOADS_REJECTED.labels("too_large").inc()
+                    if not state["started"]:
+                        await self._send_413(send, limit)
+                        state["started"] = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if state["rejected"]:
+                return
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # ClientDisconnect dll. setelah 413 terkirim bukan error server
+            if not state["rejected"]:
+                raise
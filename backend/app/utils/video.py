@@ -0,0 +1,306 @@
+# ====================================================
+#   VIDEO CLIP DETECTION (NDJSON)
+# ====================================================
+#
+# Clip video di-decode bertahap (PyAV) dan di-sample pada fps tertentu.
+# Frame sampel langsung diperkecil ke 224x224 dan ditulis ke buffer batch,
+# jadi memori sebanding dengan ukuran batch, bukan panjang clip. Top-1
+# berurutan yang sama digabung menjadi segmen:
+#
+#   {"segment": {"index": 0, "label": "A", "start_s": 0.0, "end_s": 1.2, "frames": 6, ...,
+#                "all_predictions": [{"letter": "A", "confidence": 91.3}, ...]}}
+#   ...
+#   {"summary": {...}}
+#
+# all_predictions segmen = top_k label dengan confidence rata-rata per frame
+# tertinggi (label di luar top_k suatu frame dihitung 0 untuk frame itu).
+# Selama model punya sign custom, segmen juga berisi "knn" dari frame dengan
+# similarity tertinggi di segmen itu.
+# Batas durasi dicek dua kali: dari metadata saat open_video (413 sebelum
+# streaming) dan dari timestamp frame yang di-decode, karena container
+# tanpa metadata durasi (webm hasil MediaRecorder, stream mentah) lolos
+# pengecekan pertama.
+
+import time
+from functools import partial
+
+from app.utils.predict_utils import predict_batch
+from app.utils.preprocess import get_engine
+from app.utils.responses import dumps
+from app.utils.uploads import UploadError, reject
+
+
+try:
+    import av
+except ImportError:  # PyAV opsional: tanpa PyAV endpoint video menjawab 501
+    av = None
+
+
+# ====================================================
+#   DECODING
+# ====================================================
+
+def open_video(fileobj, max_pixels=0, max_duration_s=0.0):
+    """
+    Buka container video dan validasi stream pertama (tanpa decode frame)
+
+    Returns:
+        (container, stream)
+
+    Raises:
+        UploadError: 415 bukan video, 413 resolusi / durasi melebihi batas
+    """
+    if av is None:
+        raise RuntimeError("❌ PyAV belum terpasang (pip install av)")
+
+    try:
+        container = av.open(fileobj, mode="r")
+    except Exception as e:
+        raise reject(415, "unsupported", f"❌ File bukan video yang didukung: {e}")
+
+    try:
+        if not container.streams.video:
+            raise reject(415, "unsupported", "❌ File tidak berisi video stream")
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+
+        width, height = stream.codec_context.width, stream.codec_context.height
+        if max_pixels > 0 and width * height > max_pixels:
+            raise reject(413, "too_many_pixels", f"❌ Resolusi video terlalu besar ({width}x{height})")
+
+        duration = video_duration(container, stream)
+        if max_duration_s > 0 and duration is not None and duration > max_duration_s:
+            raise reject(
+                413, "too_long", f"❌ Video terlalu panjang ({duration:.1f}s, maksimum {max_duration_s:g}s)"
+            )
+    except Exception:
+        container.close()
+        raise
+    return container, stream
+
+
+def video_duration(container, stream):
+    """Durasi (detik) dari metadata stream / container, None bila tidak diketahui"""
+    if stream.duration is not None and stream.time_base is not None:
+        return float(stream.duration * stream.time_base)
+    if container.duration is not None:
+        return container.duration / 1_000_000.0
+    return None
+
+
+def iter_sampled_frames(container, stream, fps, max_duration_s=0.0):
+    """
+    Decode bertahap, yield (timestamp_s, PIL image) setiap 1/fps detik
+
+    Frame di antara sampel tetap di-decode (inter-frame codec) tetapi tidak
+    dikonversi ke RGB.
+
+    Raises:
+        UploadError: 413 bila timestamp frame (relatif ke frame pertama)
+            melewati max_duration_s (0 = tanpa batas)
+    """
+    interval = 1.0 / fps
+    next_t = 0.0
+    rate = float(stream.average_rate or 0) or 30.0
+    first_t = None
+
+    for index, frame in enumerate(container.decode(stream)):
+        t = frame.time if frame.time is not None else index / rate
+        if first_t is None:
+            first_t = t
+        if max_duration_s > 0 and t - first_t > max_duration_s:
+            raise reject(
+                413, "too_long", f"❌ Video terlalu panjang (lebih dari {max_duration_s:g}s)"
+            )
+        if t + 1e-6 < next_t:
+            continue
+        while next_t <= t + 1e-6:
+            next_t += interval
+        yield t, frame.to_image()
+
+
+def fill_batch(frames, batch_size, size=224):
+    """
+    Ambil maksimal batch_size frame berikutnya langsung ke buffer batch
+
+    Returns:
+        (timestamps, batch tensor (N, 3, size, size)) - N = 0 di akhir clip
+    """
+    engine = get_engine(size)
+    batch = engine.new_batch(batch_size)
+    timestamps = []
+    for t, image in frames:
+        engine.to_tensor(engine.fit(image), out=batch[len(timestamps)])
+        timestamps.append(t)
+        if len(timestamps) >= batch_size:
+            break
+    return timestamps, batch[:len(timestamps)]
+
+
+# ====================================================
+#   SEGMENTS
+# ====================================================
+
+class SegmentMerger:
+    """
+    Gabungkan top-1 berurutan yang sama menjadi segmen
+
+    Args:
+        interval: jarak antar frame sampel (detik)
+        top_k: jumlah all_predictions per segmen (0 = tanpa all_predictions)
+    """
+
+    def __init__(self, interval, top_k=0):
+        self.interval = interval
+        self.top_k = top_k
+        self.count = 0
+        self._current = None
+
+    def _accumulate(self, current, result):
+        totals = current["_totals"]
+        for item in result.get("all_predictions", []):
+            totals[item["letter"]] = totals.get(item["letter"], 0.0) + item["confidence"]
+        # kNN (sign custom): simpan frame dengan similarity tertinggi di segmen
+        knn = result.get("knn")
+        if knn is not None and (current["_knn"] is None or knn["similarity"] > current["_knn"]["similarity"]):
+            current["_knn"] = knn
+
+    def add(self, t, result):
+        """Tambah satu frame; return segmen yang selesai (label berganti) atau None"""
+        label = result["prediction"]
+        current = self._current
+        if current is not None and current["label"] == label:
+            current["end_s"] = t + self.interval
+            current["frames"] += 1
+            current["_confidence"] += result["confidence"]
+            current["max_confidence"] = max(current["max_confidence"], result["confidence"])
+            self._accumulate(current, result)
+            return None
+
+        closed = self.flush()
+        self._current = {
+            "label": label,
+            "start_s": t,
+            "end_s": t + self.interval,
+            "frames": 1,
+            "_confidence": result["confidence"],
+            "max_confidence": result["confidence"],
+            "_totals": {},
+            "_knn": None,
+        }
+        self._accumulate(self._current, result)
+        return closed
+
+    def flush(self):
+        """Tutup segmen yang sedang berjalan (None bila tidak ada)"""
+        current, self._current = self._current, None
+        if current is None:
+            return None
+        frames = current["frames"]
+        segment = {
+            "index": self.count,
+            "label": current["label"],
+            "start_s": round(current["start_s"], 3),
+            "end_s": round(current["end_s"], 3),
+            "frames": frames,
+            "confidence": round(current.pop("_confidence") / frames, 2),
+            "max_confidence": round(current["max_confidence"], 2),
+        }
+        if self.top_k > 0:
+            ranked = sorted(current["_totals"].items(), key=lambda kv: -kv[1])[:self.top_k]
+            segment["all_predictions"] = [
+                {"letter": letter, "confidence": round(total / frames, 2)} for letter, total in ranked
+            ]
+        if current["_knn"] is not None:
+            segment["knn"] = current["_knn"]
+        self.count += 1
+        return segment
+
+
+# ====================================================
+#   NDJSON STREAM
+# ====================================================
+
+async def stream_video_ndjson(container, stream, executor, model, labels, model_name,
+                              fps=5.0, top_k=3, batch_size=16, pause=None, max_duration_s=0.0, predict=None):
+    """
+    Async generator NDJSON: satu baris per segmen (saat segmen selesai),
+    diakhiri satu baris summary. Container ditutup di akhir.
+
+    Args:
+        top_k: jumlah all_predictions per segmen
+        max_duration_s: batas durasi dari timestamp frame; bila lewat,
+            decode berhenti dan summary berisi "error" (segmen sebelumnya
+            tetap dikirim)
+        pause: (opsional) coroutine function yang di-await sebelum setiap
+            batch, mis. admission.yield_to_interactive
+        predict: (opsional) pengganti predict_batch(model, ...), mis.
+            embeddings.batch_predictor (segmen berisi "knn")
+    """
+    started = time.perf_counter()
+    cut = {}
+    if predict is None:
+        predict = partial(predict_batch, model)
+
+    def capped(frames):
+        # Batas durasi di tengah batch: frame sebelum batas tetap diproses
+        try:
+            yield from frames
+        except UploadError as e:
+            cut["error"] = e.detail
+
+    frames = capped(iter_sampled_frames(container, stream, fps, max_duration_s))
+    merger = SegmentMerger(1.0 / fps, top_k)
+    duration = video_duration(container, stream)
+    sampled = 0
+    error = None
+
+    def emit(segment):
+        return dumps({"segment": segment})
+
+    try:
+        while True:
+            if pause is not None:
+                await pause()
+            try:
+                timestamps, batch = await executor.run(fill_batch, frames, batch_size)
+            except Exception as e:
+                # Clip terpotong / rusak di tengah: segmen yang sudah ada tetap dikirim
+                error = f"Gagal decode video: {e}"
+                break
+            if not timestamps:
+                break
+
+            results = await executor.run(
+                predict, batch, labels, model_name, [top_k] * len(timestamps)
+            )
+            sampled += len(timestamps)
+
+            lines = []
+            for t, result in zip(timestamps, results):
+                closed = merger.add(t, result)
+                if closed is not None:
+                    lines.append(emit(closed))
+            if lines:
+                yield "\n".join(lines) + "\n"
+
+        error = error or cut.get("error")
+        last = merger.flush()
+        if last is not None:
+            yield emit(last) + "\n"
+    finally:
+        container.close()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "model_used": model_name,
+        "sample_fps": fps,
+        "frames": sampled,
+        "segments": merger.count,
+        "duration_s": round(duration, 3) if duration is not None else None,
+        "elapsed_s": round(elapsed, 3),
+        "frames_per_s": round(sampled / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    if error:
+        summary["error"] = error
+    yield dumps({"summary": summary}) + "\n"
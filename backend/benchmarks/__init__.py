@@ -0,0 +1,9 @@
+# ====================================================
+#   BENCHMARK SUITE
+# ====================================================
+#
+#   python -m benchmarks.micro   decode / transform / forward / top-k
+#   python -m benchmarks.load    load test endpoint HTTP + WebSocket
+#
+# File .pth di repo hanya pointer LFS, jadi suite ini default memakai
+# AlexNet stand-in dengan weights acak (lihat benchmarks.standins).
@@ -0,0 +1,286 @@
+# ====================================================
+#   END-TO-END LOAD GENERATOR
+# ====================================================
+#
+# Closed-loop load test: `concurrency` client per endpoint, masing-masing
+# mengirim request berikutnya segera setelah response diterima.
+#
+#   letters / words / all   POST multipart satu image
+#   batch                   POST /api/detect/batch (NDJSON stream, --batch-files image)
+#   ws                      /ws/detect/letters, satu frame -> tunggu hasil -> frame berikut
+#
+# Tanpa --url, server uvicorn dijalankan otomatis dengan AlexNet stand-in
+# (prediction cache dan static-frame gating dimatikan supaya setiap request
+# benar-benar di-infer):
+#
+#   python -m benchmarks.load --endpoints letters words ws --concurrency 8 --duration 20
+#   python -m benchmarks.load --url http://localhost:8000 --requests 200 --json load.json
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.micro import _percentile
+from benchmarks.standins import RESOLUTIONS, synthetic_image, write_standin_models
+
+
+ENDPOINTS = ("letters", "words", "all", "batch", "ws")
+
+
+# ====================================================
+#   SERVER (opsional, dengan stand-in models)
+# ====================================================
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(models_dir, port, workers=1, cache=False, extra_env=None):
+    """Jalankan uvicorn dengan model stand-in di models_dir"""
+    env = dict(os.environ)
+    env["TEMANISYARAT_MODELS_DIR"] = models_dir
+    env["TEMANISYARAT_WORKERS"] = str(workers)
+    env.setdefault("TEMANISYARAT_LOG_LEVEL", "WARNING")
+    if not cache:
+        env["TEMANISYARAT_CACHE_MAX_ENTRIES"] = "0"
+        env["TEMANISYARAT_SESSION_MAX_ENTRIES"] = "0"
+    env.update(extra_env or {})
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=backend_dir, env=env,
+    )
+
+
+def wait_ready(base_url, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=2.0).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+# ====================================================
+#   CLIENTS
+# ====================================================
+
+class Recorder:
+    """Kumpulkan latency + error satu endpoint"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = {}
+        self.first_byte = []
+
+    def ok(self, seconds, first_byte=None):
+        self.latencies.append(seconds * 1000.0)
+        if first_byte is not None:
+            self.first_byte.append(first_byte * 1000.0)
+
+    def error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def report(self, elapsed):
+        latencies = self.latencies
+        row = {
+            "endpoint": self.name,
+            "requests": len(latencies),
+            "errors": sum(self.errors.values()),
+            "error_kinds": self.errors,
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        }
+        if latencies:
+            row.update({
+                "p50_ms": round(_percentile(latencies, 50), 2),
+                "p95_ms": round(_percentile(latencies, 95), 2),
+                "p99_ms": round(_percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2),
+            })
+        if self.first_byte:
+            row["ttfb_p50_ms"] = round(_percentile(self.first_byte, 50), 2)
+        return row
+
+
+class Budget:
+    """Batas jumlah request (--requests) atau durasi (--duration)"""
+
+    def __init__(self, requests=0, duration=0.0):
+        self.remaining = requests
+        self.deadline = time.monotonic() + duration if duration else None
+
+    def take(self):
+        if self.deadline is not None:
+            return time.monotonic() < self.deadline
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+async def http_worker(client, endpoint, images, budget, recorder, batch_files):
+    i = 0
+    while budget.take():
+        image = images[i % len(images)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            if endpoint == "batch":
+                files = [
+                    ("files", (f"{n}.jpg", images[(i + n) % len(images)], "image/jpeg"))
+                    for n in range(batch_files)
+                ]
+                first = None
+                async with client.stream("POST", "/api/detect/batch", files=files) as response:
+                    async for _ in response.aiter_lines():
+                        if first is None:
+                            first = time.perf_counter() - started
+                    status = response.status_code
+            else:
+                files = {"file": ("frame.jpg", image, "image/jpeg")}
+                response = await client.post(f"/api/detect/{endpoint}", files=files)
+                status, first = response.status_code, None
+        except httpx.HTTPError as e:
+            recorder.error(type(e).__name__)
+            continue
+
+        if status == 200:
+            recorder.ok(time.perf_counter() - started, first)
+        else:
+            recorder.error(f"http_{status}")
+
+
+async def ws_worker(ws_url, images, budget, recorder):
+    import websockets
+
+    try:
+        async with websockets.connect(ws_url, max_size=None) as ws:
+            i = 0
+            while budget.take():
+                image = images[i % len(images)]
+                i += 1
+                started = time.perf_counter()
+                await ws.send(image)
+                message = json.loads(await ws.recv())
+                if "error" in message:
+                    recorder.error("frame_error")
+                else:
+                    recorder.ok(time.perf_counter() - started)
+    except Exception as e:
+        recorder.error(type(e).__name__)
+
+
+async def run_endpoint(base_url, endpoint, images, concurrency, requests, duration, batch_files):
+    recorder = Recorder(endpoint)
+    budget = Budget(requests, duration)
+    started = time.perf_counter()
+
+    if endpoint == "ws":
+        ws_url = base_url.replace("http", "ws", 1) + "/ws/detect/letters"
+        await asyncio.gather(*(ws_worker(ws_url, images, budget, recorder) for _ in range(concurrency)))
+    else:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+            await asyncio.gather(*(
+                http_worker(client, endpoint, images, budget, recorder, batch_files)
+                for _ in range(concurrency)
+            ))
+
+    return recorder.report(time.perf_counter() - started)
+
+
+def _print_report(rows):
+    print("-" * 86)
+    print(f"{'endpoint':10s} {'reqs':>6s} {'errors':>6s} {'req/s':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    print("-" * 86)
+    for row in rows:
+        print(
+            f"{row['endpoint']:10s} {row['requests']:6d} {row['errors']:6d} {row['throughput_rps']:8.2f} "
+            f"{row.get('p50_ms', 0):9.2f} {row.get('p95_ms', 0):9.2f} {row.get('p99_ms', 0):9.2f} {row.get('max_ms', 0):9.2f}"
+        )
+        if row["error_kinds"]:
+            print(f"{'':10s} errors: {row['error_kinds']}")
+    print("-" * 86)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test endpoint deteksi")
+    parser.add_argument("--url", help="server yang sudah berjalan (default: jalankan server stand-in)")
+    parser.add_argument("--endpoints", nargs="+", default=["letters", "words", "ws"], choices=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="request per endpoint")
+    parser.add_argument("--duration", type=float, default=0.0, help="detik per endpoint (override --requests)")
+    parser.add_argument("--resolution", default="480p", choices=list(RESOLUTIONS))
+    parser.add_argument("--unique-images", type=int, default=32, help="jumlah image berbeda yang dirotasi")
+    parser.add_argument("--batch-files", type=int, default=16, help="image per request untuk endpoint batch")
+    parser.add_argument("--workers", type=int, default=1, help="worker uvicorn (server stand-in)")
+    parser.add_argument("--cache", action="store_true", help="aktifkan prediction cache + session gating (server stand-in)")
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args(argv)
+
+    images = [synthetic_image(args.resolution, seed=seed) for seed in range(args.unique_images)]
+
+    server = tmp = None
+    base_url = args.url.rstrip("/") if args.url else None
+    try:
+        if base_url is None:
+            tmp = tempfile.TemporaryDirectory(prefix="temanisyarat-standin-")
+            write_standin_models(tmp.name)
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            print(f"🚀 Starting stand-in server on {base_url} ({args.workers} worker(s))")
+            server = start_server(tmp.name, port, args.workers, args.cache)
+
+        if not wait_ready(base_url):
+            print(f"❌ Server {base_url} tidak ready")
+            return 1
+
+        print(f"\n📊 Load test {base_url}: concurrency={args.concurrency}, "
+              f"{f'{args.duration:g}s' if args.duration else f'{args.requests} requests'} per endpoint, "
+              f"{args.resolution} JPEG")
+
+        rows = []
+        for endpoint in args.endpoints:
+            rows.append(asyncio.run(run_endpoint(
+                base_url, endpoint, images, args.concurrency,
+                args.requests, args.duration, args.batch_files,
+            )))
+        _print_report(rows)
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({
+                    "url": base_url if args.url else "standin",
+                    "concurrency": args.concurrency,
+                    "resolution": args.resolution,
+                    "results": rows,
+                }, f, indent=2)
+            print(f"💾 Results saved: {args.json}")
+        return 0
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if tmp is not None:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# ====================================================
+#   MICROBENCHMARKS
+# ====================================================
+#
+# Latency per stage pipeline deteksi, per model, batch size dan resolusi
+# image sumber:
+#
+#   decode     bytes -> PIL RGB 224x224      (per resolusi)
+#   transform  PIL -> tensor ternormalisasi  (per image)
+#   raw        RawFrame RGBA 224x224 -> tensor (tanpa codec, pembanding)
+#   forward    model(batch)                  (per model x batch size)
+#   topk       softmax + build_result        (per model x batch size)
+#
+#   python -m benchmarks.micro
+#   python -m benchmarks.micro --models full --batch-sizes 1 8 32 --variant int8 --json micro.json
+#   python -m benchmarks.micro --real        # model asli (butuh file LFS)
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+import torch
+import torch.nn.functional as F
+
+from app.utils.preprocess import PreprocessEngine, RawFrame
+from app.utils.predict_utils import build_result
+from benchmarks.standins import RESOLUTIONS, make_standin_models, synthetic_image
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_call(fn, iters, warmup=3):
+    """
+    Jalankan fn() warmup + iters kali
+
+    Returns:
+        dict: median_ms, p95_ms, min_ms
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(iters):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "p95_ms": round(_percentile(timings, 95), 4),
+        "min_ms": round(min(timings), 4),
+    }
+
+
+def bench_preprocess(resolutions, formats, iters, draft=True, size=224):
+    """Decode + transform per resolusi dan format image"""
+    engine = PreprocessEngine(size=size, draft=draft)
+    out = torch.empty((3, size, size), dtype=torch.float32)
+    rows = []
+    for fmt in formats:
+        for resolution in resolutions:
+            image_bytes = synthetic_image(resolution, fmt=fmt)
+            decoded = engine.decode(image_bytes)
+            rows.append({
+                "stage": "decode", "format": fmt, "resolution": resolution,
+                "bytes": len(image_bytes),
+                **time_call(lambda: engine.decode(image_bytes), iters),
+            })
+            rows.append({
+                "stage": "transform", "format": fmt, "resolution": resolution,
+                **time_call(lambda: engine.to_tensor(decoded, out=out), iters),
+            })
+
+    # Input raw frame: pixel sudah 224x224 di client, tidak ada decode sama sekali
+    raw = RawFrame(decoded.convert("RGBA").tobytes(), size, size)
+    rows.append({
+        "stage": "raw", "format": "RGBA", "resolution": f"{size}px",
+        "bytes": len(raw),
+        **time_call(lambda: engine.from_raw(raw, out=out), iters),
+    })
+    return rows
+
+
+def bench_model(model, labels, model_name, batch_sizes, iters, size=224, top_k=3):
+    """Forward dan top-k per batch size"""
+    generator = torch.Generator().manual_seed(0)
+    rows = []
+    for batch_size in batch_sizes:
+        batch = torch.randn(batch_size, 3, size, size, generator=generator)
+
+        def forward():
+            with torch.no_grad():
+                return model(batch)
+
+        logits = forward()
+        forward_stats = time_call(forward, iters)
+        rows.append({
+            "stage": "forward", "model": model_name, "batch_size": batch_size,
+            "images_per_s": round(batch_size / (forward_stats["median_ms"] / 1000.0), 1),
+            **forward_stats,
+        })
+
+        def topk():
+            probs = F.softmax(logits, dim=1).numpy()
+            return [build_result(row, labels, model_name, top_k) for row in probs]
+
+        rows.append({
+            "stage": "topk", "model": model_name, "batch_size": batch_size,
+            **time_call(topk, iters),
+        })
+    return rows
+
+
+def _print_rows(rows):
+    print("-" * 78)
+    for row in rows:
+        if row["stage"] in ("decode", "transform", "raw"):
+            what = f"{row['format']:4s} {row['resolution']:>6s}"
+            extra = f"{row['bytes'] / 1024:8.1f} KiB" if "bytes" in row else ""
+        else:
+            what = f"{row['model']:5s} bs{row['batch_size']:<4d}"
+            extra = f"{row['images_per_s']:8.1f} img/s" if "images_per_s" in row else ""
+        print(
+            f"{row['stage']:10s} {what:14s} median {row['median_ms']:9.3f} ms  "
+            f"p95 {row['p95_ms']:9.3f} ms  {extra}"
+        )
+    print("-" * 78)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmark decode/transform/forward/top-k")
+    parser.add_argument("--models", nargs="+", default=["full", "words"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS))
+    parser.add_argument("--formats", nargs="+", default=["JPEG"], help="JPEG / PNG / WEBP")
+    parser.add_argument("--no-draft", action="store_true", help="nonaktifkan reduced-scale JPEG decode")
+    parser.add_argument("--variant", default="fp32", help="varian model (lihat app.utils.optimize)")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = default)")
+    parser.add_argument("--iters", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--real", action="store_true", help="pakai model asli dari MODELS_DIR")
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args(argv)
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    if args.real:
+        from app.utils.predict_utils import load_models
+
+        models, _, labels_map = load_models()
+    else:
+        models, labels_map = make_standin_models(args.seed)
+
+    from app.utils.optimize import optimize_model
+
+    print(f"\n📊 Microbenchmark ({'real models' if args.real else 'random AlexNet stand-ins'}, "
+          f"variant={args.variant}, torch threads={torch.get_num_threads()})")
+
+    rows = bench_preprocess(args.resolutions, [f.upper() for f in args.formats], args.iters, draft=not args.no_draft)
+    for name in args.models:
+        if name not in models:
+            print(f"⚠️ Model '{name}' tidak tersedia: {list(models)}")
+            continue
+        model = optimize_model(models[name], args.variant)
+        rows.extend(bench_model(model, labels_map[name], name, args.batch_sizes, args.iters))
+
+    _print_rows(rows)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "environment": {
+                    "python": platform.python_version(),
+                    "torch": torch.__version__,
+                    "machine": platform.machine(),
+                    "threads": torch.get_num_threads(),
+                    "models": "real" if args.real else f"standin(seed={args.seed})",
+                    "variant": args.variant,
+                    "draft": not args.no_draft,
+                },
+                "results": rows,
+            }, f, indent=2)
+        print(f"💾 Results saved: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
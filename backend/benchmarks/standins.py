@@ -0,0 +1,108 @@
+# ====================================================
+#   STAND-IN MODELS + SYNTHETIC IMAGES
+# ====================================================
+#
+# AlexNet dengan weights acak (seed tetap) dan jumlah output yang sama
+# dengan model asli: 26 huruf dan len(LABELS_KATA) kata. Arsitektur dan
+# shape identik, sehingga latency-nya representatif walau prediksinya acak.
+#
+# Tulis stand-in ke folder untuk server (format weights-only):
+#   python -m benchmarks.standins /tmp/standin_models
+#   TEMANISYARAT_MODELS_DIR=/tmp/standin_models uvicorn app.main:app
+
+import io
+import os
+import sys
+
+import numpy as np
+import torch
+from PIL import Image
+
+from app.utils.model_store import build_model, save_weights
+from app.utils.predict_utils import LABELS_HURUF, LABELS_KATA
+
+
+MODEL_FILES = {
+    "full": "alexnet_best_full.pth",
+    "words": "alexnet_best_words.pth",
+}
+
+LABELS = {
+    "full": LABELS_HURUF,
+    "words": LABELS_KATA,
+}
+
+# Resolusi sumber (lebar, tinggi) yang umum dikirim kamera browser
+RESOLUTIONS = {
+    "240p": (320, 240),
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+
+
+def make_standin(model_name, seed=0):
+    """AlexNet acak untuk model_name ("full" / "words"), eval mode"""
+    torch.manual_seed(seed)
+    model = build_model("alexnet", len(LABELS[model_name]), device="cpu")
+    return model.eval()
+
+
+def make_standin_models(seed=0):
+    """
+    Returns:
+        (models, labels_map) dengan format yang sama seperti load_models()
+    """
+    models = {name: make_standin(name, seed + i) for i, name in enumerate(MODEL_FILES)}
+    return models, dict(LABELS)
+
+
+def write_standin_models(out_dir, seed=0):
+    """Simpan stand-in sebagai *.weights.pt di out_dir (dipakai TEMANISYARAT_MODELS_DIR)"""
+    from app.utils.model_store import weights_path_for
+
+    os.makedirs(out_dir, exist_ok=True)
+    models, _ = make_standin_models(seed)
+    paths = []
+    for name, filename in MODEL_FILES.items():
+        path = weights_path_for(os.path.join(out_dir, filename))
+        paths.append(save_weights(models[name], path))
+    return paths
+
+
+def synthetic_image(resolution="480p", fmt="JPEG", seed=0, quality=90):
+    """
+    Image sintetis (gradien + noise) dalam bytes
+
+    Gradien halus + noise membuat ukuran file dan kerja decoder mirip foto
+    kamera, bukan noise murni (terlalu besar) atau warna rata (terlalu kecil).
+    """
+    width, height = RESOLUTIONS.get(resolution, resolution)
+    rng = np.random.default_rng(seed)
+
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([
+        np.broadcast_to(x, (height, width)),
+        np.broadcast_to(y, (height, width)),
+        (np.broadcast_to(x, (height, width)) + y) / 2,
+    ], axis=-1)
+    # Geser gradien per seed supaya image dengan seed berbeda benar-benar berbeda
+    base = (base + seed * 37.0) % 256.0
+    noise = rng.normal(0, 12, size=(height, width, 3)).astype(np.float32)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+
+    buffer = io.BytesIO()
+    save_kwargs = {"quality": quality} if fmt == "JPEG" else {}
+    Image.fromarray(pixels, "RGB").save(buffer, format=fmt, **save_kwargs)
+    return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    # Usage: python -m benchmarks.standins OUT_DIR [seed]
+    if len(sys.argv) < 2:
+        print("Usage: python -m benchmarks.standins OUT_DIR [seed]")
+        sys.exit(1)
+
+    for path in write_standin_models(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 0):
+        print(f"✅ Stand-in saved: {path}")
@@ -0,0 +1,43 @@
+"""
+TemanIsyarat Backend - Gunicorn config (multi-process serving)
+File: backend/gunicorn.conf.py
+
+Usage:
+    cd backend
+    TEMANISYARAT_WORKERS=8 gunicorn -c gunicorn.conf.py app.main:app
+
+Model dimuat SEKALI di proses master (preload) lalu dibagi read-only ke
+semua worker via copy-on-write; setiap worker mendapat cpu_count / workers
+intra-op thread, atau hasil `python -m app.utils.autotune` bila ada
+tuning.json. Lihat app/utils/runtime.py.
+"""
+
+import os
+
+from app import config
+
+# Jumlah worker: env var > hasil autotune (tuning.json) > satu per core
+workers = int(os.environ.setdefault(
+    "TEMANISYARAT_WORKERS", str(config.TUNING.get("workers") or os.cpu_count() or 1)
+))
+config.WORKERS = workers
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = os.environ.get("TEMANISYARAT_BIND", "0.0.0.0:8000")
+
+# Import app di master sebelum fork
+preload_app = True
+timeout = 120
+
+
+def on_starting(server):
+    from app.utils.runtime import preload_for_fork
+
+    loaded = preload_for_fork()
+    server.log.info("Preloaded models before fork: %s", list(loaded))
+
+
+def post_fork(server, worker):
+    from app.utils.runtime import configure_threads
+
+    threads = configure_threads(workers)
+    server.log.info("Worker %s torch threads: %s", worker.pid, threads)
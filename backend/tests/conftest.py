@@ -0,0 +1,114 @@
+# ====================================================
+#   SHARED TEST FIXTURES
+# ====================================================
+#
+# Model kecil (bukan AlexNet) supaya test scheduler / registry / cache
+# berjalan dalam milidetik; image sintetis dari benchmarks.standins.
+#
+#   cd backend && python -m pytest -q
+
+import json
+import os
+
+import torch
+import torch.nn as nn
+import pytest
+
+from benchmarks.standins import synthetic_image
+
+
+LABELS = ["A", "B", "C", "D"]
+
+
+class TinyModel(nn.Module):
+    """
+    Linear di atas input (N, 3, 2, 2); mencatat ukuran setiap batch
+
+    Logits = nilai pixel pertama * bobot per kelas, jadi prediksi bisa
+    diatur dari isi tensor input.
+    """
+
+    def __init__(self, classes=len(LABELS)):
+        super().__init__()
+        self.linear = nn.Linear(12, classes)
+        with torch.no_grad():
+            self.linear.weight.zero_()
+            self.linear.bias.zero_()
+            self.linear.weight[:, 0] = torch.arange(classes, dtype=torch.float32)
+        self.calls = []
+
+    def forward(self, x):
+        self.calls.append([float(v) for v in x[:, 0, 0, 0]])
+        return self.linear(torch.flatten(x, 1))
+
+
+def tiny_input(value=1.0):
+    """Tensor (1, 3, 2, 2) dengan pixel pertama = value (penanda di model.calls)"""
+    tensor = torch.zeros(1, 3, 2, 2)
+    tensor[0, 0, 0, 0] = value
+    return tensor
+
+
+class SmallCNN(nn.Module):
+    """CNN kecil untuk input (N, 3, 224, 224): trace / export ONNX dalam milidetik"""
+
+    def __init__(self, classes=len(LABELS)):
+        super().__init__()
+        torch.manual_seed(0)
+        self.features = nn.Sequential(nn.Conv2d(3, 4, 7, stride=8), nn.ReLU())
+        self.pool = nn.AdaptiveAvgPool2d(1)
+        self.head = nn.Linear(4, classes)
+        self.forwards = 0
+
+    def forward(self, x):
+        self.forwards += 1
+        return self.head(torch.flatten(self.pool(self.features(x)), 1))
+
+
+@pytest.fixture
+def small_cnn():
+    return SmallCNN().eval()
+
+
+@pytest.fixture
+def tiny_model():
+    return TinyModel().eval()
+
+
+@pytest.fixture(scope="session")
+def jpeg_bytes():
+    return synthetic_image("480p", "JPEG", seed=1)
+
+
+@pytest.fixture(scope="session")
+def png_bytes():
+    return synthetic_image("240p", "PNG", seed=2)
+
+
+def write_version(models_dir, name, version, labels=LABELS, seed=0):
+    """Tulis <name>/<version>/model.pth (SmallCNN) + labels.json untuk registry"""
+    version_dir = os.path.join(str(models_dir), name, version)
+    os.makedirs(version_dir, exist_ok=True)
+    torch.manual_seed(seed)
+    model = SmallCNN(len(labels)).eval()
+    with torch.no_grad():
+        for param in model.parameters():
+            param.normal_()
+    torch.save(model, os.path.join(version_dir, "model.pth"))
+    with open(os.path.join(version_dir, "labels.json"), "w", encoding="utf-8") as f:
+        json.dump(labels, f)
+    return version_dir
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    """Folder model registry dengan full@v1 dan words@v1 (SmallCNN), TANPA cascade / kNN"""
+    from app import config
+
+    monkeypatch.setattr(config, "CASCADE", False)
+    monkeypatch.setattr(config, "KNN", False)
+    monkeypatch.setattr(config, "WARMUP_BATCH_SIZES", (1,))
+    root = tmp_path / "models"
+    write_version(root, "full", "v1", seed=1)
+    write_version(root, "words", "v1", labels=["X", "Y", "Z"], seed=2)
+    return root
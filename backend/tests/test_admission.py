@@ -0,0 +1,140 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.admission import (
+    AdmissionController, AdmissionMiddleware, Overloaded, declared_models, priority_var, request_priority
+)
+
+
+def controller(limit=4, reserve=0.25, max_bulk=1):
+    return AdmissionController(max_inflight=lambda name: limit, interactive_reserve=reserve, max_bulk=max_bulk)
+
+
+def test_reserve_is_only_usable_by_interactive():
+    admission = controller(limit=4, reserve=0.25)       # normal: 3 slot, interactive: 4
+    normal = [admission.admit(["full"], "normal") for _ in range(3)]
+    for slot in normal:
+        slot.__enter__()
+
+    with pytest.raises(Overloaded):
+        with admission.admit(["full"], "normal"):
+            pass
+
+    with admission.admit(["full"], "interactive"):
+        assert admission.inflight["full"] == 4
+        assert admission.interactive["full"] == 1
+        assert priority_var.get() == "interactive"
+        with pytest.raises(Overloaded):
+            with admission.admit(["full"], "interactive"):
+                pass
+
+    for slot in normal:
+        slot.__exit__(None, None, None)
+    assert admission.inflight["full"] == 0 and admission.interactive["full"] == 0
+    assert admission.admitted == 4 and admission.rejected == 2
+
+
+def test_slots_are_released_when_the_request_fails():
+    admission = controller()
+
+    with pytest.raises(RuntimeError):
+        with admission.admit(["full", "words"], "interactive"):
+            raise RuntimeError("boom")
+
+    assert admission.inflight == {"full": 0, "words": 0}
+    assert admission.interactive == {"full": 0, "words": 0}
+    assert priority_var.get() == "normal"
+
+
+def test_multi_model_admit_is_all_or_nothing():
+    admission = controller(limit=1, reserve=0.0)
+
+    with admission.admit(["words"]):
+        with pytest.raises(Overloaded) as info:
+            with admission.admit(["full", "words"]):
+                pass
+        # Slot "full" tidak ikut terpakai oleh request yang ditolak
+        assert admission.inflight.get("full", 0) == 0
+    assert info.value.model_name == "words"
+    assert info.value.retry_after >= 1
+
+
+def test_bulk_streams_are_limited_and_yield_to_busy_models():
+    admission = controller(limit=4, reserve=0.5, max_bulk=1)
+
+    with admission.admit_bulk():
+        assert admission.bulk == 1
+        with pytest.raises(Overloaded):
+            with admission.admit_bulk():
+                pass
+    assert admission.bulk == 0
+
+    # Model sudah di batas non-interactive: stream bulk baru ditolak
+    with admission.admit(["full"]), admission.admit(["full"]):
+        with pytest.raises(Overloaded):
+            with admission.admit_bulk():
+                pass
+
+
+def test_priority_comes_from_headers_only():
+    assert request_priority({}) == "normal"
+    assert request_priority({}, session_id="cam-1") == "interactive"
+    assert request_priority({"x-priority": "bulk"}, session_id="cam-1") == "bulk"
+    assert request_priority({"x-priority": "bogus"}) == "normal"
+
+
+def admission_app(admission):
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission,
+        routes={"/all": ["full", "words"]},
+        bulk_routes=["/batch"],
+        aliases={"letters": "full", "words": "words"},
+    )
+
+    @app.post("/all")
+    async def detect_all():
+        return {"inflight": dict(admission.inflight)}
+
+    @app.post("/batch")
+    async def batch():
+        return {"bulk": admission.bulk}
+
+    return TestClient(app)
+
+
+def test_multi_model_route_only_reserves_declared_models():
+    admission = controller(limit=1, reserve=0.0)
+    client = admission_app(admission)
+    admission.inflight["words"] = 1                        # words penuh
+
+    assert client.post("/all").status_code == 503          # tanpa deklarasi: kedua model
+    by_header = client.post("/all", headers={"X-Models": "letters"})
+    by_query = client.post("/all?models=letters")
+
+    assert by_header.status_code == 200 and by_header.json()["inflight"]["full"] == 1
+    assert by_query.status_code == 200
+    assert client.post("/all?models=letters,words").status_code == 503
+    # Nama tidak dikenal: kembali ke semua model (endpoint yang menjawab 400)
+    assert client.post("/all", headers={"X-Models": "bogus"}).status_code == 503
+
+
+def test_only_post_takes_a_bulk_slot():
+    admission = controller(max_bulk=1)
+    client = admission_app(admission)
+    admission.bulk = 1                                     # semua slot bulk terpakai
+
+    assert client.get("/batch").status_code == 405
+    assert client.head("/batch").status_code == 405
+    assert client.post("/batch").status_code == 503
+    assert admission.rejected == 1
+
+
+def test_declared_models_resolves_aliases():
+    aliases = {"letters": "full", "words": "words"}
+
+    assert declared_models("letters, words,letters", aliases, ["full", "words"]) == ["full", "words"]
+    assert declared_models("", aliases, ["full", "words"]) is None
+    assert declared_models("bogus", aliases, ["full", "words"]) is None
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.admission import DeadlineExceeded, deadline_var, priority_var
+from app.utils.batching import BatchScheduler
+from tests.conftest import LABELS, tiny_input
+
+
+async def submit_as(scheduler, value, priority="normal", deadline=None, top_k=3):
+    """Submit dengan prioritas / deadline request sendiri (contextvar per task)"""
+    priority_var.set(priority)
+    deadline_var.set(deadline)
+    return await scheduler.submit(tiny_input(value), top_k=top_k)
+
+
+def test_concurrent_requests_share_one_forward_pass(tiny_model):
+    async def scenario():
+        scheduler = BatchScheduler("tiny", tiny_model, LABELS, max_batch_size=8, max_wait_ms=50)
+        scheduler.start()
+        try:
+            results = await asyncio.gather(*(submit_as(scheduler, v) for v in (1.0, 2.0, 3.0)))
+        finally:
+            await scheduler.stop()
+        return results, scheduler.stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert tiny_model.calls == [[1.0, 2.0, 3.0]]
+    assert [r["prediction"] for r in results] == ["D", "D", "D"]
+    assert stats["batches"] == 1 and stats["requests"] == 3
+    assert stats["batch_size_histogram"] == {"3": 1}
+
+
+def test_each_caller_gets_its_own_top_k(tiny_model):
+    async def scenario():
+        scheduler = BatchScheduler("tiny", tiny_model, LABELS, max_batch_size=8, max_wait_ms=50)
+        scheduler.start()
+        try:
+            return await asyncio.gather(submit_as(scheduler, 1.0, top_k=1), submit_as(scheduler, 1.0, top_k=4))
+        finally:
+            await scheduler.stop()
+
+    one, four = asyncio.run(scenario())
+
+    assert len(one["all_predictions"]) == 1
+    assert [p["letter"] for p in four["all_predictions"]] == ["D", "C", "B", "A"]
+
+
+def test_max_batch_size_splits_batches(tiny_model):
+    async def scenario():
+        scheduler = BatchScheduler("tiny", tiny_model, LABELS, max_batch_size=2, max_wait_ms=50)
+        scheduler.start()
+        try:
+            await asyncio.gather(*(submit_as(scheduler, float(v)) for v in range(5)))
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(scenario())
+
+    assert [len(call) for call in tiny_model.calls] == [2, 2, 1]
+
+
+def test_interactive_is_served_before_queued_bulk(tiny_model):
+    async def scenario():
+        scheduler = BatchScheduler("tiny", tiny_model, LABELS, max_batch_size=1, max_wait_ms=0)
+        scheduler.start()
+        try:
+            # Semua request masuk antrean sebelum scheduler sempat mengambil satu pun
+            await asyncio.gather(
+                submit_as(scheduler, 1.0, "bulk"),
+                submit_as(scheduler, 2.0, "normal"),
+                submit_as(scheduler, 3.0, "interactive"),
+            )
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(scenario())
+
+    assert tiny_model.calls == [[3.0], [2.0], [1.0]]
+
+
+def test_expired_deadline_is_dropped_before_forward(tiny_model):
+    async def scenario():
+        scheduler = BatchScheduler("tiny", tiny_model, LABELS, max_batch_size=8, max_wait_ms=20)
+        scheduler.start()
+        try:
+            return await asyncio.gather(
+                submit_as(scheduler, 1.0, deadline=time.monotonic() - 1.0),
+                submit_as(scheduler, 2.0, deadline=time.monotonic() + 60.0),
+                return_exceptions=True,
+            )
+        finally:
+            await scheduler.stop()
+
+    expired, ok = asyncio.run(scenario())
+
+    assert isinstance(expired, DeadlineExceeded)
+    assert ok["prediction"] == "D"
+    assert tiny_model.calls == [[2.0]]
+
+
+class BrokenModel:
+    def eval(self):
+        return self
+
+    def __call__(self, batch):
+        raise RuntimeError("boom")
+
+
+def test_forward_error_fails_every_caller_in_the_batch():
+    async def scenario():
+        scheduler = BatchScheduler("tiny", BrokenModel(), LABELS, max_batch_size=8, max_wait_ms=20)
+        scheduler.start()
+        try:
+            return await asyncio.gather(submit_as(scheduler, 1.0), submit_as(scheduler, 2.0), return_exceptions=True)
+        finally:
+            await scheduler.stop()
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(r, RuntimeError) and str(r) == "boom" for r in results)
+
+
+def test_submit_before_start_raises(tiny_model):
+    scheduler = BatchScheduler("tiny", tiny_model, LABELS)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scheduler.submit(tiny_input()))
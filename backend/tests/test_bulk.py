@@ -0,0 +1,111 @@
+import asyncio
+import io
+import json
+import tarfile
+import zipfile
+
+import torch
+
+from app.utils.bulk import iter_images, stream_bulk_ndjson
+from app.utils.embeddings import CustomSigns, batch_predictor, signs_path
+from app.utils.executor import InferenceExecutor
+from tests.conftest import LABELS
+
+
+class Upload:
+    """Pengganti UploadFile: filename + content_type + file"""
+
+    def __init__(self, filename, data, content_type="application/octet-stream"):
+        self.filename = filename
+        self.content_type = content_type
+        self.file = io.BytesIO(data)
+
+
+def corrupt_zip(jpeg_bytes):
+    """Zip deflate tiga image; data terkompresi member kedua dirusak"""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name in ("a.jpg", "b.jpg", "c.jpg"):
+            archive.writestr(name, jpeg_bytes)
+    data = bytearray(buf.getvalue())
+
+    with zipfile.ZipFile(io.BytesIO(bytes(data))) as archive:
+        info = archive.getinfo("b.jpg")
+    start = info.header_offset + 30 + len(info.filename.encode()) + len(info.extra)
+    data[start:start + 64] = b"\xff" * 64
+    return bytes(data)
+
+
+def run_stream(uploads, model, predict=None):
+    async def scenario():
+        executor = InferenceExecutor(max_workers=1)
+        try:
+            return [
+                json.loads(line)
+                async for chunk in stream_bulk_ndjson(
+                    uploads, executor, model, LABELS, "full", batch_size=2, predict=predict
+                )
+                for line in chunk.splitlines()
+            ]
+        finally:
+            executor.shutdown(wait=False)
+
+    return asyncio.run(scenario())
+
+
+def test_corrupt_zip_member_is_reported_and_stream_continues(small_cnn, jpeg_bytes):
+    lines = run_stream([Upload("set.zip", corrupt_zip(jpeg_bytes))], small_cnn)
+    rows, summary = lines[:-1], lines[-1]["summary"]
+
+    assert [row["filename"] for row in rows] == ["a.jpg", "b.jpg", "c.jpg"]
+    assert "Gagal membaca file dari arsip" in rows[1]["error"]
+    assert rows[0]["prediction"] in LABELS and rows[2]["prediction"] in LABELS
+    assert summary["total"] == 3 and summary["failed"] == 1 and "error" not in summary
+
+
+def test_truncated_tar_gz_stops_with_one_error_row(jpeg_bytes):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as archive:
+        for name in ("a.jpg", "b.jpg"):
+            info = tarfile.TarInfo(name)
+            info.size = len(jpeg_bytes)
+            archive.addfile(info, io.BytesIO(jpeg_bytes))
+    data = buf.getvalue()[: len(buf.getvalue()) // 2]
+
+    items = list(iter_images([Upload("set.tar.gz", data)], 20 * 1024 * 1024))
+
+    errors = [payload for _, payload in items if isinstance(payload, Exception)]
+    assert len(errors) == 1
+    assert len(items) <= 2
+
+
+def test_summary_is_sent_when_the_model_fails(jpeg_bytes):
+    class BrokenModel:
+        def __call__(self, batch):
+            raise RuntimeError("boom")
+
+    lines = run_stream([Upload("a.jpg", jpeg_bytes, "image/jpeg")], BrokenModel())
+
+    assert "boom" in lines[-1]["summary"]["error"]
+
+
+def test_rows_carry_knn_once_the_model_has_signs(small_cnn, jpeg_bytes, tmp_path):
+    class ChannelEmbedder:
+        """Logits small_cnn + rata-rata per channel sebagai embedding"""
+
+        dim = 3
+
+        def __call__(self, batch):
+            with torch.no_grad():
+                return small_cnn(batch), batch.mean(dim=(2, 3))
+
+    signs = CustomSigns("full@v1", ChannelEmbedder(), signs_path(str(tmp_path), "full@v1"), k=1, project_to=0)
+    uploads = lambda: [Upload("a.jpg", jpeg_bytes, "image/jpeg")]
+
+    before = run_stream(uploads(), small_cnn, predict=batch_predictor(small_cnn, signs))
+    signs.register_images("Sepeda", [jpeg_bytes], "full")
+    after = run_stream(uploads(), small_cnn, predict=batch_predictor(small_cnn, signs))
+
+    assert "knn" not in before[0]
+    assert after[0]["knn"]["label"] == "Sepeda" and after[0]["knn"]["match"]
+    assert after[0]["prediction"] == before[0]["prediction"]
@@ -0,0 +1,84 @@
+from app.utils import cache as cache_module
+from app.utils.cache import PredictionCache, content_hash, dhash
+from app.utils.preprocess import RawFrame
+from benchmarks.standins import synthetic_image
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def result(label):
+    return {"prediction": label, "confidence": 90.0}
+
+
+def test_hit_returns_copy_and_counts():
+    cache = PredictionCache(max_entries=4, ttl_s=30)
+    cache.put("full@v0", b"digest", 3, result("A"))
+
+    hit = cache.get("full@v0", b"digest", 3)
+    hit["prediction"] = "mutated"
+
+    assert cache.get("full@v0", b"digest", 3)["prediction"] == "A"
+    assert cache.get("full@v0", b"digest", 5) is None       # top_k bagian dari key
+    assert cache.get("words@v0", b"digest", 3) is None      # model juga
+    assert cache.stats()["hits"] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    cache = PredictionCache(max_entries=4, ttl_s=30)
+    cache.put("full@v0", b"digest", 3, result("A"))
+
+    clock.now += 29.9
+    assert cache.get("full@v0", b"digest", 3) is not None
+
+    clock.now += 0.2
+    assert cache.get("full@v0", b"digest", 3) is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["entries"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2, ttl_s=30)
+    cache.put("full@v0", b"a", 3, result("A"))
+    cache.put("full@v0", b"b", 3, result("B"))
+    cache.get("full@v0", b"a", 3)                # a jadi paling baru
+    cache.put("full@v0", b"c", 3, result("C"))   # b dibuang
+
+    assert cache.get("full@v0", b"b", 3) is None
+    assert cache.get("full@v0", b"a", 3)["prediction"] == "A"
+    assert cache.get("full@v0", b"c", 3)["prediction"] == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_near_duplicate_lookup_respects_distance():
+    image = synthetic_image("480p", "JPEG", seed=5)
+    recompressed = synthetic_image("480p", "JPEG", seed=5, quality=60)
+    different = synthetic_image("480p", "JPEG", seed=9)
+
+    cache = PredictionCache(max_entries=8, ttl_s=30, phash_distance=4)
+    cache.put("full@v0", content_hash(image), 3, result("A"), phash=dhash(image))
+
+    assert cache.get_similar("full@v0", dhash(recompressed), 3)["prediction"] == "A"
+    assert cache.get_similar("full@v0", dhash(different), 3) is None
+    assert cache.get_similar("words@v0", dhash(recompressed), 3) is None
+
+
+def test_phash_layer_disabled_by_default():
+    image = synthetic_image("240p", "JPEG", seed=5)
+    cache = PredictionCache()
+    cache.put("full@v0", content_hash(image), 3, result("A"), phash=dhash(image))
+
+    assert not cache.phash_enabled
+    assert cache.get_similar("full@v0", dhash(image), 3) is None
+
+
+def test_raw_frame_hash_includes_dimensions():
+    data = bytes(range(48))
+    assert content_hash(RawFrame(data, 4, 4, 3)) != content_hash(RawFrame(data, 3, 4, 4))
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+import torch
+import torchvision
+
+from app.utils import backends
+from app.utils.cascade import ResizeInput, build_first_stage, fast_path_for
+from app.utils.executor import InferenceExecutor
+from app.utils.model_store import save_weights
+from app.utils.registry import ModelRegistry
+
+
+def test_resize_first_stage_reuses_torch_backend_module(small_cnn, tmp_path):
+    backend = backends.create_backend(small_cnn, "tiny", str(tmp_path / "model.pth"), backend="torch", variant="fp32")
+
+    fast, kind = build_first_stage(backend, str(tmp_path / "model.pth"), 128)
+
+    assert kind == "resize@128px"
+    assert isinstance(fast, ResizeInput) and fast.model is small_cnn
+
+
+@pytest.mark.skipif(backends.ort is None, reason="onnxruntime tidak terpasang")
+def test_resize_first_stage_with_onnx_backend_uses_torch_module(models_dir):
+    model_path = os.path.join(str(models_dir), "full", "v1", "model.pth")
+    original = torch.load(model_path, weights_only=False)
+    backend = backends.create_backend(original, "full", model_path, backend="onnxruntime", fork_safe=True)
+
+    # Tanpa model asli: di-load ulang dari file (seperti CLI kalibrasi)
+    fast, kind = build_first_stage(backend, model_path, 128)
+
+    assert kind == "resize@128px"
+    assert isinstance(fast.model, torch.nn.Module)
+    with torch.no_grad():
+        outputs = fast(torch.rand(2, 3, 224, 224))
+    assert outputs.shape == (2, 4)
+    assert not os.path.exists(backends.onnx_path_for(model_path))    # ONNX tidak disentuh
+
+
+def test_resize_fallback_is_opt_in(small_cnn, tmp_path):
+    fast, reason = build_first_stage(small_cnn, str(tmp_path / "model.pth"), resize_fallback=False)
+
+    assert fast is None
+    assert reason == "no model.fast.weights.pt"
+
+
+def test_distilled_first_stage_does_not_need_fallback(small_cnn, tmp_path):
+    model_path = str(tmp_path / "model.pth")
+    save_weights(torchvision.models.mobilenet_v3_small(num_classes=4), fast_path_for(model_path))
+
+    fast, kind = build_first_stage(small_cnn, model_path, resize_fallback=False)
+
+    assert kind == "distilled:model.fast.weights.pt@224px"
+    assert not isinstance(fast, ResizeInput)
+
+
+def test_registry_skips_cascade_without_distilled_weights(models_dir, monkeypatch):
+    from app import config
+
+    monkeypatch.setattr(config, "CASCADE", True)
+    monkeypatch.setattr(config, "CASCADE_RESIZE_FALLBACK", False)
+    registry = ModelRegistry(models_dir=str(models_dir), executor=InferenceExecutor(max_workers=1))
+
+    registry.load_active(warmup=False)
+    without = registry.get("full", "v1")
+    assert without.fast_model is None and without.fast_kind is None
+
+    monkeypatch.setattr(config, "CASCADE_RESIZE_FALLBACK", True)
+    registry = ModelRegistry(models_dir=str(models_dir), executor=InferenceExecutor(max_workers=1))
+    registry.load_active(warmup=False)
+    assert registry.get("full", "v1").fast_kind == "resize@128px"
@@ -0,0 +1,95 @@
+import threading
+
+import torch
+import torchvision
+
+from app.utils.embeddings import CustomSigns, Embedder, signs_path
+
+
+DIM = 16
+
+
+class StubEmbedder:
+    """Embedding = input itu sendiri (tanpa model): cukup untuk index + persistence"""
+
+    dim = DIM
+
+    def __call__(self, batch):
+        return batch[:, :4], batch
+
+
+def direction(i):
+    vector = torch.zeros(1, DIM)
+    vector[0, i] = 1.0
+    return vector
+
+
+def worker(path):
+    """Satu worker gunicorn = satu CustomSigns di atas file index yang sama"""
+    return CustomSigns("words@v1", StubEmbedder(), path, k=1, threshold=0.9, project_to=0)
+
+
+def label_of(signs, i):
+    result = signs.classify(direction(i))[0]
+    return result["label"] if result is not None else None
+
+
+def test_register_classify_remove_reload_round_trip(tmp_path):
+    path = signs_path(str(tmp_path), "words@v1")
+    a, b = worker(path), worker(path)
+
+    a.register("Sepeda", direction(0).repeat(3, 1))
+    assert b.active()                                  # b memuat ulang file dari a
+    assert label_of(b, 0) == "Sepeda"
+
+    b.register("Rumah", direction(1))                  # b menulis di atas isi terbaru
+    assert label_of(a, 1) == "Rumah"
+    assert a.stats()["signs"] == {"Sepeda": 3, "Rumah": 1}
+
+    assert a.remove("Sepeda")
+    assert not b.remove("Sepeda")                      # sudah dihapus worker lain
+    assert label_of(b, 0) == "Rumah"                   # satu-satunya sign tersisa
+
+    fresh = worker(path)
+    assert fresh.stats()["signs"] == {"Rumah": 1}
+    assert b.stats()["reloads"] >= 2
+
+
+def test_stale_writers_do_not_overwrite_each_other(tmp_path):
+    path = signs_path(str(tmp_path), "words@v1")
+    writers = [worker(path) for _ in range(6)]         # semua mulai dari index kosong
+
+    threads = [
+        threading.Thread(target=w.register, args=(f"sign-{i}", direction(i)))
+        for i, w in enumerate(writers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    expected = {f"sign-{i}": 1 for i in range(6)}
+    assert worker(path).stats()["signs"] == expected
+    assert all(w.stats()["signs"] == expected for w in writers)
+
+
+def test_index_deleted_on_disk_resets_to_empty(tmp_path):
+    path = signs_path(str(tmp_path), "words@v1")
+    signs = worker(path)
+    signs.register("Sepeda", direction(0))
+
+    tmp_path.joinpath("words@v1.knn.npz").unlink()
+
+    assert not signs.active()
+    assert signs.classify(direction(0)) == [None]
+
+
+def test_embedder_matches_model_logits():
+    model = torchvision.models.alexnet(num_classes=4).eval()
+    batch = torch.rand(2, 3, 224, 224)
+
+    logits, embeddings = Embedder(model)(batch)
+
+    with torch.no_grad():
+        assert torch.allclose(logits, model(batch), atol=1e-5)
+    assert embeddings.shape == (2, 4096)
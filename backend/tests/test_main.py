@@ -0,0 +1,125 @@
+import asyncio
+from types import SimpleNamespace
+
+import torch
+from fastapi.testclient import TestClient
+
+from app import config, main
+from app.utils.embeddings import CustomSigns, signs_path
+from app.utils.executor import InferenceExecutor
+from app.utils.registry import ModelRegistry
+from tests.conftest import write_version
+
+
+def test_stream_holds_routed_version_until_finished(models_dir, monkeypatch):
+    write_version(models_dir, "full", "v2", seed=3)
+
+    async def scenario():
+        registry = ModelRegistry(models_dir=str(models_dir), executor=InferenceExecutor(max_workers=2), idle_ttl_s=0.01)
+        await registry.start_active(registry.load_active())
+        monkeypatch.setattr(main, "registry", registry)
+        entry = registry.get("full", "v1")          # versi non-aktif, mis. X-Model-Version: full@v1
+        seen = []
+
+        async def make_stream(model, labels, predict):
+            seen.append((model, labels))
+            for chunk in ("a\n", "b\n"):
+                await asyncio.sleep(0.03)
+                assert await registry.evict_idle() == []     # masih di-stream: tidak boleh di-evict
+                yield chunk
+
+        try:
+            chunks = [chunk async for chunk in main.stream_with_entry(entry, make_stream)]
+            inflight = entry.inflight
+            await asyncio.sleep(0.03)
+            evicted = await registry.evict_idle()
+            return chunks, seen, inflight, evicted
+        finally:
+            await registry.stop()
+
+    chunks, seen, inflight, evicted = asyncio.run(scenario())
+
+    assert chunks == ["a\n", "b\n"]
+    assert seen[0][0] is not None and len(seen[0][1]) == 4
+    assert inflight == 0
+    assert evicted == ["full@v1"]
+
+
+def test_stream_cleanup_runs_when_version_cannot_load(monkeypatch):
+    class FailingRegistry:
+        def use(self, entry):
+            raise RuntimeError("load gagal")
+
+    monkeypatch.setattr(main, "registry", FailingRegistry())
+    closed = []
+
+    async def drain():
+        try:
+            async for _ in main.stream_with_entry(None, lambda model, labels, predict: None, cleanup=lambda: closed.append(True)):
+                pass
+        except RuntimeError:
+            pass
+
+    asyncio.run(drain())
+    assert closed == [True]
+
+
+def test_result_key_follows_the_sign_index_of_any_worker(tmp_path, monkeypatch):
+    class StubEmbedder:
+        dim = 4
+
+        def __call__(self, batch):
+            return batch, batch
+
+    monkeypatch.setattr(config, "KNN_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "knn_enabled", lambda name: name == "words")
+    entry = SimpleNamespace(name="words", key="words@v1")
+    # Worker lain: CustomSigns sendiri di atas file index yang sama
+    other = CustomSigns("words@v1", StubEmbedder(), signs_path(str(tmp_path), "words@v1"), project_to=0)
+
+    empty = main.result_key(entry)
+    other.register("Sepeda", torch.eye(4)[:1])
+    registered = main.result_key(entry)
+    other.remove("Sepeda")
+    removed = main.result_key(entry)
+
+    assert empty == "words@v1"
+    assert registered.startswith("words@v1+knn:")
+    assert len({empty, registered, removed}) == 3
+    assert main.result_key(SimpleNamespace(name="full", key="full@v1")) == "full@v1"
+
+
+ORIGIN = "http://localhost:3000"
+
+
+def test_oversized_upload_gets_413_with_cors_headers():
+    # Tanpa startup (tanpa model): 413 dijawab BodyLimitMiddleware sebelum endpoint
+    client = TestClient(main.app)
+    body = b"x" * (config.UPLOAD_MAX_BYTES + 128 * 1024)
+
+    response = client.post(
+        "/api/detect/letters",
+        content=body,
+        headers={"Origin": ORIGIN, "Content-Type": "application/octet-stream"},
+    )
+
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert response.headers["access-control-allow-credentials"] == "true"
+
+
+def test_shed_request_gets_503_with_cors_headers(monkeypatch):
+    client = TestClient(main.app)
+    # Model "full" penuh (slot non-interactive habis): ditolak sebelum upload dibaca
+    monkeypatch.setitem(main.admission.inflight, "full", config.admission_limit("full"))
+
+    response = client.post(
+        "/api/detect/letters",
+        files={"file": ("a.jpg", b"not read", "image/jpeg")},
+        headers={"Origin": ORIGIN},
+    )
+
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert "retry-after" in response.headers["access-control-expose-headers"].lower()
@@ -0,0 +1,81 @@
+import io
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from app.utils.preprocess import (
+    PARITY_TOLERANCE, PreprocessEngine, RawFrame, raw_frame_from_headers, reference_transform,
+)
+from benchmarks.standins import synthetic_image
+
+
+def encode(array, mode, fmt):
+    buffer = io.BytesIO()
+    Image.fromarray(array, mode).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def rgba_pixels(width=200, height=300, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("image_bytes", [
+    synthetic_image("480p", "JPEG", seed=1),
+    synthetic_image("1080p", "JPEG", seed=3),
+    synthetic_image("240p", "PNG", seed=2),
+    encode(rgba_pixels(), "RGBA", "PNG"),
+], ids=["jpeg-480p", "jpeg-1080p", "png-rgb", "png-rgba"])
+def test_exact_engine_matches_torchvision_transform(image_bytes):
+    expected = reference_transform(image_bytes)
+    actual = PreprocessEngine(draft=False).prepare(image_bytes)
+
+    assert actual.shape == expected.shape == (3, 224, 224)
+    assert actual.dtype == torch.float32
+    assert float((actual - expected).abs().max()) < PARITY_TOLERANCE
+
+
+def test_draft_decode_keeps_shape_dtype_and_stays_close(jpeg_bytes):
+    expected = reference_transform(jpeg_bytes)
+    drafted = PreprocessEngine(draft=True).prepare(jpeg_bytes)
+
+    assert drafted.shape == (3, 224, 224)
+    assert drafted.dtype == torch.float32
+    # Decode di skala lebih rendah: beda per pixel kecil, rata-rata jauh lebih kecil
+    assert float((drafted - expected).abs().mean()) < 0.05
+
+
+@pytest.mark.parametrize("channels,mode", [(3, "RGB"), (4, "RGBA")])
+def test_raw_frame_matches_decoded_image(channels, mode):
+    pixels = rgba_pixels(224, 224, seed=channels)[..., :channels].copy()
+    frame = RawFrame(bytearray(pixels.tobytes()), 224, 224)
+
+    actual = PreprocessEngine().prepare(frame)
+    expected = reference_transform(encode(pixels, mode, "PNG"))
+
+    assert frame.channels == channels
+    assert actual.shape == (3, 224, 224)
+    assert actual.dtype == torch.float32
+    assert float((actual - expected).abs().max()) < PARITY_TOLERANCE
+
+
+def test_prepare_batch_fills_preallocated_buffer(jpeg_bytes, png_bytes):
+    engine = PreprocessEngine(draft=False)
+    batch = engine.prepare_batch([jpeg_bytes, png_bytes])
+
+    assert batch.shape == (2, 3, 224, 224)
+    assert batch.dtype == torch.float32
+    assert torch.equal(batch[1], engine.prepare(png_bytes))
+
+
+def test_raw_frame_rejects_wrong_size_and_format():
+    data = bytes(224 * 224 * 4)
+    with pytest.raises(ValueError):
+        raw_frame_from_headers(data, {"x-frame-width": "100", "x-frame-height": "100"}, size=224)
+    with pytest.raises(ValueError):
+        raw_frame_from_headers(data, {"x-frame-width": "224", "x-frame-height": "224", "x-frame-format": "bgr"})
+    with pytest.raises(ValueError):
+        RawFrame(bytes(10), 224, 224)
+    with pytest.raises(ValueError):
+        PreprocessEngine(size=224).from_raw(RawFrame(bytes(8 * 8 * 3), 8, 8))
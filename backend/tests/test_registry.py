@@ -0,0 +1,103 @@
+import asyncio
+
+from app.utils.executor import InferenceExecutor
+from app.utils.registry import ModelRegistry
+from tests.conftest import write_version
+
+
+async def start_registry(models_dir, **kwargs):
+    registry = ModelRegistry(models_dir=str(models_dir), executor=InferenceExecutor(max_workers=2), **kwargs)
+    await registry.start_active(registry.load_active())
+    return registry
+
+
+def test_refresh_hot_swaps_to_new_version(models_dir):
+    async def scenario():
+        registry = await start_registry(models_dir)
+        try:
+            old_scheduler = registry.schedulers["full"]
+            write_version(models_dir, "full", "v2", seed=3)
+            activated = await registry.refresh()
+
+            return activated, registry, old_scheduler
+        finally:
+            await registry.stop()
+
+    activated, registry, old_scheduler = asyncio.run(scenario())
+
+    assert activated == ["full@v2"]
+    assert registry.swaps == 1
+    assert registry.route("full").version == "v2"
+    # Versi lama tetap bisa dipilih eksplisit (X-Model-Version: full@v1)
+    assert registry.route("full", "v1").version == "v1"
+    assert registry.get("full", "v1").scheduler is None     # sudah di-stop oleh registry.stop()
+    assert old_scheduler is not registry.get("full", "v2").scheduler
+
+
+def test_sticky_split_routes_a_session_to_one_version(models_dir):
+    async def scenario():
+        registry = await start_registry(models_dir)
+        await registry.stop()
+        return registry
+
+    write_version(models_dir, "full", "v2", seed=3)
+    registry = asyncio.run(scenario())
+    registry.set_split("full", "v1:50,v2:50")
+
+    picks = {registry.route("full", route_key="session-42").version for _ in range(20)}
+    assert len(picks) == 1
+    # Versi eksplisit mengalahkan split
+    assert registry.route("full", "v1", route_key="session-42").version == "v1"
+
+
+def test_use_blocks_eviction_until_released(models_dir):
+    write_version(models_dir, "full", "v2", seed=3)
+
+    async def scenario():
+        registry = await start_registry(models_dir, idle_ttl_s=0.01)
+        try:
+            old = registry.get("full", "v1")
+            await registry.ensure_ready(old)          # versi non-aktif, dimuat on-demand
+            assert registry.get("full").version == "v2"
+
+            async with registry.use(old):
+                assert old.inflight == 1
+                await asyncio.sleep(0.05)
+                assert await registry.evict_idle() == []
+                assert old.scheduler is not None
+
+            assert old.inflight == 0
+            await asyncio.sleep(0.05)
+            evicted = await registry.evict_idle()
+            state_after_evict = (old.state, old.scheduler, old.model)
+
+            # Dipakai lagi: dimuat ulang secara transparan
+            async with registry.use(old):
+                reloaded = old.scheduler is not None
+            return evicted, state_after_evict, reloaded, registry.evictions
+        finally:
+            await registry.stop()
+
+    evicted, (state, scheduler, model), reloaded, evictions = asyncio.run(scenario())
+
+    assert evicted == ["full@v1"]                     # versi aktif v2 tidak pernah di-evict
+    assert state == "evicted" and scheduler is None and model is None
+    assert reloaded
+    assert evictions == 1
+
+
+def test_max_loaded_evicts_least_recently_used_version(models_dir):
+    write_version(models_dir, "full", "v2", seed=3)
+    write_version(models_dir, "full", "v3", seed=4)
+
+    async def scenario():
+        registry = await start_registry(models_dir, idle_ttl_s=0, max_loaded=1)
+        try:
+            for version in ("v1", "v2"):
+                async with registry.use(registry.get("full", version)):
+                    await asyncio.sleep(0.01)
+            return await registry.evict_idle()
+        finally:
+            await registry.stop()
+
+    assert asyncio.run(scenario()) == ["full@v1"]
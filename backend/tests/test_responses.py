@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from app.utils import responses
+from app.utils.responses import compact_prediction, label_table, render
+from tests.conftest import LABELS
+
+
+RESULT = {
+    "prediction": "B",
+    "confidence": 91.234,
+    "all_predictions": [{"letter": "B", "confidence": 91.234}, {"letter": "A", "confidence": 5.1}],
+    "model_used": "full",
+    "total_classes": 4,
+    "model_version": "v1",
+}
+
+
+def vary(response):
+    return {value.strip().lower() for value in response.headers["vary"].split(",")}
+
+
+def test_render_varies_on_every_negotiated_header():
+    response = render({"ok": True}, {})
+
+    assert vary(response) == {"accept", "x-response-format", "x-label-table"}
+    assert json.loads(response.body) == {"ok": True}
+
+
+@pytest.mark.skipif(responses.msgpack is None, reason="msgpack tidak terpasang")
+def test_msgpack_response_keeps_vary():
+    response = render({"ok": True}, {"accept": "application/msgpack"})
+
+    assert response.media_type == "application/msgpack"
+    assert responses.msgpack.unpackb(response.body) == {"ok": True}
+    assert "x-label-table" in vary(response)
+
+
+def test_compact_uses_indices_only_for_a_known_label_table():
+    table, _ = label_table(LABELS)
+
+    by_name = compact_prediction(RESULT, LABELS, tables=set())
+    by_index = compact_prediction(RESULT, LABELS, tables={table})
+
+    assert by_name == {"p": "B", "c": 91.23, "k": [["B", 91.23], ["A", 5.1]], "v": "v1"}
+    assert by_index == {"p": 1, "c": 91.23, "k": [[1, 91.23], [0, 5.1]], "t": table, "v": "v1"}
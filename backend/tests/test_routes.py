@@ -0,0 +1,64 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes.detect import router
+from app.utils import predict_utils
+from app.utils.executor import InferenceExecutor
+from app.utils.registry import ModelRegistry
+from tests.conftest import LABELS
+
+
+def make_app(models_dir):
+    app = FastAPI()
+    app.include_router(router, prefix="/legacy")
+    registry = ModelRegistry(models_dir=str(models_dir))
+    app.state.registry = registry
+
+    @app.on_event("startup")
+    async def startup():
+        app.state.executor = InferenceExecutor(max_workers=2, max_pending=8)
+        registry.executor = app.state.executor
+        await registry.start_active(registry.load_active())
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        await registry.stop()
+        app.state.executor.shutdown(wait=False)
+
+    return app, registry
+
+
+def test_router_uses_the_app_registry_without_loading_models(models_dir, jpeg_bytes, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("router tidak boleh memuat model sendiri")
+
+    monkeypatch.setattr(predict_utils, "load_models", fail)
+    app, registry = make_app(models_dir)
+
+    with TestClient(app) as client:
+        info = client.get("/legacy/models/info").json()
+        assert info["available_models"] == ["full", "words"]
+        assert info["labels"]["full"]["labels"] == LABELS
+
+        result = client.post("/legacy/detect/letters", files={"file": ("a.jpg", jpeg_bytes, "image/jpeg")}).json()
+        assert result["prediction"] in LABELS
+        assert result["model_version"] == "v1"
+
+        result = client.post(
+            "/legacy/detect", files={"file": ("a.jpg", jpeg_bytes, "image/jpeg")}, data={"model_type": "words"}
+        ).json()
+        assert result["prediction"] in ["X", "Y", "Z"]
+
+        # Permintaan lewat router ikut dihitung oleh registry (scheduler yang sama)
+        assert registry.get("full").requests == 1
+        assert registry.get("words").requests == 1
+
+
+def test_router_is_503_until_models_are_loaded(jpeg_bytes):
+    app = FastAPI()
+    app.include_router(router)
+
+    with TestClient(app) as client:
+        assert client.get("/models/info").status_code == 503
+        response = client.post("/detect/letters", files={"file": ("a.jpg", jpeg_bytes, "image/jpeg")})
+        assert response.status_code == 503
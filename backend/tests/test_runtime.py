@@ -0,0 +1,75 @@
+import os
+
+import pytest
+import torch
+
+from app import config
+from app.utils import backends
+from app.utils.optimize import DeferredTrace, optimize_model
+from app.utils.runtime import file_lock, threads_per_worker
+
+
+def test_threads_are_split_between_workers(monkeypatch):
+    monkeypatch.setattr(config, "INTRA_OP_THREADS", 0)
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+    assert threads_per_worker(1) == 0
+    assert threads_per_worker(4) == 2
+    assert threads_per_worker(16) == 1
+
+    monkeypatch.setattr(config, "INTRA_OP_THREADS", 3)
+    assert threads_per_worker(4) == 3
+
+
+def test_deferred_script_variant_runs_no_forward_until_first_call(small_cnn):
+    optimized = optimize_model(small_cnn, "script", defer_trace=True)
+
+    assert isinstance(optimized, DeferredTrace)
+    assert small_cnn.forwards == 0
+
+    inputs = torch.randn(2, 3, 224, 224)
+    with torch.no_grad():
+        expected = small_cnn(inputs)
+        actual = optimized(inputs)
+    assert torch.allclose(actual, expected, atol=1e-5)
+
+
+@pytest.mark.skipif(backends.ort is None, reason="onnxruntime tidak terpasang")
+def test_fork_safe_onnx_backend_exports_on_first_forward(small_cnn, tmp_path, caplog, capsys):
+    model_path = str(tmp_path / "model.pth")
+    backend = backends.create_backend(small_cnn, "tiny", model_path, backend="onnxruntime", fork_safe=True)
+    onnx_path = backends.onnx_path_for(model_path)
+
+    # Master pre-fork: tidak ada export (= tidak ada forward pass)
+    assert not os.path.exists(onnx_path)
+    assert small_cnn.forwards == 0
+
+    inputs = torch.randn(3, 3, 224, 224)
+    with caplog.at_level("INFO", logger="temanisyarat.backends"):
+        actual = backend(inputs)
+    assert os.path.exists(onnx_path)
+    # Export di worker lewat logger (bukan print di jalur serving)
+    assert any(r.message == "ONNX export" and r.fields == {"path": onnx_path} for r in caplog.records)
+    assert "Export ONNX" not in capsys.readouterr().out
+    with torch.no_grad():
+        assert torch.allclose(actual, small_cnn(inputs), atol=1e-4)
+
+
+@pytest.mark.skipif(backends.ort is None, reason="onnxruntime tidak terpasang")
+def test_onnx_export_is_reused_until_weights_change(small_cnn, tmp_path):
+    model_path = tmp_path / "model.pth"
+    model_path.write_bytes(b"weights")
+    onnx_path = backends.onnx_path_for(str(model_path))
+
+    backends.ensure_onnx(small_cnn, str(model_path), onnx_path)
+    exported = os.path.getmtime(onnx_path)
+    assert not backends.onnx_stale(onnx_path, str(model_path))
+
+    os.utime(model_path, (exported + 10, exported + 10))
+    assert backends.onnx_stale(onnx_path, str(model_path))
+
+
+def test_file_lock_creates_lock_file(tmp_path):
+    target = tmp_path / "sub" / "index.npz"
+    with file_lock(str(target)):
+        assert os.path.exists(f"{target}.lock")
@@ -0,0 +1,44 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils.uploads import BodyLimitMiddleware
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(BodyLimitMiddleware, max_bytes=100, overrides={"/big": 1000})
+
+    @app.post("/{path:path}")
+    async def echo(request: Request):
+        return {"received": len(await request.body())}
+
+    return app
+
+
+def test_declared_content_length_over_limit_is_413():
+    client = TestClient(make_app())
+
+    response = client.post("/small", content=b"x" * 101)
+
+    assert response.status_code == 413
+    assert "100 bytes" in response.json()["detail"]
+
+
+def test_chunked_body_over_limit_is_413():
+    client = TestClient(make_app())
+
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 40          # tanpa Content-Length: dihitung saat dibaca
+
+    response = client.post("/small", content=chunks())
+
+    assert response.status_code == 413
+
+
+def test_path_override_and_body_within_limit():
+    client = TestClient(make_app())
+
+    assert client.post("/small", content=b"x" * 100).json() == {"received": 100}
+    assert client.post("/big", content=b"x" * 900).json() == {"received": 900}
+    assert client.post("/big", content=b"x" * 1001).status_code == 413
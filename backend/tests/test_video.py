@@ -0,0 +1,120 @@
+import asyncio
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app.utils import video
+from app.utils.executor import InferenceExecutor
+from app.utils.uploads import UploadError
+from tests.conftest import LABELS
+
+pytestmark = pytest.mark.skipif(video.av is None, reason="PyAV tidak terpasang")
+
+
+def mjpeg_clip(frames=30):
+    """Stream MJPEG mentah (25 fps): TANPA metadata durasi, timestamp frame tetap ada"""
+    buf = io.BytesIO()
+    container = video.av.open(buf, "w", format="mjpeg")
+    stream = container.add_stream("mjpeg", rate=25)
+    stream.width, stream.height, stream.pix_fmt = 64, 64, "yuvj420p"
+    for i in range(frames):
+        frame = video.av.VideoFrame.from_ndarray(np.full((64, 64, 3), i * 8, np.uint8), format="rgb24")
+        for packet in stream.encode(frame):
+            container.mux(packet)
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+    buf.seek(0)
+    return buf
+
+
+def run_stream(clip, model, **kwargs):
+    async def scenario():
+        container, stream = video.open_video(clip, max_duration_s=kwargs.get("max_duration_s", 0.0))
+        executor = InferenceExecutor(max_workers=1)
+        try:
+            return [
+                json.loads(line)
+                async for chunk in video.stream_video_ndjson(container, stream, executor, model, LABELS, "full", **kwargs)
+                for line in chunk.splitlines()
+            ]
+        finally:
+            executor.shutdown(wait=False)
+
+    return asyncio.run(scenario())
+
+
+def test_duration_cap_applies_to_decoded_timestamps(small_cnn):
+    clip = mjpeg_clip(30)                 # 1.2 s, metadata durasi tidak ada
+    container, stream = video.open_video(clip, max_duration_s=0.5)
+    assert video.video_duration(container, stream) is None
+    container.close()
+
+    clip.seek(0)
+    lines = run_stream(clip, small_cnn, fps=10.0, max_duration_s=0.5)
+    summary = lines[-1]["summary"]
+
+    assert "terlalu panjang" in summary["error"]
+    assert 0 < summary["frames"] <= 6     # sampel 0.0 .. 0.5 s saja
+    assert all(s["segment"]["end_s"] <= 0.7 for s in lines[:-1])
+
+
+def test_sampler_raises_past_the_cap():
+    container, stream = video.open_video(mjpeg_clip(30))
+    try:
+        with pytest.raises(UploadError) as info:
+            list(video.iter_sampled_frames(container, stream, 5.0, max_duration_s=0.3))
+    finally:
+        container.close()
+    assert info.value.status_code == 413
+
+
+def test_segments_carry_top_k_predictions(small_cnn):
+    lines = run_stream(mjpeg_clip(10), small_cnn, fps=5.0, top_k=2)
+    segments = [line["segment"] for line in lines[:-1]]
+
+    assert segments and "error" not in lines[-1]["summary"]
+    for segment in segments:
+        assert len(segment["all_predictions"]) == 2
+        assert segment["all_predictions"][0]["letter"] == segment["label"]
+
+
+def test_segment_merger_averages_top_k_over_frames():
+    def frame(*pairs):
+        predictions = [{"letter": letter, "confidence": conf} for letter, conf in pairs]
+        return {"prediction": pairs[0][0], "confidence": pairs[0][1], "all_predictions": predictions}
+
+    merger = video.SegmentMerger(0.2, top_k=2)
+    assert merger.add(0.0, frame(("A", 80.0), ("B", 15.0))) is None
+    assert merger.add(0.2, frame(("A", 60.0), ("C", 30.0))) is None
+    segment = merger.add(0.4, frame(("B", 90.0), ("A", 5.0)))
+
+    assert segment["label"] == "A" and segment["frames"] == 2
+    # B tidak masuk top-k frame kedua: dihitung 0 untuk frame itu
+    assert segment["all_predictions"] == [
+        {"letter": "A", "confidence": 70.0},
+        {"letter": "C", "confidence": 15.0},
+    ]
+
+    plain = video.SegmentMerger(0.2)
+    plain.add(0.0, frame(("A", 80.0), ("B", 15.0)))
+    assert "all_predictions" not in plain.flush()
+
+
+def test_segment_keeps_the_best_knn_match():
+    def frame(similarity=None):
+        result = {"prediction": "A", "confidence": 80.0, "all_predictions": []}
+        if similarity is not None:
+            result["knn"] = {"label": "Sepeda", "similarity": similarity, "match": similarity >= 0.85}
+        return result
+
+    merger = video.SegmentMerger(0.2)
+    merger.add(0.0, frame(0.7))
+    merger.add(0.2, frame())
+    merger.add(0.4, frame(0.9))
+
+    assert merger.flush()["knn"]["similarity"] == 0.9
+    merger.add(0.6, frame())
+    assert "knn" not in merger.flush()
@@ -23,6 +23,9 @@ export default function DeteksiContent() {
   const canvasRef = useRef<HTMLCanvasElement>(null)
   const fileInputRef = useRef<HTMLInputElement>(null)
   const detectionIntervalRef = useRef<NodeJS.Timeout | null>(null)
+  // Session kamera: dikirim sebagai header X-Session-ID supaya backend
+  // memberi prioritas interactive (admission membaca header, bukan form)
+  const sessionIdRef = useRef<string | null>(null)
 
   const [detectionMode, setDetectionMode] = useState<DetectionMode>("upload")
   const [modelType, setModelType] = useState<ModelType>("letters")
@@ -144,10 +147,11 @@ export default function DeteksiContent() {
   //  BACKEND CALL
   // =====================================================================
 
-  const tryDetectWithBackend = async (blob: Blob): Promise<any | null> => {
+  const tryDetectWithBackend = async (blob: Blob, sessionId: string | null = null): Promise<any | null> => {
     try {
       const formData = new FormData()
       formData.append("file", blob, "capture.jpg")
+      const headers: Record<string, string> = sessionId ? { "X-Session-ID": sessionId } : {}
 
       const endpoint = `${API_URL}/api/detect/${modelType}`
       console.log("=".repeat(60))
@@ -159,6 +163,7 @@ export default function DeteksiContent() {
       const response = await fetch(endpoint, {
         method: "POST",
         body: formData,
+        headers,
         mode: 'cors', // Explicitly set CORS mode
         credentials: 'omit', // Don't send credentials
       })
@@ -216,6 +221,10 @@ export default function DeteksiContent() {
 
       if (videoRef.current) {
         videoRef.current.srcObject = mediaStream
+        sessionIdRef.current =
+          typeof crypto !== "undefined" && "randomUUID" in crypto
+            ? crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(36).slice(2)}`
         setStream(mediaStream)
         setIsCameraActive(true)
       }
@@ -229,6 +238,7 @@ export default function DeteksiContent() {
     if (stream) {
       stream.getTracks().forEach((track) => track.stop())
     }
+    sessionIdRef.current = null
     setStream(null)
     setIsCameraActive(false)
   }
@@ -384,7 +394,7 @@ export default function DeteksiContent() {
           result = getMockDetection()
         } else {
           console.log("🔵 [CAMERA] Calling REAL backend...")
-          const backendResult = await tryDetectWithBackend(blob)
+          const backendResult = await tryDetectWithBackend(blob, sessionIdRef.current)
           result = backendResult || getMockDetection()
         }
 